@@ -0,0 +1,98 @@
+# 流量回放基准测试, 在 elevator_scheduling 目录下运行:
+#   python -m benchmarks [--scenario 名字 ...] [--policy 名字 ...] [--mode greedy|batch|matching ...]
+#                        [--output 结果.json] [--compare 旧结果.json]
+#   python -m benchmarks --trace 日志.elvt ...     回放界面记录的按钮事件日志, 代替内置的流量场景
+# 结果写成 JSON, 用 --compare 与另一次提交的结果对比
+import argparse
+import json
+import platform
+import sys
+from core.policies import POLICIES
+from .traffic import SCENARIOS
+from .runner import MODES, run_benchmark, run_trace
+
+# 对比时关注的指标, 都是越小越好(events_per_sec 除外)
+COMPARED_METRICS = (
+    ('wait', 'avg'), ('wait', 'p95'), ('wait', 'p99'),
+    ('journey', 'avg'), ('journey', 'p95'), ('journey', 'p99'),
+    ('car_trips',), ('floors_travelled',), ('dispatch_cpu',), ('events_per_sec',),
+)
+
+
+def metric(result, path):
+    for key in path:
+        result = result[key]
+    return result
+
+
+def result_key(result):
+    return result['scenario'], result['policy'], result['mode'], result['seed']
+
+
+def compare(results, baseline):
+    old_results = {result_key(result): result for result in baseline['results']}
+    for result in results:
+        old = old_results.get(result_key(result))
+        if old is None:
+            continue
+        print("%s / %s / %s:" % result_key(result)[:3])
+        for path in COMPARED_METRICS:
+            new_value, old_value = metric(result, path), metric(old, path)
+            if new_value is None or old_value is None:
+                continue
+            change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+            print("  %-20s %12s -> %-12s %+.1f%%" % ('.'.join(path), old_value, new_value, change))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='电梯调度流量回放基准测试')
+    parser.add_argument('--scenario', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--policy', nargs='+', default=['cost'], choices=list(POLICIES))
+    parser.add_argument('--mode', nargs='+', default=['greedy'], choices=list(MODES))
+    parser.add_argument('--duration', type=float, default=3600, help='每个场景的仿真时长(秒)')
+    parser.add_argument('--rate', type=float, default=None, help='每分钟到达的乘客数, 默认按场景设定')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--trace', nargs='+', help='回放按钮事件日志(main.py 记录的 .elvt 文件)')
+    parser.add_argument('--speed', type=float, default=1.0, help='回放日志时压缩事件间隔的倍数')
+    parser.add_argument('--output', help='把结果写入 JSON 文件')
+    parser.add_argument('--compare', help='与之前保存的 JSON 结果对比')
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        runs = [(run_trace, (path, policy, mode, args.speed))
+                for path in args.trace for policy in args.policy for mode in args.mode]
+    else:
+        runs = [(run_benchmark, (scenario, policy, mode, args.duration * 1000, args.seed, args.rate))
+                for scenario in args.scenario for policy in args.policy for mode in args.mode]
+
+    results = []
+    for run, run_args in runs:
+        result = run(*run_args)
+        results.append(result)
+        print("%-12s %-8s %-11s 等待 平均 %6.2f p95 %6.2f p99 %6.2f 秒 | 行程 平均 %6.2f p95 %6.2f p99 %6.2f 秒 | "
+              "停靠 %5d | 分配CPU %.3f 秒 | %d 事件/秒" % (
+                  result['scenario'], result['policy'], result['mode'],
+                  result['wait']['avg'] or 0, result['wait']['p95'] or 0, result['wait']['p99'] or 0,
+                  result['journey']['avg'] or 0, result['journey']['p95'] or 0, result['journey']['p99'] or 0,
+                  result['car_trips'], result['dispatch_cpu'], result['events_per_sec'] or 0))
+        if result['solve_count']:
+            print("%-33s 匹配求解 %d 次, 平均 %.3f 毫秒, 最长 %.3f 毫秒" % (
+                '', result['solve_count'], result['solve_avg_ms'], result['solve_max_ms']))
+
+    report = {
+        'python': platform.python_version(),
+        'duration': args.duration,
+        'rate': args.rate,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
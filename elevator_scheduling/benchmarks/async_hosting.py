@@ -0,0 +1,97 @@
+# asyncio 多楼栋托管基准测试, 在 elevator_scheduling 目录下运行:
+#   python -m benchmarks.async_hosting [--buildings 数量] [--cars 数量] [--floors 层数] [--speed 倍数] [--duration 秒]
+# 在一个进程的一个事件循环中运行许多栋 core.async_engine.AsyncBuilding, 随机按键规则与 headless.py 相同
+# 输出托管的电梯数、内存占用和事件循环的调度延迟(延迟过大说明单个事件循环已经跟不上)
+import argparse
+import asyncio
+import random
+import resource
+import sys
+import time
+from core.constants import ELEVATOR_NUMS, FLOORS, MOVING_STATUS
+from core.async_engine import AsyncBuilding
+
+
+# 平均每 interval 毫秒(仿真时间)一次随机按键, 一半外部按钮一半内部按钮
+async def press_randomly(building, rng, interval):
+    floors = building.state.floors
+    while True:
+        await asyncio.sleep(rng.expovariate(1 / interval) / building.speed / 1000)
+        if rng.random() < 0.5:
+            floor = rng.randint(1, floors)
+            if floor == 1:
+                move_state = MOVING_STATUS.up
+            elif floor == floors:
+                move_state = MOVING_STATUS.down
+            else:
+                move_state = rng.choice([MOVING_STATUS.up, MOVING_STATUS.down])
+            building.press_outer(floor, move_state)
+        else:
+            building.press_inner(rng.randint(0, len(building.elevators) - 1), rng.randint(1, floors))
+
+
+# 每隔 period 秒醒来一次, 记录实际醒来时间比预定时间晚了多少
+async def measure_lag(lags, period=0.05):
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + period
+        await asyncio.sleep(period)
+        lags.append(loop.time() - expected)
+
+
+async def host(buildings, elevator_nums, floors, speed, duration, seed, interval):
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    sites = [AsyncBuilding(elevator_nums, floors, speed=speed) for _ in range(buildings)]
+    rng = random.Random(seed)
+    lags = []
+    tasks = [asyncio.create_task(site.run()) for site in sites]
+    tasks += [asyncio.create_task(press_randomly(site, random.Random(rng.random()), interval)) for site in sites]
+    tasks.append(asyncio.create_task(measure_lag(lags)))
+    start = time.perf_counter()
+    await asyncio.sleep(duration / speed)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    lags.sort()
+    return {
+        'buildings': buildings,
+        'elevators': buildings * elevator_nums,
+        'speed': speed,
+        'wall_time': round(elapsed, 2),
+        'cpu_time': round(cpu, 2),
+        'floors_travelled': sum(site.floors_travelled for site in sites),
+        'stops': sum(site.stop_count for site in sites),
+        'dispatch_calls': sum(site.dispatch_count for site in sites),
+        'rss_growth_kb': rss_after - rss_before,
+        'lag_p50_ms': round(lags[len(lags) // 2] * 1000, 2) if lags else None,
+        'lag_max_ms': round(lags[-1] * 1000, 2) if lags else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.async_hosting', description='asyncio 多楼栋托管基准测试')
+    parser.add_argument('--buildings', type=int, default=200)
+    parser.add_argument('--cars', type=int, default=ELEVATOR_NUMS)
+    parser.add_argument('--floors', type=int, default=FLOORS)
+    parser.add_argument('--speed', type=float, default=10, help='时钟加快的倍数')
+    parser.add_argument('--duration', type=float, default=300, help='仿真时长(秒)')
+    parser.add_argument('--interval', type=float, default=10, help='每栋楼平均每隔多少秒一次随机按键')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(host(args.buildings, args.cars, args.floors, args.speed, args.duration, args.seed,
+                              args.interval * 1000))
+    print("%d 栋楼 %d 台电梯 | 仿真 %.0f 秒, 用时 %.2f 秒, CPU %.2f 秒 | 行驶 %d 层, 停靠 %d 次, 分配 %d 次 | "
+          "内存增长 %.1f MB | 调度延迟 中位数 %.2f 毫秒, 最大 %.2f 毫秒" % (
+              result['buildings'], result['elevators'], args.duration, result['wall_time'], result['cpu_time'],
+              result['floors_travelled'], result['stops'], result['dispatch_calls'],
+              result['rss_growth_kb'] / 1024, result['lag_p50_ms'] or 0, result['lag_max_ms'] or 0))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
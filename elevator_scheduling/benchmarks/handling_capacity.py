@@ -0,0 +1,82 @@
+# 上班高峰的输送能力基准测试, 对比常规分配和目的楼层分配, 在 elevator_scheduling 目录下运行:
+#   python -m benchmarks.handling_capacity [--rate 每分钟乘客数 ...] [--mode 分配方式 ...] [--policy 名字]
+#                                          [--capacity 人数] [--duration 秒] [--warmup 秒] [--output 结果.json]
+# 按逐级增加的到达率运行 up_peak 场景, 电梯按 --capacity 限载; 统计预热之后平均每5分钟送达的乘客数,
+# 到达率超过电梯的输送能力后送达数不再增加, 各到达率下的最大值即输送能力(HC5, 乘客数/5分钟)
+# 同时给出每趟的停靠次数(两次在大堂开门之间在其他楼层开门的次数)和平均等待时间
+import argparse
+import json
+import sys
+from core.constants import CAR_CAPACITY
+from core.policies import POLICIES
+from .traffic import LOBBY
+from .runner import MODES, prepare_benchmark, run_engine, summarize
+
+FIVE_MINUTES = 5 * 60 * 1000
+
+
+def run_capacity(rate, policy, mode, capacity, duration, warmup, seed):
+    engine, model = prepare_benchmark('up_peak', policy, mode, duration, seed, rate, capacity=capacity)
+    stops = {'lobby': 0, 'other': 0}
+
+    def on_door(elevator_id, floor, opened):
+        if opened and warmup <= engine.now < duration:
+            stops['lobby' if floor == LOBBY else 'other'] += 1
+
+    engine.door_listeners.append(on_door)
+    result = run_engine(engine)
+    delivered = [passenger for passenger in model.passengers
+                 if passenger.alighted is not None and warmup <= passenger.alighted < duration]
+    result.update({
+        'rate': rate,
+        'policy': policy,
+        'mode': mode,
+        'capacity': capacity,
+        'seed': seed,
+        'delivered_per_5min': round(len(delivered) * FIVE_MINUTES / (duration - warmup), 1),
+        'stops_per_trip': round(stops['other'] / stops['lobby'], 2) if stops['lobby'] else None,
+        'wait': summarize([(passenger.boarded - passenger.arrival) / 1000 for passenger in delivered]),
+    })
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.handling_capacity', description='上班高峰的输送能力')
+    parser.add_argument('--rate', type=float, nargs='+', default=[40, 60, 80, 100, 120, 150, 200],
+                        help='每分钟到达的乘客数')
+    parser.add_argument('--mode', nargs='+', default=['greedy', 'destination'], choices=list(MODES))
+    parser.add_argument('--policy', default='cost', choices=list(POLICIES))
+    parser.add_argument('--capacity', type=int, default=CAR_CAPACITY, help='每台电梯的载客人数')
+    parser.add_argument('--duration', type=float, default=3600, help='每次仿真的时长(秒)')
+    parser.add_argument('--warmup', type=float, default=600, help='开始统计之前的预热时长(秒)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='把结果写入 JSON 文件')
+    args = parser.parse_args(argv)
+    if not 0 <= args.warmup < args.duration:
+        parser.error('--warmup 必须小于 --duration')
+
+    results = []
+    handling_capacity = {}
+    for rate in args.rate:
+        columns = []
+        for mode in args.mode:
+            result = run_capacity(rate, args.policy, mode, args.capacity, args.duration * 1000,
+                                  args.warmup * 1000, args.seed)
+            results.append(result)
+            handling_capacity[mode] = max(handling_capacity.get(mode, 0), result['delivered_per_5min'])
+            columns.append("%s 送达 %6.1f 名/5分钟 每趟停靠 %5.2f 等待 %7.2f 秒" % (
+                mode, result['delivered_per_5min'], result['stops_per_trip'] or 0, result['wait']['avg'] or 0))
+        print("到达 %6.1f 名/5分钟 | %s" % (rate * 5, ' | '.join(columns)))
+
+    baseline = handling_capacity[args.mode[0]]
+    print("输送能力(HC5): " + ", ".join(
+        "%s %.1f 名/5分钟 (%+.1f%%)" % (mode, value, (value - baseline) / baseline * 100 if baseline else 0.0)
+        for mode, value in handling_capacity.items()))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'handling_capacity': handling_capacity, 'results': results}, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+# 匹配分配(core.matching_dispatch)的求解用时基准测试, 在 elevator_scheduling 目录下运行:
+#   python -m benchmarks.matching [--cars 数量] [--floors 层数] [--calls 数量] [--repeat 次数] [--seed 种子]
+#                                 [--policy 名字] [--capacity 数量] [--output 结果.json]
+# 默认为 64 台电梯、200 层、一次积压 500 个未分配的外部呼叫; 每次用不同的种子随机生成电梯状态和呼叫,
+# 分别统计计算代价矩阵和求解匹配的用时(毫秒). 求解用时大约随 电梯槽位数 × 呼叫数 的规模增长,
+# 这个规模下一次求解要几十毫秒, 比 main.py --sim 每10毫秒一次的推进间隔长
+import argparse
+import json
+import random
+import sys
+import time
+from core.constants import ELEVATOR_STATUS, MOVING_STATUS
+from core.dispatch import TaskDispatcher
+from core.matching_dispatch import DEFAULT_CAPACITY, solve_assignment
+from core.policies import POLICIES
+from core.requests import OUTER_BUTTON_GENERATE_TASK
+from core.state import BuildingState
+from .runner import summarize
+
+
+# 随机的电梯状态(不含故障)和呼叫; 呼叫直接交给求解器, 不经过登记表, 同一楼层同一方向可以出现多次
+def random_instance(elevator_nums, floors, calls, seed):
+    rng = random.Random(seed)
+    state = BuildingState(elevator_nums, floors)
+    statuses = [status for status in ELEVATOR_STATUS if status != ELEVATOR_STATUS.break_down]
+    for elevator in state.elevators:
+        elevator.current_floor = rng.randint(1, floors)
+        elevator.status = rng.choice(statuses)
+        elevator.move_status = rng.choice([MOVING_STATUS.up, MOVING_STATUS.down])
+        for _ in range(rng.randint(0, 4)):
+            floor = rng.randint(1, floors)
+            if floor >= elevator.current_floor:
+                elevator.remaining_up_task.add(floor)
+            else:
+                elevator.remaining_down_task.add(floor)
+    tasks = [OUTER_BUTTON_GENERATE_TASK(rng.randint(1, floors), rng.choice([MOVING_STATUS.up, MOVING_STATUS.down]))
+             for _ in range(calls)]
+    return state, tasks
+
+
+def run_matching(elevator_nums, floors, calls, policy='cost', capacity=DEFAULT_CAPACITY, seed=0):
+    import numpy as np
+
+    state, tasks = random_instance(elevator_nums, floors, calls, seed)
+    dispatcher = TaskDispatcher(state, policy, matching=True, capacity=capacity)
+    start = time.perf_counter()
+    cost = dispatcher.policy.cost_matrix(dispatcher, tasks)
+    cost_time = time.perf_counter() - start
+    loads = np.zeros(elevator_nums, dtype=np.int64)
+    start = time.perf_counter()
+    choice = solve_assignment(cost, loads, capacity, dispatcher.policy.floor_cost)
+    solve_time = time.perf_counter() - start
+    return cost_time * 1000, solve_time * 1000, int((choice != -1).sum())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.matching', description='匹配分配的求解用时')
+    parser.add_argument('--cars', type=int, default=64)
+    parser.add_argument('--floors', type=int, default=200)
+    parser.add_argument('--calls', type=int, default=500, help='一次求解的未分配呼叫数')
+    parser.add_argument('--repeat', type=int, default=20, help='求解的次数, 第 i 次的种子为 seed + i')
+    parser.add_argument('--policy', default='cost', choices=list(POLICIES))
+    parser.add_argument('--capacity', type=int, default=DEFAULT_CAPACITY, help='每台电梯最多承担的外部任务数')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='把结果写入 JSON 文件')
+    args = parser.parse_args(argv)
+
+    # 第一次求解包含 NumPy/SciPy 的初始化, 不计入结果
+    run_matching(args.cars, args.floors, args.calls, args.policy, args.capacity, args.seed)
+    runs = [run_matching(args.cars, args.floors, args.calls, args.policy, args.capacity, args.seed + i)
+            for i in range(args.repeat)]
+    result = {
+        'cars': args.cars,
+        'floors': args.floors,
+        'calls': args.calls,
+        'policy': args.policy,
+        'capacity': args.capacity,
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'cost_matrix_ms': summarize([run[0] for run in runs]),
+        'solve_ms': summarize([run[1] for run in runs]),
+        'assigned': summarize([run[2] for run in runs]),
+    }
+    print("%d 台电梯 %d 层 %d 个呼叫, %d 次: 代价矩阵 平均 %.2f 毫秒 | 求解 平均 %.2f p95 %.2f 最长 %.2f 毫秒 | "
+          "平均分配 %.1f 个呼叫" % (
+              args.cars, args.floors, args.calls, args.repeat, result['cost_matrix_ms']['avg'],
+              result['solve_ms']['avg'], result['solve_ms']['p95'], result['solve_ms']['max'],
+              result['assigned']['avg']))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
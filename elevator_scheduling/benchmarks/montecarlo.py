@@ -0,0 +1,144 @@
+# 多进程蒙特卡洛策略评估, 在 elevator_scheduling 目录下运行:
+#   python -m benchmarks.montecarlo [--scenario 名字 ...] [--policy 名字 ...] [--mode greedy|batch|matching ...]
+#                                   [--seeds 次数] [--workers 进程数] [--results 结果.jsonl] [--output 汇总.json]
+# 每个 (场景, 策略, 分配方式, 种子) 组合在进程池中独立运行一次, 完成一个就追加一行到 --results 文件,
+# 中断后用同一个 --results 文件和相同的参数重新运行会跳过已完成的组合; 最后按组合汇总均值和95%置信区间
+# 每行结果都带有仿真时长和到达率, --duration 或 --rate 不同的结果不算已完成, 也不参与汇总
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from core.policies import POLICIES
+from .traffic import SCENARIOS
+from .runner import MODES, run_benchmark
+
+# 汇总的指标
+SUMMARY_METRICS = (
+    ('wait', 'avg'), ('wait', 'p95'), ('journey', 'avg'), ('journey', 'p95'),
+    ('car_trips',), ('floors_travelled',), ('dispatch_cpu',),
+)
+
+
+# 旧的结果文件没有 duration 和 rate, 不与任何运行匹配
+def run_key(result):
+    return (result['scenario'], result['policy'], result['mode'], result['seed'],
+            result.get('duration'), result.get('rate'))
+
+
+# 读取已完成的运行结果; 中断时最后一行可能只写了一半, 忽略无法解析的行
+def load_results(path):
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            results[run_key(result)] = result
+    return results
+
+
+def metric(result, path):
+    for key in path:
+        result = result[key]
+    return result
+
+
+# 均值和95%置信区间的半宽(t 分布)
+def confidence_interval(values):
+    from scipy.stats import t
+
+    n = len(values)
+    mean = sum(values) / n
+    if n < 2:
+        return mean, None
+    variance = sum((value - mean) ** 2 for value in values) / (n - 1)
+    return mean, t.ppf(0.975, n - 1) * math.sqrt(variance / n)
+
+
+def aggregate(results):
+    groups = {}
+    for result in results:
+        groups.setdefault(run_key(result)[:3], []).append(result)
+    summary = []
+    for (scenario, policy, mode), runs in sorted(groups.items()):
+        entry = {'scenario': scenario, 'policy': policy, 'mode': mode, 'runs': len(runs)}
+        for path in SUMMARY_METRICS:
+            values = [metric(run, path) for run in runs]
+            values = [value for value in values if value is not None]
+            if not values:
+                continue
+            mean, half_width = confidence_interval(values)
+            entry['.'.join(path)] = {
+                'mean': round(mean, 4),
+                'ci95': round(half_width, 4) if half_width is not None else None,
+            }
+        summary.append(entry)
+    return summary
+
+
+def run_montecarlo(runs, results_path, workers=None, duration=600 * 1000, rate=None):
+    done = load_results(results_path)
+    runs = [run + (duration, rate) for run in runs]
+    pending = [run for run in runs if run not in done]
+    print("共 %d 次运行, 已完成 %d 次, 待运行 %d 次" % (len(runs), len(runs) - len(pending), len(pending)))
+    start = time.perf_counter()
+    with open(results_path, 'a+') as f, ProcessPoolExecutor(max_workers=workers) as pool:
+        # 被中断的最后一行没有换行, 另起一行再追加
+        if f.tell() > 0:
+            f.seek(f.tell() - 1)
+            if f.read(1) != '\n':
+                f.write('\n')
+        futures = [pool.submit(run_benchmark, scenario, policy, mode, duration, seed, rate)
+                   for scenario, policy, mode, seed, _, _ in pending]
+        for count, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            result.update({'duration': duration, 'rate': rate})
+            done[run_key(result)] = result
+            # 每完成一次立即写入, 中断后可以从这里继续
+            f.write(json.dumps(result, sort_keys=True) + '\n')
+            f.flush()
+            print("[%d/%d] %s / %s / %s / 种子 %d: 等待 平均 %.2f 秒 | 已用 %.1f 秒" % (
+                count, len(pending), *run_key(result)[:4], result['wait']['avg'] or 0, time.perf_counter() - start))
+    return [done[run] for run in runs]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.montecarlo', description='多进程蒙特卡洛策略评估')
+    parser.add_argument('--scenario', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--policy', nargs='+', default=list(POLICIES), choices=list(POLICIES))
+    parser.add_argument('--mode', nargs='+', default=['greedy'], choices=list(MODES))
+    parser.add_argument('--seeds', type=int, default=100, help='每个组合运行的种子数')
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--duration', type=float, default=600, help='每次运行的仿真时长(秒)')
+    parser.add_argument('--rate', type=float, default=None, help='每分钟到达的乘客数, 默认按场景设定')
+    parser.add_argument('--workers', type=int, default=None, help='进程数, 默认为 CPU 核数')
+    parser.add_argument('--results', default='montecarlo.jsonl', help='逐次运行结果文件, 用于中断后继续')
+    parser.add_argument('--output', help='把汇总结果写入 JSON 文件')
+    args = parser.parse_args(argv)
+
+    runs = [(scenario, policy, mode, seed)
+            for scenario in args.scenario for policy in args.policy for mode in args.mode
+            for seed in range(args.first_seed, args.first_seed + args.seeds)]
+    results = run_montecarlo(runs, args.results, args.workers, args.duration * 1000, args.rate)
+
+    summary = aggregate(results)
+    for entry in summary:
+        wait, journey = entry.get('wait.avg'), entry.get('journey.avg')
+        print("%-12s %-8s %-9s %4d 次 | 等待 平均 %6.2f ± %5.2f 秒 | 行程 平均 %6.2f ± %5.2f 秒" % (
+            entry['scenario'], entry['policy'], entry['mode'], entry['runs'],
+            wait['mean'] if wait else 0, (wait['ci95'] or 0) if wait else 0,
+            journey['mean'] if journey else 0, (journey['ci95'] or 0) if journey else 0))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'duration': args.duration, 'rate': args.rate, 'summary': summary}, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+# 空闲停靠基准测试, 在 elevator_scheduling 目录下运行:
+#   python -m benchmarks.parking [--trace 日志.elvt ...] [--scenario 名字 ...] [--policy 名字] [--output 结果.json]
+# 每个按钮事件日志(或内置流量场景)分别在不停靠和停靠(core.parking)两种情况下运行, 对比等待时间
+import argparse
+import json
+import sys
+from core.policies import POLICIES
+from .traffic import SCENARIOS
+from .runner import run_benchmark, run_trace
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.parking', description='电梯空闲停靠基准测试')
+    parser.add_argument('--trace', nargs='+', default=[], help='回放按钮事件日志(main.py 记录的 .elvt 文件)')
+    parser.add_argument('--speed', type=float, default=1.0, help='回放日志时压缩事件间隔的倍数')
+    parser.add_argument('--scenario', nargs='*', default=None, choices=list(SCENARIOS),
+                        help='内置流量场景, 不给出 --trace 时默认运行全部场景')
+    parser.add_argument('--policy', default='cost', choices=list(POLICIES))
+    parser.add_argument('--mode', default='greedy', choices=['greedy', 'batch', 'matching'])
+    parser.add_argument('--duration', type=float, default=4 * 3600, help='每个场景的仿真时长(秒)')
+    parser.add_argument('--rate', type=float, default=None, help='每分钟到达的乘客数, 默认按场景设定')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='把结果写入 JSON 文件')
+    args = parser.parse_args(argv)
+
+    scenarios = args.scenario if args.scenario is not None else ([] if args.trace else list(SCENARIOS))
+    runs = [(run_trace, (path, args.policy, args.mode, args.speed)) for path in args.trace]
+    runs += [(run_benchmark, (scenario, args.policy, args.mode, args.duration * 1000, args.seed, args.rate))
+             for scenario in scenarios]
+
+    results = []
+    for run, run_args in runs:
+        baseline = run(*run_args)
+        parked = run(*run_args, parking=True)
+        results += [baseline, parked]
+        print("%-24s 等待 平均 %6.2f -> %6.2f 秒 | p95 %6.2f -> %6.2f 秒 | p99 %6.2f -> %6.2f 秒 | "
+              "行驶 %6d -> %6d 层" % (
+                  baseline['scenario'], baseline['wait']['avg'] or 0, parked['wait']['avg'] or 0,
+                  baseline['wait']['p95'] or 0, parked['wait']['p95'] or 0,
+                  baseline['wait']['p99'] or 0, parked['wait']['p99'] or 0,
+                  baseline['floors_travelled'], parked['floors_travelled']))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'results': results}, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
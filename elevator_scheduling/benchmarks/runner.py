@@ -0,0 +1,281 @@
+import math
+import os
+import time
+from core.constants import ELEVATOR_NUMS, FLOORS, CAR_CAPACITY, MOVING_STATUS
+from core.simulation import SimulationEngine
+from core.trace import read_trace
+from .traffic import generate_traffic
+
+
+class Passenger:
+    __slots__ = ('origin', 'destination', 'arrival', 'boarded', 'alighted', 'elevator_id')
+
+    def __init__(self, origin, destination, arrival):
+        self.origin = origin
+        self.destination = destination
+        self.arrival = arrival
+        self.boarded = None             # 进入电梯的时间
+        self.alighted = None            # 到达目的楼层的时间
+        self.elevator_id = -1
+
+
+# 乘客模型: 到达后按外部按钮, 电梯在该层开门时进入并按下目的楼层, 到达目的楼层开门时离开
+# 与原有规则一致, 电梯在某层开门即完成该层所有外部任务, 因此该层等待的乘客都会进入
+# capacity 为每台电梯的载客人数, 满员时留下的乘客在关门后重新按外部按钮; None 表示不限
+class PassengerModel:
+    def __init__(self, engine, capacity=None):
+        self.engine = engine
+        self.capacity = capacity
+        self.passengers = []
+        self.waiting = {}                                       # 楼层 -> 等待的乘客
+        self.riding = [[] for _ in engine.elevators]            # 每台电梯内的乘客
+        self.open_at = [None] * len(engine.elevators)           # 门开着的电梯所在楼层
+        engine.door_listeners.append(self.on_door)
+
+    def arrive(self, origin, destination):
+        passenger = Passenger(origin, destination, self.engine.now)
+        self.passengers.append(passenger)
+        for elevator_id, floor in enumerate(self.open_at):
+            if floor == origin and self.has_room(elevator_id):
+                self.board(passenger, elevator_id)
+                return
+        self.waiting.setdefault(origin, []).append(passenger)
+        self.call(origin, destination)
+
+    def has_room(self, elevator_id):
+        return self.capacity is None or len(self.riding[elevator_id]) < self.capacity
+
+    def call(self, origin, destination):
+        self.engine.press_outer(origin, MOVING_STATUS.up if destination > origin else MOVING_STATUS.down)
+
+    def board(self, passenger, elevator_id):
+        passenger.boarded = self.engine.now
+        passenger.elevator_id = elevator_id
+        self.riding[elevator_id].append(passenger)
+        self.engine.press_inner(elevator_id, passenger.destination)
+
+    def on_door(self, elevator_id, floor, opened):
+        if not opened:
+            self.open_at[elevator_id] = None
+            # 关门过程中到达的乘客按下的外部任务已随关门完成, 需要重新按
+            for passenger in self.waiting.get(floor, ()):
+                self.call(floor, passenger.destination)
+            return
+        self.open_at[elevator_id] = floor
+        riders = self.riding[elevator_id]
+        if riders:
+            self.riding[elevator_id] = [passenger for passenger in riders if passenger.destination != floor]
+            for passenger in riders:
+                if passenger.destination == floor:
+                    passenger.alighted = self.engine.now
+        waiting = self.waiting.pop(floor, ())
+        for index, passenger in enumerate(waiting):
+            if not self.has_room(elevator_id):
+                self.waiting[floor] = waiting[index:]
+                break
+            self.board(passenger, elevator_id)
+
+    def fault(self, elevator_id):
+        self.open_at[elevator_id] = None
+        self.engine.toggle_fault(elevator_id)
+
+    # 修复后, 电梯内的乘客重新按目的楼层(已在目的楼层的直接离开), 没有电梯可用时未登记的外部任务也重新按一次
+    def repair(self, elevator_id):
+        self.engine.toggle_fault(elevator_id)
+        floor = self.engine.state.elevators[elevator_id].current_floor
+        riders = self.riding[elevator_id]
+        self.riding[elevator_id] = [passenger for passenger in riders if passenger.destination != floor]
+        for passenger in riders:
+            if passenger.destination == floor:
+                passenger.alighted = self.engine.now
+            else:
+                self.engine.press_inner(elevator_id, passenger.destination)
+        for floor, passengers in self.waiting.items():
+            for passenger in passengers:
+                self.call(floor, passenger.destination)
+
+
+# 目的楼层分配时的乘客模型: 到达后在厅外输入目的楼层(SimulationEngine.press_destination), 只等分配到的电梯,
+# 这台电梯在出发楼层开门时进入; 目的楼层由分配器登记, 上车和下车的规则与 core.destination_dispatch 相同
+class DestinationPassengerModel(PassengerModel):
+    def __init__(self, engine, capacity=None):
+        super().__init__(engine, capacity)
+        self.calls = {}                     # 未上车的呼叫(id) -> 乘客
+        # self.waiting 为 (电梯编号, 出发楼层) -> 分配到该电梯的呼叫(id)
+        engine.assign_listeners.append(self.on_assign)
+
+    def arrive(self, origin, destination):
+        passenger = Passenger(origin, destination, self.engine.now)
+        self.passengers.append(passenger)
+        task = self.engine.press_destination(origin, destination)
+        if task is not None:
+            self.calls[id(task)] = passenger
+
+    # 分配(或电梯故障后重新分配)到电梯 elevator_id
+    def on_assign(self, task, elevator_id, boarded):
+        key = id(task)
+        passenger = self.calls[key]
+        if passenger.elevator_id != -1:
+            self.waiting[(passenger.elevator_id, passenger.origin)].remove(key)
+        if boarded:
+            del self.calls[key]
+            self.board(passenger, elevator_id)
+            return
+        passenger.elevator_id = elevator_id
+        self.waiting.setdefault((elevator_id, passenger.origin), []).append(key)
+
+    def board(self, passenger, elevator_id):
+        passenger.boarded = self.engine.now
+        passenger.elevator_id = elevator_id
+        self.riding[elevator_id].append(passenger)
+
+    def on_door(self, elevator_id, floor, opened):
+        if not opened:
+            self.open_at[elevator_id] = None
+            return
+        self.open_at[elevator_id] = floor
+        riders = self.riding[elevator_id]
+        if riders:
+            self.riding[elevator_id] = [passenger for passenger in riders if passenger.destination != floor]
+            for passenger in riders:
+                if passenger.destination == floor:
+                    passenger.alighted = self.engine.now
+        for key in self.waiting.pop((elevator_id, floor), ()):
+            self.board(self.calls.pop(key), elevator_id)
+
+    # 车内乘客的目的楼层由分配器在修复后重新登记
+    def repair(self, elevator_id):
+        self.engine.toggle_fault(elevator_id)
+
+
+# 按最近秩法取百分位数, values 已排序
+def percentile(values, fraction):
+    if not values:
+        return None
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def summarize(values):
+    values = sorted(values)
+    if not values:
+        return {'avg': None, 'p95': None, 'p99': None, 'max': None}
+    return {
+        'avg': round(sum(values) / len(values), 3),
+        'p95': round(percentile(values, 0.95), 3),
+        'p99': round(percentile(values, 0.99), 3),
+        'max': round(values[-1], 3),
+    }
+
+
+# 分配方式; destination 为目的楼层分配, 需要乘客的目的楼层, 不能回放按钮事件日志
+MODES = ('greedy', 'batch', 'matching', 'destination')
+
+
+def create_engine(policy, mode, elevator_nums=ELEVATOR_NUMS, floors=FLOORS, parking=False, capacity=None):
+    if mode not in MODES:
+        raise ValueError("Unknown dispatch mode: %s" % mode)
+    return SimulationEngine(elevator_nums=elevator_nums, floors=floors, policy=policy,
+                            batch_dispatch=mode == 'batch', matching_dispatch=mode == 'matching', parking=parking,
+                            destination_dispatch=mode == 'destination',
+                            capacity=capacity if capacity is not None else CAR_CAPACITY)
+
+
+def create_passenger_model(engine, mode, capacity=None):
+    if mode == 'destination':
+        return DestinationPassengerModel(engine, capacity)
+    return PassengerModel(engine, capacity)
+
+
+# matching 分配方式的结果另有每次求解的平均和最长用时(毫秒)
+def run_engine(engine):
+    start = time.perf_counter()
+    engine.run()
+    wall_time = time.perf_counter() - start
+    dispatcher = engine.dispatcher
+    return {
+        'car_trips': sum(elevator.stop_count for elevator in engine.elevators),
+        'floors_travelled': sum(elevator.floors_travelled for elevator in engine.elevators),
+        'dispatch_calls': engine.dispatch_count,
+        'dispatch_cpu': round(engine.dispatch_time, 4),
+        'solve_count': dispatcher.solve_count,
+        'solve_avg_ms': round(dispatcher.total_solve_time / dispatcher.solve_count, 3)
+        if dispatcher.solve_count else None,
+        'solve_max_ms': round(dispatcher.max_solve_time, 3) if dispatcher.solve_count else None,
+        'events': engine.processed_events,
+        'events_per_sec': round(engine.processed_events / wall_time) if wall_time > 0 else None,
+        'wall_time': round(wall_time, 4),
+    }
+
+
+# 创建一个场景的仿真并排入流量, 返回引擎和乘客模型, 由 run_engine 运行
+# capacity 为每台电梯的载客人数, None 时常规分配不限人数, 目的楼层分配按 CAR_CAPACITY
+def prepare_benchmark(scenario, policy='cost', mode='greedy', duration=3600 * 1000, seed=0, rate=None,
+                      elevator_nums=ELEVATOR_NUMS, floors=FLOORS, parking=False, capacity=None):
+    engine = create_engine(policy, mode, elevator_nums, floors, parking, capacity)
+    model = create_passenger_model(engine, mode, capacity)
+    for event in generate_traffic(scenario, duration, seed, rate, elevator_nums, floors):
+        if event[1] == 'passenger':
+            engine.schedule_at(event[0], model.arrive, event[2], event[3])
+        else:
+            engine.schedule_at(event[0], getattr(model, event[1]), event[2])
+    return engine, model
+
+
+# 运行一个场景, 返回可以写成 JSON 的结果; 时间单位为秒
+def run_benchmark(scenario, policy='cost', mode='greedy', duration=3600 * 1000, seed=0, rate=None,
+                  elevator_nums=ELEVATOR_NUMS, floors=FLOORS, parking=False, capacity=None):
+    engine, model = prepare_benchmark(scenario, policy, mode, duration, seed, rate, elevator_nums, floors, parking,
+                                      capacity)
+    result = run_engine(engine)
+    done = [passenger for passenger in model.passengers if passenger.alighted is not None]
+    result.update({
+        'scenario': scenario,
+        'policy': policy,
+        'mode': mode,
+        'parking': parking,
+        'capacity': capacity,
+        'seed': seed,
+        'passengers': len(model.passengers),
+        'completed': len(done),
+        'wait': summarize([(passenger.boarded - passenger.arrival) / 1000 for passenger in done]),
+        'journey': summarize([(passenger.alighted - passenger.arrival) / 1000 for passenger in done]),
+    })
+    return result
+
+
+# 回放界面记录的按钮事件日志(core.trace); 日志中没有乘客, 等待时间按外部按钮按下到该层开门计算
+def run_trace(path, policy='cost', mode='greedy', speed=1.0, parking=False):
+    if mode == 'destination':
+        raise ValueError("Invalid dispatch mode for trace replay: %s" % mode)
+    trace = read_trace(path)
+    engine = create_engine(policy, mode, trace.elevator_nums or ELEVATOR_NUMS, trace.floors or FLOORS, parking)
+    engine.load_trace(trace.events, speed)
+    pressed = {}                # 楼层 -> 未响应的外部按钮按下的时间
+    waits = []
+
+    def on_door(elevator_id, floor, opened):
+        if opened:
+            waits.extend((engine.now - moment) / 1000 for moment in pressed.pop(floor, ()))
+
+    def press_outer(floor, move_state):
+        if press(floor, move_state):
+            pressed.setdefault(floor, []).append(engine.now)
+            return True
+        return False
+
+    press = engine.press_outer
+    engine.press_outer = press_outer
+    engine.door_listeners.append(on_door)
+    result = run_engine(engine)
+    result.update({
+        'scenario': 'trace:' + os.path.basename(path),
+        'policy': policy,
+        'mode': mode,
+        'parking': parking,
+        'seed': 0,
+        'passengers': None,
+        'completed': None,
+        'wait': summarize(waits),
+        'journey': summarize([]),
+    })
+    return result
@@ -0,0 +1,77 @@
+# 楼栋规模基准测试, 在 elevator_scheduling 目录下运行:
+#   python -m benchmarks.scaling [--policy 名字] [--mode greedy|batch|matching] [--output 结果.json]
+# 电梯数和楼层数同时增大, 每台电梯的乘客到达率保持不变, 仿真时钟像 main.py --sim 一样每10毫秒推进一次
+# 输出每台电梯平均的分配开销和推进开销, 二者应基本不随楼栋规模增长
+import argparse
+import json
+import sys
+import time
+from core.policies import POLICIES
+from .runner import PassengerModel, create_engine, summarize
+from .traffic import generate_traffic
+
+SIZES = ((5, 20), (10, 40), (20, 80), (40, 120), (64, 200))
+TICK = 10                               # 每次推进的仿真时间(毫秒)
+RATE_PER_ELEVATOR = 1.2                 # 每台电梯每分钟到达的乘客数
+
+
+def run_scaling(elevator_nums, floors, policy='cost', mode='greedy', duration=600 * 1000, seed=0):
+    engine = create_engine(policy, mode, elevator_nums, floors)
+    model = PassengerModel(engine)
+    for event in generate_traffic('uniform', duration, seed, RATE_PER_ELEVATOR * elevator_nums,
+                                  elevator_nums, floors):
+        engine.schedule_at(event[0], model.arrive, event[2], event[3])
+
+    ticks = 0
+    start = time.perf_counter()
+    while engine.now < duration:
+        engine.sync()
+        engine.run_until(engine.now + TICK)
+        ticks += 1
+    tick_time = time.perf_counter() - start
+
+    done = [passenger for passenger in model.passengers if passenger.alighted is not None]
+    dispatch_calls = max(engine.dispatch_count, 1)
+    return {
+        'elevators': elevator_nums,
+        'floors': floors,
+        'policy': policy,
+        'mode': mode,
+        'passengers': len(model.passengers),
+        'completed': len(done),
+        'wait': summarize([(passenger.boarded - passenger.arrival) / 1000 for passenger in done]),
+        'dispatch_calls': engine.dispatch_count,
+        # 微秒
+        'dispatch_per_call': round(engine.dispatch_time / dispatch_calls * 1e6, 2),
+        'dispatch_per_call_per_elevator': round(engine.dispatch_time / dispatch_calls / elevator_nums * 1e6, 3),
+        'tick': round(tick_time / ticks * 1e6, 2),
+        'tick_per_elevator': round(tick_time / ticks / elevator_nums * 1e6, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.scaling', description='电梯调度楼栋规模基准测试')
+    parser.add_argument('--policy', default='cost', choices=list(POLICIES))
+    parser.add_argument('--mode', default='greedy', choices=['greedy', 'batch', 'matching'])
+    parser.add_argument('--duration', type=float, default=600, help='每种规模的仿真时长(秒)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='把结果写入 JSON 文件')
+    args = parser.parse_args(argv)
+
+    results = []
+    for elevator_nums, floors in SIZES:
+        result = run_scaling(elevator_nums, floors, args.policy, args.mode, args.duration * 1000, args.seed)
+        results.append(result)
+        print("%3d 台电梯 %3d 层 | 等待 平均 %6.2f 秒 | 每次分配 %8.2f 微秒, 每台电梯 %6.3f 微秒 | "
+              "每次推进 %8.2f 微秒, 每台电梯 %6.3f 微秒" % (
+                  elevator_nums, floors, result['wait']['avg'] or 0,
+                  result['dispatch_per_call'], result['dispatch_per_call_per_elevator'],
+                  result['tick'], result['tick_per_elevator']))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'duration': args.duration, 'results': results}, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import random
+from core.constants import ELEVATOR_NUMS, FLOORS
+
+LOBBY = 1
+
+
+# 流量模式: 给出一名乘客的出发楼层和目的楼层
+def up_peak_trip(rng, floors):
+    # 上班高峰: 大部分乘客从大堂去各楼层
+    roll = rng.random()
+    if roll < 0.85:
+        return LOBBY, rng.randint(2, floors)
+    if roll < 0.95:
+        return inter_floor_trip(rng, floors)
+    return rng.randint(2, floors), LOBBY
+
+
+def down_peak_trip(rng, floors):
+    # 下班高峰: 大部分乘客从各楼层回大堂
+    roll = rng.random()
+    if roll < 0.85:
+        return rng.randint(2, floors), LOBBY
+    if roll < 0.95:
+        return inter_floor_trip(rng, floors)
+    return LOBBY, rng.randint(2, floors)
+
+
+def lunch_trip(rng, floors):
+    # 午餐: 去大堂和回楼层的乘客各占一半左右
+    roll = rng.random()
+    if roll < 0.45:
+        return rng.randint(2, floors), LOBBY
+    if roll < 0.9:
+        return LOBBY, rng.randint(2, floors)
+    return inter_floor_trip(rng, floors)
+
+
+def inter_floor_trip(rng, floors):
+    # 均匀的层间流量
+    origin = rng.randint(1, floors)
+    destination = rng.randint(1, floors - 1)
+    if destination >= origin:
+        destination += 1
+    return origin, destination
+
+
+# 名字 -> (乘客的出发/目的楼层, 默认每分钟到达的乘客数, 是否注入故障)
+SCENARIOS = {
+    'up_peak': (up_peak_trip, 12, False),
+    'down_peak': (down_peak_trip, 12, False),
+    'lunch': (lunch_trip, 10, False),
+    'uniform': (inter_floor_trip, 6, False),
+    'fault_storm': (inter_floor_trip, 6, True),
+}
+
+
+# 生成一段流量: 按泊松过程到达的乘客, 以及(故障风暴时)电梯的故障和修复
+# 返回按时间排序的事件列表 (时间(毫秒), 'passenger', 出发楼层, 目的楼层) 或 (时间, 'fault'/'repair', 电梯编号)
+# 同一个种子总是生成相同的流量, 不同提交之间的结果可以直接比较
+def generate_traffic(scenario, duration=3600 * 1000, seed=0, rate=None,
+                     elevator_nums=ELEVATOR_NUMS, floors=FLOORS):
+    if scenario not in SCENARIOS:
+        raise ValueError("Unknown traffic scenario: %s" % scenario)
+    trip, default_rate, faults = SCENARIOS[scenario]
+    rng = random.Random(seed)
+    mean_interval = 60000 / (rate if rate is not None else default_rate)
+    events = []
+    arrival = 0.0
+    while True:
+        arrival += rng.expovariate(1 / mean_interval)
+        if arrival >= duration:
+            break
+        origin, destination = trip(rng, floors)
+        events.append((arrival, 'passenger', origin, destination))
+
+    if faults:
+        # 平均每2分钟有一台电梯故障, 30~90秒后修复, 至少保留一台正常的电梯
+        broken_until = [0.0] * elevator_nums
+        moment = 0.0
+        while True:
+            moment += rng.expovariate(1 / 120000)
+            if moment >= duration:
+                break
+            working = [i for i in range(elevator_nums) if broken_until[i] <= moment]
+            if len(working) < 2:
+                continue
+            elevator_id = rng.choice(working)
+            broken_until[elevator_id] = moment + rng.uniform(30000, 90000)
+            events.append((moment, 'fault', elevator_id))
+            events.append((broken_until[elevator_id], 'repair', elevator_id))
+    events.sort(key=lambda event: event[0])
+    return events
@@ -0,0 +1,54 @@
+# 流量生成和投放的吞吐量基准测试, 在 elevator_scheduling 目录下运行:
+#   python -m benchmarks.traffic_feed [--traffic 名字] [--rate 每分钟乘客数] [--window 毫秒] [--seconds 秒]
+# 按 --window 分批生成 --seconds 秒的流量(core.traffic_generator), 再交给 traffic_feeder.TrafficFeeder,
+# 分别统计生成和投放(合并乘客、按外部按钮)每秒能处理的乘客数; 投放在界面线程中执行, 其用时决定界面是否卡顿
+import argparse
+import sys
+import time
+from core.constants import ELEVATOR_NUMS, FLOORS
+from core.traffic_generator import TrafficGenerator, traffic_schedule, OD_PATTERNS
+from utils.global_vars import init_global_vars
+from traffic_feeder import TrafficFeeder
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.traffic_feed', description='流量生成和投放的吞吐量')
+    parser.add_argument('--traffic', default='uniform', choices=list(OD_PATTERNS) + ['office_day'])
+    parser.add_argument('--rate', type=float, default=600000, help='每分钟到达的乘客数')
+    parser.add_argument('--window', type=float, default=100, help='每批的时长(毫秒)')
+    parser.add_argument('--seconds', type=float, default=10, help='生成的流量时长(秒)')
+    parser.add_argument('--floors', type=int, default=FLOORS)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    init_global_vars(ELEVATOR_NUMS, args.floors)
+    generator = TrafficGenerator(traffic_schedule(args.traffic, args.floors, args.rate), args.floors, args.seed)
+    feeder = TrafficFeeder(generator)
+
+    batches = []
+    start = time.perf_counter()
+    moment = 0.0
+    while moment < args.seconds * 1000:
+        _, origins, destinations = generator.generate(moment, moment + args.window)
+        batches.append((origins, destinations))
+        moment += args.window
+    generate_time = time.perf_counter() - start
+
+    slowest = 0.0
+    start = time.perf_counter()
+    for batch in batches:
+        began = time.perf_counter()
+        feeder.batches.put(batch)
+        feeder.drain()
+        slowest = max(slowest, time.perf_counter() - began)
+    feed_time = time.perf_counter() - start
+
+    passengers = sum(len(origins) for origins, _ in batches)
+    print("%d 名乘客, %d 批 | 生成 %.0f 名/秒 | 投放 %.0f 名/秒, 每批平均 %.3f 毫秒, 最长 %.3f 毫秒" % (
+        passengers, len(batches), passengers / generate_time, passengers / feed_time,
+        feed_time / len(batches) * 1000, slowest * 1000))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
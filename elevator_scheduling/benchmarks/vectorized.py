@@ -0,0 +1,59 @@
+# 多楼栋向量化仿真基准测试, 在 elevator_scheduling 目录下运行:
+#   python -m benchmarks.vectorized [--buildings 数量 ...] [--cars 数量] [--floors 层数] [--output 结果.json]
+# 用 core.batch_simulation 同时推进许多栋独立的楼, 输出每秒推进的 电梯×时间步 数和外部任务的等待时间
+import argparse
+import json
+import sys
+import time
+from core.constants import ELEVATOR_NUMS, FLOORS
+from core.batch_simulation import BatchSimulation
+from .runner import summarize
+
+
+def run_vectorized(buildings, elevator_nums=ELEVATOR_NUMS, floors=FLOORS, duration=600 * 1000, seed=0,
+                   press_interval=10000, tick=100):
+    simulation = BatchSimulation(buildings, elevator_nums, floors, seed, press_interval, tick)
+    start = time.perf_counter()
+    simulation.run(duration)
+    elapsed = time.perf_counter() - start
+    return {
+        'buildings': buildings,
+        'elevators': elevator_nums,
+        'floors': floors,
+        'tick': tick,
+        'car_ticks': simulation.car_ticks,
+        'car_ticks_per_sec': round(simulation.car_ticks / elapsed),
+        'seconds': round(elapsed, 3),
+        'wait': summarize((simulation.wait_times() / 1000).tolist()),
+        'floors_travelled': simulation.floors_travelled,
+        'stops': simulation.stop_count,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.vectorized', description='多楼栋向量化仿真基准测试')
+    parser.add_argument('--buildings', nargs='+', type=int, default=[100, 1000, 10000])
+    parser.add_argument('--cars', type=int, default=ELEVATOR_NUMS)
+    parser.add_argument('--floors', type=int, default=FLOORS)
+    parser.add_argument('--duration', type=float, default=60, help='仿真时长(秒)')
+    parser.add_argument('--interval', type=float, default=10, help='每栋楼平均每隔多少秒一次随机按键')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='把结果写入 JSON 文件')
+    args = parser.parse_args(argv)
+
+    results = []
+    for buildings in args.buildings:
+        result = run_vectorized(buildings, args.cars, args.floors, args.duration * 1000, args.seed,
+                                args.interval * 1000)
+        results.append(result)
+        print("%6d 栋楼 | %9.0f 电梯×时间步/秒 | 用时 %6.2f 秒 | 等待 平均 %6.2f p95 %6.2f 秒" % (
+            buildings, result['car_ticks_per_sec'], result['seconds'],
+            result['wait']['avg'] or 0, result['wait']['p95'] or 0))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'duration': args.duration, 'results': results}, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,273 @@
+import asyncio
+from .constants import (
+    ELEVATOR_NUMS, FLOORS, ELEVATOR_STATUS, MOVING_STATUS,
+    TIME_ATOMIC_MOVE, TIME_DOOR_OP, TIME_STAY_OPEN
+)
+from .requests import OUTER_BUTTON_GENERATE_TASK
+from .state import BuildingState
+from .dispatch import TaskDispatcher
+
+# asyncio 版本的电梯: 每台电梯是一个协程, 状态转换与 elevator_thread.Elevator 相同
+# 事件循环是单线程的, 两次 await 之间的代码不会被打断, 所以不需要任何锁;
+# 电梯只在 wait_until 中挂起, 挂起前已经检查过全部状态, 唤醒不会丢失
+class AsyncElevator:
+    def __init__(self, building, elevator_id):
+        self.building = building
+        self.elevator_id = elevator_id
+        self.state = building.state.elevators[elevator_id]
+        self.waiter = None                  # 挂起时等待的 Future, 唤醒时设置其结果
+        self.tick_name = 'tick_latency.%d' % elevator_id
+
+    def publish(self):
+        self.building.state.snapshots.publish(self.elevator_id, self.state)
+
+    # 唤醒挂起的电梯, 与 elevator_wakeup[i].wakeAll() 相同
+    def wake(self):
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+
+    # 挂起到截止时间(毫秒), 或者被故障、开关门按钮、新任务提前唤醒; deadline 为 None 时一直等到被唤醒
+    # 用 Future 加 call_later 而不是 wait_for, 不为每次等待创建新的 Task
+    async def wait_until(self, deadline=None):
+        building = self.building
+        loop = asyncio.get_running_loop()
+        timer = None
+        if deadline is not None:
+            remaining = deadline - building.clock()
+            if remaining <= 0:
+                return
+            timer = loop.call_later(remaining / building.speed / 1000, self.wake)
+        self.publish()
+        self.waiter = loop.create_future()
+        try:
+            await self.waiter
+        finally:
+            self.waiter = None
+            if timer is not None:
+                timer.cancel()
+        metrics = building.metrics
+        if metrics is not None and deadline is not None:
+            late = building.clock() - deadline
+            if late >= 0:
+                metrics.record(self.tick_name, late)
+
+    def update_elevator_status(self, move_state):
+        if move_state == MOVING_STATUS.up:
+            self.state.status = ELEVATOR_STATUS.moving_up
+        elif move_state == MOVING_STATUS.down:
+            self.state.status = ELEVATOR_STATUS.moving_down
+
+    # 移动一层的过程中检查故障 若故障返回False 若正常返回True
+    async def check_for_faults(self):
+        deadline = self.building.clock() + TIME_ATOMIC_MOVE
+        while True:
+            if self.state.status == ELEVATOR_STATUS.break_down:
+                self.handle_fault()
+                return False
+            if self.building.clock() >= deadline:
+                return True
+            await self.wait_until(deadline)
+
+    async def atomic_move(self, move_state):
+        self.update_elevator_status(move_state)
+        if not await self.check_for_faults():
+            return
+        self.state.current_floor += 1 if move_state == MOVING_STATUS.up else -1
+        self.state.status = ELEVATOR_STATUS.normal
+        self.building.floors_travelled += 1
+
+    # 一次门的操作 包括开门和关门, 与 Elevator.door_operation 相同
+    async def door_operation(self):
+        state = self.state
+        clock = self.building.clock
+        state.status = ELEVATOR_STATUS.door_openning
+        state.door_open_status = 0.0
+        since = clock()
+        deadline = since + TIME_DOOR_OP
+
+        while True:
+            if state.status == ELEVATOR_STATUS.break_down:
+                self.handle_fault()
+                break
+
+            now = clock()
+            if state.status == ELEVATOR_STATUS.door_openning:
+                state.door_open_status = min(1.0, state.door_open_status + (now - since) / TIME_DOOR_OP)
+            elif state.status == ELEVATOR_STATUS.door_closing:
+                state.door_open_status = max(0.0, state.door_open_status - (now - since) / TIME_DOOR_OP)
+            since = now
+
+            if state.open_button_clicked:
+                if state.status == ELEVATOR_STATUS.door_closing:
+                    state.status = ELEVATOR_STATUS.door_openning
+                    deadline = now + (1.0 - state.door_open_status) * TIME_DOOR_OP
+                elif state.status == ELEVATOR_STATUS.door_open:
+                    deadline = now + TIME_STAY_OPEN
+                state.open_button_clicked = False
+
+            if state.close_button_clicked:
+                state.status = ELEVATOR_STATUS.door_closing
+                deadline = now + state.door_open_status * TIME_DOOR_OP
+                state.close_button_clicked = False
+
+            if now < deadline:
+                await self.wait_until(deadline)
+            elif state.status == ELEVATOR_STATUS.door_openning:
+                state.status = ELEVATOR_STATUS.door_open
+                state.door_open_status = 1.0
+                deadline += TIME_STAY_OPEN
+                self.building.stop_count += 1
+                if self.building.metrics is not None:
+                    self.building.metrics.door_opened(self.elevator_id, state.current_floor)
+            elif state.status == ELEVATOR_STATUS.door_open:
+                state.status = ELEVATOR_STATUS.door_closing
+                deadline += TIME_DOOR_OP
+            else:
+                state.door_open_status = 0.0
+                state.status = ELEVATOR_STATUS.normal
+                break
+
+    # 当故障发生时 清除原先的所有任务, 只把本电梯的外部任务交给调度协程重新分配
+    def handle_fault(self):
+        state = self.state
+        state.status = ELEVATOR_STATUS.break_down
+        state.door_open_status = 0.0
+        state.open_button_clicked = False
+        state.close_button_clicked = False
+        state.remaining_up_task.clear()
+        state.remaining_down_task.clear()
+        if self.building.state.outer_request.release_elevator(self.elevator_id):
+            self.building.request_dispatch()
+
+    # 完成当前楼层的外部任务
+    def finish_outer_tasks(self):
+        outer_request = self.building.state.outer_request
+        outer_request.finish_floor(self.state.current_floor)
+        if self.building.metrics is not None:
+            self.building.metrics.door_closed(self.state.current_floor)
+        if outer_request.has_unassigned():
+            self.building.request_dispatch()
+
+    async def run(self):
+        state = self.state
+        while True:
+            if state.status == ELEVATOR_STATUS.break_down:
+                self.handle_fault()
+                if state.status == ELEVATOR_STATUS.break_down:
+                    await self.wait_until()  # 等待故障解除
+                continue
+
+            if state.move_status == MOVING_STATUS.up:
+                stops, others, direction = state.remaining_up_task, state.remaining_down_task, 1
+            else:
+                stops, others, direction = state.remaining_down_task, state.remaining_up_task, -1
+            if stops:
+                next_floor = stops.next_stop()
+                if next_floor == state.current_floor:
+                    await self.door_operation()  # 开关门
+                    if stops:
+                        stops.pop_next()
+                        self.finish_outer_tasks()
+                elif (next_floor - state.current_floor) * direction > 0:
+                    await self.atomic_move(state.move_status)
+                else:
+                    # 停靠楼层已在身后(电梯刚离开该层时分配到的任务), 改到反方向的扫描中处理
+                    others.add(stops.pop_next())
+            elif others:
+                # 当前方向没有任务但反方向有任务, 更改扫描方向
+                state.move_status = MOVING_STATUS.down if direction == 1 else MOVING_STATUS.up
+            else:
+                await self.wait_until()  # 空闲时挂起, 等待新任务
+
+
+# asyncio 版本的一栋楼: 每台电梯一个协程, 加一个消费外部任务队列的调度协程
+# 按钮操作与 UI_MainWindow 中的按钮处理函数规则相同, 必须在事件循环所在的线程中调用
+# speed 大于1时按比例加快时钟, 一个进程的一个事件循环可以同时运行许多栋楼
+# metrics 为 core.metrics.Metrics 时记录运行指标, 等待时间按本楼(加快后)的时钟计算; 每栋楼要用各自的 Metrics
+class AsyncBuilding:
+    def __init__(self, elevator_nums=ELEVATOR_NUMS, floors=FLOORS, policy='cost', batch_dispatch=False,
+                 matching_dispatch=False, speed=1.0, metrics=None):
+        self.state = BuildingState(elevator_nums, floors)
+        self.speed = speed
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.clock = self.clock
+        self.dispatcher = TaskDispatcher(self.state, policy, batch=batch_dispatch, matching=matching_dispatch,
+                                         metrics=metrics)
+        self.elevators = [AsyncElevator(self, i) for i in range(elevator_nums)]
+        self.hall_calls = asyncio.Queue()   # 新的外部任务; None 表示需要重新分配已释放的任务
+        self.floors_travelled = 0
+        self.stop_count = 0
+        self.dispatch_count = 0
+
+    # 时钟(毫秒)
+    def clock(self):
+        return asyncio.get_running_loop().time() * 1000 * self.speed
+
+    def request_dispatch(self):
+        self.hall_calls.put_nowait(None)
+
+    # 调度协程: 等待队列中的外部任务, 把同一时刻到达的全部取出后一次分配
+    async def dispatch(self):
+        queue = self.hall_calls
+        while True:
+            await queue.get()
+            while not queue.empty():
+                queue.get_nowait()
+            self.dispatch_count += 1
+            for elevator_id in self.dispatcher.assign_tasks():
+                self.elevators[elevator_id].wake()
+
+    # 运行这栋楼, 直到被取消
+    async def run(self):
+        await asyncio.gather(self.dispatch(), *(elevator.run() for elevator in self.elevators))
+
+    def press_outer(self, floor, move_state):
+        state = self.state
+        if not 1 <= floor <= state.floors:
+            return False
+        if all(elevator.status == ELEVATOR_STATUS.break_down for elevator in state.elevators):
+            return False
+        task = OUTER_BUTTON_GENERATE_TASK(floor, move_state)
+        if state.outer_request.add(task):
+            if self.metrics is not None:
+                self.metrics.hall_call(floor)
+            self.hall_calls.put_nowait(task)
+        return True
+
+    def press_inner(self, elevator_id, floor):
+        state = self.state.elevators[elevator_id]
+        if state.status == ELEVATOR_STATUS.break_down or not 1 <= floor <= self.state.floors:
+            return False
+        if floor > state.current_floor:
+            state.remaining_up_task.add(floor)
+        elif floor < state.current_floor:
+            state.remaining_down_task.add(floor)
+        if self.metrics is not None and floor != state.current_floor:
+            self.metrics.car_call(elevator_id, floor)
+        self.elevators[elevator_id].wake()
+        return True
+
+    def press_open(self, elevator_id):
+        state = self.state.elevators[elevator_id]
+        if state.status in (ELEVATOR_STATUS.door_closing, ELEVATOR_STATUS.door_open):
+            state.open_button_clicked = True
+            state.close_button_clicked = False
+            self.elevators[elevator_id].wake()
+
+    def press_close(self, elevator_id):
+        state = self.state.elevators[elevator_id]
+        if state.status in (ELEVATOR_STATUS.door_openning, ELEVATOR_STATUS.door_open):
+            state.close_button_clicked = True
+            state.open_button_clicked = False
+            self.elevators[elevator_id].wake()
+
+    # 故障按钮: 正常时设为故障, 故障时恢复; 两种情况都唤醒电梯和调度协程
+    def toggle_fault(self, elevator_id):
+        state = self.state.elevators[elevator_id]
+        if state.status != ELEVATOR_STATUS.break_down:
+            state.status = ELEVATOR_STATUS.break_down
+        else:
+            state.status = ELEVATOR_STATUS.normal
+        self.elevators[elevator_id].wake()
+        self.request_dispatch()
@@ -0,0 +1,27 @@
+import numpy as np
+
+# 用 NumPy 一次算出 电梯 × 未分配任务 的代价矩阵, 代价模型与 CostPolicy.calculate_cost 相同
+# 电梯参数每个都是长度为电梯数的数组:
+#   origins 计算代价的起点楼层, move_up 是否处于向上扫描, last_stops 当前扫描方向最远的停靠楼层,
+#   has_targets 当前扫描方向是否还有停靠楼层, available 电梯是否可用(未故障)
+# 任务参数每个都是长度为任务数的数组: targets 任务楼层, call_up 任务是否向上
+# 不可用电梯所在的行代价为无穷大
+def cost_matrix(origins, move_up, last_stops, has_targets, available, targets, call_up):
+    origins = origins[:, None]
+    last_stops = last_stops[:, None]
+    targets = targets[None, :]
+    direct = np.abs(origins - targets)
+    detour = np.abs(origins - last_stops) + np.abs(targets - last_stops)
+    on_the_way = (move_up[:, None] == call_up[None, :]) & \
+        np.where(call_up[None, :], targets >= origins, targets <= origins)
+    cost = np.where(has_targets[:, None] & ~on_the_way, detour, direct).astype(float)
+    cost[~available] = np.inf
+    return cost
+
+
+# 为每个任务选出代价最小的电梯, 代价相同时取编号最小的, 与逐个分配时的规则一致
+# 没有可用电梯的任务对应 -1
+def choose_elevators(cost):
+    choice = np.argmin(cost, axis=0)
+    choice[~np.isfinite(cost.min(axis=0))] = -1
+    return choice
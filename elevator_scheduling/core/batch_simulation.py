@@ -0,0 +1,233 @@
+import numpy as np
+from .constants import ELEVATOR_NUMS, FLOORS, TIME_ATOMIC_MOVE, TIME_DOOR_OP, TIME_STAY_OPEN
+from .state import check_building_size
+
+# 电梯状态编码
+IDLE = 0            # 停靠中, 门关闭
+MOVING = 1          # 正在沿 direction 移动一层
+OPENING = 2         # 正在开门
+OPEN = 3            # 门已打开
+CLOSING = 4         # 正在关门
+
+NEVER = np.iinfo(np.int64).max      # 空闲电梯没有下一次状态转换
+
+# 外部任务方向的下标
+CALL_UP = 0
+CALL_DOWN = 1
+
+
+# 用 NumPy 数组同时仿真多栋互相独立的楼, 所有楼按相同的时间步长同步推进
+# 每个数组的前两维为 (楼, 电梯), 规则与 Elevator.run / SimElevator 相同, 分配任务使用 CostPolicy 的代价,
+# 按键与界面"产生随机任务"的规则相同: 平均每 press_interval 毫秒一次, 一半外部按钮一半内部按钮
+# 时间步长必须整除移动和开关门的时间, 这样状态转换的时刻与逐事件仿真完全一致; 批量模式不模拟故障
+class BatchSimulation:
+    def __init__(self, buildings, elevator_nums=ELEVATOR_NUMS, floors=FLOORS, seed=0, press_interval=10000,
+                 tick=100):
+        check_building_size(elevator_nums, floors)
+        for duration in (TIME_ATOMIC_MOVE, TIME_DOOR_OP, TIME_STAY_OPEN):
+            if duration % tick:
+                raise ValueError("Tick must divide %d ms: %s" % (duration, tick))
+        shape = (buildings, elevator_nums)
+        self.buildings = buildings
+        self.elevator_nums = elevator_nums
+        self.floors = floors
+        self.tick = tick
+        self.press_probability = tick / press_interval
+        self.rng = np.random.default_rng(seed)
+        self.now = 0
+
+        self.floor = np.ones(shape, dtype=np.int64)             # 当前楼层
+        self.direction = np.ones(shape, dtype=np.int64)         # 扫描方向, 1 上行 -1 下行
+        self.status = np.full(shape, IDLE, dtype=np.int8)
+        self.until = np.full(shape, NEVER, dtype=np.int64)      # 下一次状态转换的时刻(毫秒)
+        # 上行/下行扫描时需要停靠的楼层, 最后一维按楼层编号(0 和 floors + 1 不使用)
+        self.up_stops = np.zeros(shape + (floors + 2,), dtype=bool)
+        self.down_stops = np.zeros(shape + (floors + 2,), dtype=bool)
+        # 外部任务, 维度为 (楼, 楼层, 方向)
+        self.calls = np.zeros((buildings, floors + 2, 2), dtype=bool)
+        self.owner = np.full((buildings, floors + 2, 2), -1, dtype=np.int64)
+        self.pressed_at = np.zeros((buildings, floors + 2, 2), dtype=np.int64)
+
+        self.floor_index = np.arange(floors + 2)
+        self.car_ticks = 0
+        self.floors_travelled = 0
+        self.stop_count = 0
+        self.waits = []                 # 每一步中外部任务从按下到开门的等待时间(毫秒)
+        self.woken = np.zeros(shape, dtype=bool)    # 本步需要重新决定动作的电梯
+        self.new_calls = np.zeros(0, dtype=np.int64)    # 本步有新外部任务的楼
+
+    # 随机产生本时间步的按键, 返回 (外部: 楼, 楼层, 方向) 和 (内部: 楼, 电梯, 楼层)
+    def generate_presses(self):
+        rng = self.rng
+        pressing = np.flatnonzero(rng.random(self.buildings) < self.press_probability)
+        outer = rng.random(len(pressing)) < 0.5
+        buildings = pressing[outer]
+        floors = rng.integers(1, self.floors + 1, len(buildings))
+        directions = np.where(floors == 1, CALL_UP, np.where(
+            floors == self.floors, CALL_DOWN, rng.integers(0, 2, len(buildings))))
+        inner = pressing[~outer]
+        cars = rng.integers(0, self.elevator_nums, len(inner))
+        targets = rng.integers(1, self.floors + 1, len(inner))
+        return (buildings, floors, directions), (inner, cars, targets)
+
+    def press(self, outer, inner):
+        buildings, floors, directions = outer
+        new = ~self.calls[buildings, floors, directions]
+        buildings, floors, directions = buildings[new], floors[new], directions[new]
+        self.calls[buildings, floors, directions] = True
+        self.owner[buildings, floors, directions] = -1
+        self.pressed_at[buildings, floors, directions] = self.now
+        self.new_calls = np.unique(buildings)
+
+        buildings, cars, targets = inner
+        current = self.floor[buildings, cars]
+        up = targets > current
+        self.up_stops[buildings[up], cars[up], targets[up]] = True
+        down = targets < current
+        self.down_stops[buildings[down], cars[down], targets[down]] = True
+        self.woken[buildings, cars] = True
+
+    # 推进一个时间步; 顺序与 SimulationEngine 中同一时刻的事件相同:
+    # 按键, 到达状态转换时刻的电梯进入下一个状态并立即决定下一步动作, 再分配外部任务, 收到任务的电梯最后决定
+    def step(self):
+        self.now += self.tick
+        self.press(*self.generate_presses())
+        self.advance()
+        self.decide()
+        self.dispatch()
+        self.decide()
+        self.car_ticks += self.status.size
+
+    def run(self, duration):
+        for _ in range(int(duration // self.tick)):
+            self.step()
+
+    # 到达状态转换时刻的电梯进入下一个状态
+    def advance(self):
+        done = np.nonzero(self.until <= self.now)
+        if not len(done[0]):
+            return
+        status = self.status[done]
+
+        moved = status == MOVING
+        moved = (done[0][moved], done[1][moved])
+        self.floor[moved] += self.direction[moved]
+        self.floors_travelled += len(moved[0])
+        self.status[moved] = IDLE
+        self.until[moved] = NEVER
+        self.woken[moved] = True
+
+        closing = status == OPEN
+        closing = (done[0][closing], done[1][closing])
+        self.status[closing] = CLOSING
+        self.until[closing] = self.now + TIME_DOOR_OP
+
+        # 门完全打开时记录该层外部任务的等待时间
+        opened = status == OPENING
+        opened = (done[0][opened], done[1][opened])
+        self.status[opened] = OPEN
+        self.until[opened] = self.now + TIME_STAY_OPEN
+        self.stop_count += len(opened[0])
+        buildings, floors = opened[0], self.floor[opened]
+        waiting = self.calls[buildings, floors]
+        self.waits.append(self.now - self.pressed_at[buildings, floors][waiting])
+
+        # 关门后完成本次停靠: 移除当前方向的该停靠楼层, 完成该层的所有外部任务
+        closed = status == CLOSING
+        closed = (done[0][closed], done[1][closed])
+        self.status[closed] = IDLE
+        self.until[closed] = NEVER
+        self.woken[closed] = True
+        buildings, cars = closed
+        floors = self.floor[closed]
+        up = self.direction[closed] == 1
+        self.up_stops[buildings[up], cars[up], floors[up]] = False
+        self.down_stops[buildings[~up], cars[~up], floors[~up]] = False
+        self.calls[buildings, floors] = False
+        self.owner[buildings, floors] = -1
+
+    # 与 TaskDispatcher.assign_tasks 相同, 逐个把未分配任务交给代价最小的电梯;
+    # 只有按键会产生未分配的任务, 每一轮给每栋有新任务的楼分配一个, 直到这些楼都没有未分配任务
+    def dispatch(self):
+        buildings = self.new_calls
+        while len(buildings):
+            unassigned = (self.calls[buildings] & (self.owner[buildings] == -1)).reshape(len(buildings), -1)
+            pending = unassigned.any(axis=1)
+            buildings, unassigned = buildings[pending], unassigned[pending]
+            first = unassigned.argmax(axis=1)
+            floors, directions = first // 2, first % 2
+            cars = self.cost(buildings, floors, directions).argmin(axis=1)
+            self.owner[buildings, floors, directions] = cars
+            # 与 assign_task_to_elevator 相同: 按任务楼层在电梯上方还是下方放入停靠楼层, 同层时按任务方向
+            current = self.floor[buildings, cars]
+            up = (floors > current) | ((floors == current) & (directions == CALL_UP))
+            self.up_stops[buildings[up], cars[up], floors[up]] = True
+            self.down_stops[buildings[~up], cars[~up], floors[~up]] = True
+            self.woken[buildings, cars] = True
+
+    # CostPolicy 的代价: 顺路时按距离, 不顺路时按先走到本次扫描最远处再折返的距离, 结果为 (楼, 电梯)
+    def cost(self, buildings, floors, directions):
+        floor = self.floor[buildings]
+        direction = self.direction[buildings]
+        origin = floor + np.where((self.status[buildings] == MOVING) & (direction == 1), 1, -1)
+        up_stops, down_stops = self.up_stops[buildings], self.down_stops[buildings]
+        moving_up = direction == 1
+        has_targets = np.where(moving_up, up_stops.any(axis=2), down_stops.any(axis=2))
+        highest = self.floors + 1 - up_stops[:, :, ::-1].argmax(axis=2)
+        lowest = down_stops.argmax(axis=2)
+        last_stop = np.where(moving_up, highest, lowest)
+
+        target = floors[:, None]
+        call_up = (directions == CALL_UP)[:, None]
+        on_the_way = (moving_up == call_up) & np.where(call_up, target >= origin, target <= origin)
+        direct = np.abs(origin - target)
+        detour = np.abs(origin - last_stop) + np.abs(target - last_stop)
+        return np.where(has_targets & ~on_the_way, detour, direct)
+
+    # 被唤醒的空闲电梯决定下一步动作, 与 SimElevator.decide 相同:
+    # 当前方向身后的停靠楼层改到反方向处理, 当前方向没有停靠楼层而反方向有时掉头, 最多掉头两次
+    # 空闲电梯一定没有停靠楼层, 所以只需处理本步刚停下或刚收到任务的电梯
+    def decide(self):
+        cars = np.nonzero(self.woken & (self.status == IDLE))
+        self.woken[:] = False
+        if not len(cars[0]):
+            return
+        floor = self.floor[cars]
+        direction = self.direction[cars]
+        up_stops = self.up_stops[cars]
+        down_stops = self.down_stops[cars]
+        below = self.floor_index < floor[:, None]
+        above = self.floor_index > floor[:, None]
+        for _ in range(3):
+            behind_up = up_stops & below & (direction == 1)[:, None]
+            behind_down = down_stops & above & (direction == -1)[:, None]
+            down_stops = (down_stops | behind_up) & ~behind_down
+            up_stops = (up_stops | behind_down) & ~behind_up
+            has_up = up_stops.any(axis=1)
+            has_down = down_stops.any(axis=1)
+            turn = np.where(direction == 1, ~has_up & has_down, ~has_down & has_up)
+            if not turn.any():
+                break
+            direction[turn] *= -1
+        self.up_stops[cars] = up_stops
+        self.down_stops[cars] = down_stops
+        self.direction[cars] = direction
+
+        moving_up = direction == 1
+        acting = np.where(moving_up, has_up, has_down)
+        next_stop = np.where(moving_up, up_stops.argmax(axis=1),
+                             self.floors + 1 - down_stops[:, ::-1].argmax(axis=1))
+        opening = acting & (next_stop == floor)
+        moving = acting & ~opening
+        opening = (cars[0][opening], cars[1][opening])
+        moving = (cars[0][moving], cars[1][moving])
+        self.status[opening] = OPENING
+        self.until[opening] = self.now + TIME_DOOR_OP
+        self.status[moving] = MOVING
+        self.until[moving] = self.now + TIME_ATOMIC_MOVE
+
+    # 所有已记录的外部任务等待时间(毫秒)
+    def wait_times(self):
+        if not self.waits:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(self.waits)
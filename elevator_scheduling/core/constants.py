@@ -1,14 +1,13 @@
 from enum import Enum
-from PyQt5.QtCore import QRect
-# 窗口大小设置
-WINDOW_SIZE = QRect(150, 50, 600, 450)
+# 电梯模型的常量, 不依赖 Qt; 窗口大小等界面设置在 gui_mainwindow.py 中
 
 # 全局变量定义
-ELEVATOR_NUMS = 5                       # 电梯数量
-FLOORS = 20                             # 电梯层数
+ELEVATOR_NUMS = 5                       # 默认电梯数量, 运行时可通过 init_global_vars / BuildingState 修改
+FLOORS = 20                             # 默认电梯层数, 同上
 TIME_ATOMIC_MOVE = 800                  # 移动一层所需时间
 TIME_DOOR_OP = 500                 # 打开一扇门所需时间
 TIME_STAY_OPEN = 700                   # 门打开后维持的时间
+CAR_CAPACITY = 13                       # 每台电梯的额定载客人数, 目的楼层分配和乘客模型使用
 
 # 电梯的扫描移动状态
 class MOVING_STATUS(Enum):
@@ -25,6 +24,15 @@ class ELEVATOR_STATUS(Enum):
     moving_up = 5                       # 表示电梯正在上行
     moving_down = 6                     # 表示电梯正在下行
 
+# 状态和扫描方向的整数编码, 与 Enum 的 value 相同; 电梯状态数组中存放编码, 热路径上直接比较编码
+STATUS_NORMAL, STATUS_BREAK_DOWN, STATUS_DOOR_OPENNING, STATUS_DOOR_OPEN, STATUS_DOOR_CLOSING, \
+    STATUS_MOVING_UP, STATUS_MOVING_DOWN = range(7)
+MOVE_UP, MOVE_DOWN = 1, -1
+
+# 编码 -> Enum
+STATUS_BY_CODE = tuple(sorted(ELEVATOR_STATUS, key=lambda status: status.value))
+MOVE_BY_CODE = {status.value: status for status in MOVING_STATUS}
+
 # 外部按钮可能处在的状态
 class OUTER_TASK_STATUS(Enum):
     unassigned = 1                      # 任务未被分配
@@ -0,0 +1,163 @@
+from .constants import (
+    CAR_CAPACITY, MOVING_STATUS, TIME_ATOMIC_MOVE, TIME_DOOR_OP, TIME_STAY_OPEN,
+    STATUS_BREAK_DOWN, STATUS_DOOR_OPENNING, STATUS_DOOR_OPEN
+)
+from .policies import load_policy
+
+# 目的楼层分配(destination dispatch): 乘客在厅外输入目的楼层, 呼叫带有出发和目的楼层, 按到达顺序立即分配到一台电梯
+# 乘客只等分配到的电梯, 这台电梯在出发楼层开门时上车, 目的楼层由分配器代为登记, 不再按电梯内的按钮
+# 代价 = 策略给出的到达出发楼层的代价 + 新增停靠的代价 × 受影响的乘客数(已分配的乘客和本人),
+# 出发楼层和目的楼层已经是该电梯的停靠楼层时不增加停靠, 因此同一出发楼层、相同目的楼层的乘客被集中到同一台电梯
+# 每台电梯已分配的乘客(等待和车内)不超过 capacity, 所有电梯都满时呼叫留待有乘客下车后再分配
+# state 为 BuildingState, 只用于仿真版本(core.simulation); policy 为分配策略的名字或策略对象
+class DestinationDispatcher:
+    STOP_TIME = 2 * TIME_DOOR_OP + TIME_STAY_OPEN
+
+    def __init__(self, state, policy='cost', capacity=CAR_CAPACITY, metrics=None):
+        elevator_nums = len(state.elevators)
+        self.state = state
+        self.policy = load_policy(policy, elevator_nums=elevator_nums, floors=state.floors)
+        self.capacity = capacity
+        self.metrics = metrics
+        self.stop_cost = self.policy.floor_cost * self.STOP_TIME / TIME_ATOMIC_MOVE     # 一次停靠折算成的代价
+        self.pending = []                                       # 未分配的呼叫, 按到达顺序
+        self.waiting = [{} for _ in range(elevator_nums)]       # 出发楼层 -> 分配到该电梯、还没上车的呼叫
+        self.riding = [{} for _ in range(elevator_nums)]        # 目的楼层 -> 车内的乘客数
+        self.committed = [{} for _ in range(elevator_nums)]     # 目的楼层 -> 已分配的乘客数(等待和车内)
+        self.load = [0] * elevator_nums                         # 已分配的乘客数
+
+    def add(self, task):
+        self.pending.append(task)
+
+    def has_pending(self):
+        return bool(self.pending)
+
+    # 呼叫分配到电梯 elevator_id 时需要新增的停靠次数
+    def new_stops(self, elevator_id, task):
+        elevator = self.state.elevators[elevator_id]
+        stops = 0
+        if task.target not in self.waiting[elevator_id] and task.target not in elevator.remaining_up_task \
+                and task.target not in elevator.remaining_down_task:
+            stops += 1
+        if task.destination not in self.committed[elevator_id]:
+            stops += 1
+        return stops
+
+    def calculate_cost(self, elevator_id, task):
+        store = self.state.elevators
+        if store.status[elevator_id] == STATUS_BREAK_DOWN or self.load[elevator_id] >= self.capacity:
+            return float('inf')
+        cost = self.policy.calculate_cost(elevator_id, store[elevator_id], task)
+        return cost + self.stop_cost * self.new_stops(elevator_id, task) * (self.load[elevator_id] + 1)
+
+    # 按到达顺序分配未分配的呼叫, 返回 [(呼叫, 电梯编号, 是否已经上车)]; 所有电梯都满时停止
+    # 电梯满员造成积压时, 每台电梯有空位时先从积压的呼叫中接收与它已有行程相容的呼叫(见 group), 再按到达顺序分配
+    def assign_calls(self):
+        assigned = []
+        elevator_nums = len(self.state.elevators)
+        for i in range(elevator_nums):
+            if self.pending and self.state.elevators.status[i] != STATUS_BREAK_DOWN:
+                self.group(i, assigned)
+        while self.pending:
+            task = self.pending[0]
+            costs = [self.calculate_cost(i, task) for i in range(elevator_nums)]
+            elevator_id = min(range(elevator_nums), key=costs.__getitem__)
+            if costs[elevator_id] == float('inf'):
+                break
+            self.pending.pop(0)
+            assigned.append((task, elevator_id, self.assign(task, elevator_id)))
+            if self.pending:
+                self.group(elevator_id, assigned)
+        return assigned
+
+    # 相容的呼叫: 出发楼层是电梯要去接人的楼层, 目的楼层是已分配乘客的目的楼层, 分给这台电梯不增加停靠
+    def group(self, elevator_id, assigned):
+        committed, waiting = self.committed[elevator_id], self.waiting[elevator_id]
+        remaining = []
+        for task in self.pending:
+            if self.load[elevator_id] < self.capacity and task.target in waiting and task.destination in committed:
+                assigned.append((task, elevator_id, self.assign(task, elevator_id)))
+            else:
+                remaining.append(task)
+        self.pending = remaining
+
+    # 把呼叫交给电梯 elevator_id; 电梯正在出发楼层开着门时乘客直接上车, 返回是否已经上车
+    def assign(self, task, elevator_id):
+        store = self.state.elevators
+        elevator = store[elevator_id]
+        destination = task.destination
+        self.committed[elevator_id][destination] = self.committed[elevator_id].get(destination, 0) + 1
+        self.load[elevator_id] += 1
+        floor, status = store.current_floor[elevator_id], store.status[elevator_id]
+        if floor == task.target and status == STATUS_DOOR_OPEN:
+            self.board(elevator_id, [task])
+            return True
+        self.waiting[elevator_id].setdefault(task.target, []).append(task)
+        # 正在出发楼层开门, 门开好后即可上车, 不需要再停靠一次
+        if floor == task.target and status == STATUS_DOOR_OPENNING:
+            return False
+        if floor == task.target:
+            stops = elevator.remaining_up_task if task.move_state == MOVING_STATUS.up else elevator.remaining_down_task
+        elif floor < task.target:
+            stops = elevator.remaining_up_task
+        else:
+            stops = elevator.remaining_down_task
+        stops.add(task.target)
+        return False
+
+    # 乘客上车, 登记目的楼层
+    def board(self, elevator_id, tasks):
+        elevator = self.state.elevators[elevator_id]
+        floor = elevator.current_floor
+        riding = self.riding[elevator_id]
+        for task in tasks:
+            destination = task.destination
+            riding[destination] = riding.get(destination, 0) + 1
+            if destination > floor:
+                elevator.remaining_up_task.add(destination)
+            else:
+                elevator.remaining_down_task.add(destination)
+            if self.metrics is not None:
+                self.metrics.car_call(elevator_id, destination)
+
+    # 电梯在 floor 完全打开门: 到达的乘客下车, 等待这台电梯的乘客上车
+    def door_opened(self, elevator_id, floor):
+        alighted = self.riding[elevator_id].pop(floor, 0)
+        if alighted:
+            committed = self.committed[elevator_id]
+            committed[floor] -= alighted
+            if not committed[floor]:
+                del committed[floor]
+            self.load[elevator_id] -= alighted
+        tasks = self.waiting[elevator_id].pop(floor, None)
+        if tasks:
+            self.board(elevator_id, tasks)
+
+    # 电梯在 floor 关门完成: 关门过程中分配到这台电梯的乘客没能上车, 重新登记该层为停靠楼层, 电梯再开一次门
+    def door_closed(self, elevator_id, floor):
+        if floor in self.waiting[elevator_id]:
+            elevator = self.state.elevators[elevator_id]
+            if elevator.move_status == MOVING_STATUS.up:
+                elevator.remaining_up_task.add(floor)
+            else:
+                elevator.remaining_down_task.add(floor)
+
+    # 电梯故障时还没上车的乘客重新分配, 排在未分配呼叫的最前面; 车内的乘客留在车内; 有需要重新分配的呼叫时返回True
+    def release_elevator(self, elevator_id):
+        tasks = [task for floor_tasks in self.waiting[elevator_id].values() for task in floor_tasks]
+        if not tasks:
+            return False
+        self.waiting[elevator_id] = {}
+        self.committed[elevator_id] = dict(self.riding[elevator_id])
+        self.load[elevator_id] = sum(self.riding[elevator_id].values())
+        self.pending[:0] = tasks
+        return True
+
+    # 故障修复后重新登记车内乘客的目的楼层, 已在目的楼层的乘客在电梯开门后下车
+    def restore(self, elevator_id):
+        elevator = self.state.elevators[elevator_id]
+        for destination in self.riding[elevator_id]:
+            if destination >= elevator.current_floor:
+                elevator.remaining_up_task.add(destination)
+            else:
+                elevator.remaining_down_task.add(destination)
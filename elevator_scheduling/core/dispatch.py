@@ -0,0 +1,136 @@
+import importlib
+import time
+from .constants import MOVING_STATUS, STATUS_BREAK_DOWN
+from .policies import load_policy
+
+# 外部任务的分配逻辑
+# state 可以是 global_vars 模块(多线程版本), 也可以是 BuildingState(仿真版本)
+# policy 为分配策略的名字或策略对象(见 core/policies.py), 决定每台电梯响应任务的代价
+# batch 为 True 时用 NumPy 代价矩阵一次分配全部未分配任务(见 assign_tasks_batch)
+# matching 为 True 时把全部未分配任务作为最小代价匹配求解(见 assign_tasks_matching),
+# capacity 为匹配时每台电梯最多承担的外部任务数
+# metrics 为 core.metrics.Metrics 时记录每次分配的用时
+class TaskDispatcher:
+    def __init__(self, state, policy='cost', batch=False, matching=False, capacity=None, metrics=None):
+        self.state = state
+        self.policy = load_policy(policy, elevator_nums=len(state.elevators), floors=state.floors)
+        self.batch = batch
+        self.matching = matching
+        self.capacity = capacity
+        self.metrics = metrics
+        self.last_solve_time = 0.0          # 最近一次匹配求解用时(毫秒)
+        self.max_solve_time = 0.0           # 匹配求解的最长用时(毫秒)
+        self.total_solve_time = 0.0         # 匹配求解累计用时(毫秒)
+        self.solve_count = 0                # 匹配求解次数
+        # 在创建调度器的线程(主线程)中预先加载可选依赖, 不在调度线程中首次导入 NumPy/SciPy; 使用处在函数内再导入
+        if batch or matching:
+            importlib.import_module('.batch_dispatch', __package__)
+        if matching:
+            importlib.import_module('.matching_dispatch', __package__)
+
+    # 访问某台电梯状态前后调用, 多线程版本在子类中加锁, 仿真版本不需要
+    def lock_elevator(self, elevator_id):
+        pass
+
+    def unlock_elevator(self, elevator_id):
+        pass
+
+    def append_task(self, elevator, outer_task):
+        if outer_task.move_state == MOVING_STATUS.up:
+            elevator.remaining_up_task.add(outer_task.target)
+        else:
+            elevator.remaining_down_task.add(outer_task.target)
+
+    def assign_task_to_elevator(self, outer_task, elevator_id):
+        self.lock_elevator(elevator_id)
+        elevator = self.state.elevators[elevator_id]
+        if elevator.current_floor == outer_task.target:
+            self.append_task(elevator, outer_task)
+        elif elevator.current_floor < outer_task.target:
+            elevator.remaining_up_task.add(outer_task.target)
+        elif elevator.current_floor > outer_task.target:
+            elevator.remaining_down_task.add(outer_task.target)
+        self.unlock_elevator(elevator_id)
+        self.state.outer_request.assign(outer_task, elevator_id)
+
+    def find_closest_elevator(self, outer_task):
+        min_cost = float('inf')
+        target_id = -1
+        store = self.state.elevators
+        for i, elevator in enumerate(store):
+            self.lock_elevator(i)
+            if store.status[i] == STATUS_BREAK_DOWN:
+                self.unlock_elevator(i)
+                continue
+            cost = self.policy.calculate_cost(i, elevator, outer_task)
+            self.unlock_elevator(i)
+            if cost < min_cost:
+                min_cost = cost
+                target_id = i
+        return target_id
+
+    # 分配所有未分配的任务, 返回被分配到任务的电梯编号
+    def assign_tasks(self):
+        if self.metrics is None:
+            return self.__assign_tasks()
+        start = time.perf_counter()
+        assigned = self.__assign_tasks()
+        self.metrics.record('assign_tasks', (time.perf_counter() - start) * 1000)
+        return assigned
+
+    def __assign_tasks(self):
+        if self.matching:
+            return self.assign_tasks_matching()
+        if self.batch:
+            return self.assign_tasks_batch()
+        assigned = set()
+        for outer_task in self.state.outer_request.unassigned():
+            target_id = self.find_closest_elevator(outer_task)
+            if target_id != -1:
+                self.assign_task_to_elevator(outer_task, target_id)
+                assigned.add(target_id)
+        return assigned
+
+    # 批量分配: 每台电梯只读一次状态, 用 电梯 × 任务 的代价矩阵一次算出所有任务的分配结果
+    # 代价都按本轮开始时的电梯状态计算, 同一轮内分配出去的任务不影响其他任务的代价
+    def assign_tasks_batch(self):
+        from .batch_dispatch import choose_elevators
+
+        tasks = self.state.outer_request.unassigned()
+        if not tasks:
+            return set()
+        cost = self.policy.cost_matrix(self, tasks)
+        return self.apply_choice(tasks, choose_elevators(cost).tolist())
+
+    # 按每个任务选出的电梯编号分配, -1 表示本轮不分配
+    def apply_choice(self, tasks, choice):
+        assigned = set()
+        for outer_task, target_id in zip(tasks, choice):
+            if target_id != -1:
+                self.assign_task_to_elevator(outer_task, target_id)
+                assigned.add(target_id)
+        return assigned
+
+    # 全局最优分配: 每轮把当前全部未分配任务与电梯做一次带容量约束的最小代价匹配
+    # 已分配的任务保持不变, 只计入电梯的负担, 新任务到达时只对未分配的部分重新求解
+    def assign_tasks_matching(self):
+        import numpy as np
+        from .matching_dispatch import solve_assignment, DEFAULT_CAPACITY
+
+        tasks = self.state.outer_request.unassigned()
+        if not tasks:
+            return set()
+        start = time.perf_counter()
+        cost = self.policy.cost_matrix(self, tasks)
+        outer_request = self.state.outer_request
+        loads = np.fromiter((outer_request.assigned_count(i) for i in range(len(self.state.elevators))),
+                            dtype=np.int64, count=len(self.state.elevators))
+        capacity = self.capacity if self.capacity is not None else DEFAULT_CAPACITY
+        choice = solve_assignment(cost, loads, capacity, self.policy.floor_cost).tolist()
+        self.last_solve_time = (time.perf_counter() - start) * 1000
+        self.max_solve_time = max(self.max_solve_time, self.last_solve_time)
+        self.total_solve_time += self.last_solve_time
+        self.solve_count += 1
+        if self.metrics is not None:
+            self.metrics.record('matching_solve', self.last_solve_time)
+        return self.apply_choice(tasks, choice)
@@ -0,0 +1,73 @@
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+from itertools import islice
+
+# 运行信息中的一条事件; kind 为事件类型(见下), elevator 和 floor 不适用时为 None
+LogEvent = namedtuple('LogEvent', ['time', 'kind', 'elevator', 'floor', 'message'])
+
+# 事件类型
+OUTER = 'outer'         # 外部按钮
+INNER = 'inner'         # 电梯内楼层按钮
+DOOR = 'door'           # 开关门按钮
+FAULT = 'fault'         # 故障和恢复
+TRAFFIC = 'traffic'     # 生成的乘客
+INFO = 'info'           # 其他
+
+
+def format_event(event):
+    return "%s.%03d %s" % (time.strftime('%H:%M:%S', time.localtime(event.time)), int(event.time % 1 * 1000),
+                           event.message)
+
+
+# 运行信息的事件日志: 最近 capacity 条事件放在环形缓冲区中, 内存占用不随运行时间增长
+# 打开日志文件后, 每条事件还交给后台线程写入按大小轮转的文件, 记录方只做一次入队
+# 可以在任意线程中记录; appended 为累计记录的条数, 界面据此判断是否需要刷新
+class EventLog:
+    def __init__(self, capacity=10000):
+        self.events = deque(maxlen=capacity)
+        self.appended = 0
+        self.__lock = threading.Lock()
+        self.__queue = None
+        self.__listener = None
+        self.__handler = None
+
+    def __len__(self):
+        return len(self.events)
+
+    def add(self, kind, message, elevator=None, floor=None):
+        event = LogEvent(time.time(), kind, elevator, floor, message)
+        with self.__lock:
+            self.events.append(event)
+            self.appended += 1
+        if self.__queue is not None:
+            self.__queue.put(logging.makeLogRecord({'msg': format_event(event)}))
+
+    # 缓冲区中全部事件的副本, 按时间先后排列
+    def snapshot(self):
+        with self.__lock:
+            return list(self.events), self.appended
+
+    # 从第 first 条起最多 count 条事件的副本(只复制这几条), 以及缓冲区中的条数和累计记录的条数
+    def window(self, first, count):
+        with self.__lock:
+            return list(islice(self.events, first, first + count)), len(self.events), self.appended
+
+    # 写入 path, 超过 max_bytes 字节时轮转为 path.1 ... path.backups
+    def open_file(self, path, max_bytes=1 << 20, backups=3):
+        self.close()
+        self.__handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                                              encoding='utf-8')
+        self.__queue = queue.SimpleQueue()
+        self.__listener = logging.handlers.QueueListener(self.__queue, self.__handler)
+        self.__listener.start()
+
+    # 写完队列中剩余的事件后关闭文件
+    def close(self):
+        if self.__listener is not None:
+            self.__listener.stop()
+            self.__handler.close()
+            self.__queue = self.__listener = self.__handler = None
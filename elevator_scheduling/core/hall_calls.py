@@ -0,0 +1,105 @@
+from .constants import OUTER_TASK_STATUS
+
+# 外部按钮请求的登记表, 以 (楼层, 方向) 为键
+# 同时按状态、楼层和分配到的电梯建立索引, 避免对全部请求做线性扫描
+# 任务的状态只能通过本类的方法修改, 以保证索引一致; 多线程版本由 request_mutex 保护
+class HallCallRegistry:
+    def __init__(self):
+        self.__calls = {}               # (楼层, 方向) -> 任务, 按加入顺序
+        self.__unassigned = {}          # 未分配的任务, 按加入顺序
+        self.__by_floor = {}            # 楼层 -> {键: 任务}
+        self.__by_elevator = {}         # 电梯编号 -> {键: 任务}
+        self.__owner = {}               # 键 -> 分配到的电梯编号
+        self.__lit = frozenset()        # 所有任务键的不可变快照, 登记表变化时整体替换
+
+    @staticmethod
+    def key(task):
+        return task.target, task.move_state
+
+    def __contains__(self, task):
+        return self.key(task) in self.__calls
+
+    def __len__(self):
+        return len(self.__calls)
+
+    def __iter__(self):
+        return iter(list(self.__calls.values()))
+
+    # 当前所有任务的 (楼层, 方向); 返回的是不可变快照, 界面读取时不需要持有 request_mutex
+    def snapshot(self):
+        return self.__lit
+
+    def get(self, floor, move_state):
+        return self.__calls.get((floor, move_state))
+
+    # 加入一个新任务, 已存在相同楼层和方向的任务时返回False
+    def add(self, task):
+        key = self.key(task)
+        if key in self.__calls:
+            return False
+        self.__calls[key] = task
+        self.__by_floor.setdefault(task.target, {})[key] = task
+        self.__lit = self.__lit | {key}
+        if task.state == OUTER_TASK_STATUS.unassigned:
+            self.__unassigned[key] = task
+        return True
+
+    # 所有未分配的任务(副本, 可以边遍历边分配)
+    def unassigned(self):
+        return list(self.__unassigned.values())
+
+    def has_unassigned(self):
+        return bool(self.__unassigned)
+
+    def at_floor(self, floor):
+        return list(self.__by_floor.get(floor, {}).values())
+
+    def assigned_to(self, elevator_id):
+        return list(self.__by_elevator.get(elevator_id, {}).values())
+
+    def assigned_count(self, elevator_id):
+        return len(self.__by_elevator.get(elevator_id, ()))
+
+    def owner(self, task):
+        return self.__owner.get(self.key(task), -1)
+
+    def assign(self, task, elevator_id):
+        key = self.key(task)
+        self.__release(key)
+        self.__unassigned.pop(key, None)
+        self.__owner[key] = elevator_id
+        self.__by_elevator.setdefault(elevator_id, {})[key] = task
+        task.state = OUTER_TASK_STATUS.waiting
+
+    # 使任务可被重新分配
+    def unassign(self, task):
+        key = self.key(task)
+        self.__release(key)
+        self.__unassigned[key] = task
+        task.state = OUTER_TASK_STATUS.unassigned
+
+    # 电梯故障时, 使分配给它的所有任务(且只有这些任务)可被重新分配, 返回这些任务
+    def release_elevator(self, elevator_id):
+        released = self.__by_elevator.pop(elevator_id, {})
+        for key, task in released.items():
+            del self.__owner[key]
+            self.__unassigned[key] = task
+            task.state = OUTER_TASK_STATUS.unassigned
+        return list(released.values())
+
+    # 电梯在某层开过门后, 该层的所有任务完成并从登记表中移除
+    def finish_floor(self, floor):
+        finished = self.__by_floor.pop(floor, {})
+        for key, task in finished.items():
+            del self.__calls[key]
+            self.__unassigned.pop(key, None)
+            self.__release(key)
+            task.state = OUTER_TASK_STATUS.finished
+        if finished:
+            self.__lit = self.__lit.difference(finished)
+        return list(finished.values())
+
+    def __release(self, key):
+        elevator_id = self.__owner.pop(key, None)
+        if elevator_id is not None:
+            del self.__by_elevator[elevator_id][key]
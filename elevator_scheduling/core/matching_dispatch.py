@@ -0,0 +1,34 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from .constants import TIME_ATOMIC_MOVE, TIME_DOOR_OP, TIME_STAY_OPEN
+
+# 多停靠一站所花的时间折合成的楼层数, 作为同一台电梯多承担一个任务的额外代价
+STOP_PENALTY = (2 * TIME_DOOR_OP + TIME_STAY_OPEN) / TIME_ATOMIC_MOVE
+# 每台电梯最多同时承担的外部任务数
+DEFAULT_CAPACITY = 8
+
+
+# 把全部未分配任务到电梯的分配作为带容量约束的最小代价匹配求解
+# cost 为 电梯 × 任务 的代价矩阵, 不能分配的 (电梯, 任务) 为无穷大(故障电梯整行为无穷大)
+# loads 为每台电梯已承担的外部任务数
+# 每台电梯拆成 capacity - load 个槽位, 第 k 个槽位的代价额外加 k * STOP_PENALTY,
+# 这样任务会在电梯之间分摊, 而不是都堆到同一台最近的电梯上
+# 无穷大换成比所有有限代价之和还大的代价再求解, 求解器先尽量避开这些组合, 分到的再作废
+# floor_cost 为代价矩阵中一层楼对应的代价, 用来换算 STOP_PENALTY
+# 返回每个任务分到的电梯编号, 槽位不够或没有可用电梯的任务为 -1, 留到下一轮再分配
+def solve_assignment(cost, loads, capacity=DEFAULT_CAPACITY, floor_cost=1):
+    choice = np.full(cost.shape[1], -1, dtype=np.int64)
+    feasible = np.isfinite(cost)
+    free_slots = np.where(feasible.any(axis=1), np.maximum(capacity - loads, 0), 0)
+    if not free_slots.any():
+        return choice
+    slot_elevators = np.repeat(np.arange(cost.shape[0]), free_slots)
+    slot_index = np.concatenate([np.arange(load, load + n) for load, n in zip(loads, free_slots) if n])
+    slot_cost = cost[slot_elevators] + (slot_index * STOP_PENALTY * floor_cost)[:, None]
+    slot_feasible = feasible[slot_elevators]
+    if not slot_feasible.all():
+        slot_cost = np.where(slot_feasible, slot_cost, np.abs(slot_cost[slot_feasible]).sum() + 1)
+    rows, cols = linear_sum_assignment(slot_cost)
+    kept = slot_feasible[rows, cols]
+    choice[cols[kept]] = slot_elevators[rows[kept]]
+    return choice
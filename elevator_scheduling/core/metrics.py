@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+import time
+
+# 直方图的精度: 每个 2 的幂区间分成 2^(SUB_BITS-1) 个桶, 相对误差不超过 1/64
+SUB_BITS = 7
+SUB_COUNT = 1 << SUB_BITS
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+# HDR 风格的对数线性直方图: 数值(毫秒)按微秒取整后放入桶中, 记录是 O(1) 的, 内存只与数值的量级有关
+# 小于 SUB_COUNT 微秒的数值每个一个桶, 更大的数值在每个 2 的幂区间内等分
+class Histogram:
+    def __init__(self):
+        self.counts = {}                # 桶编号 -> 次数
+        self.count = 0
+        self.total = 0                  # 微秒
+        self.min = None
+        self.max = None
+
+    @staticmethod
+    def bucket(value):
+        if value < SUB_COUNT:
+            return value
+        shift = value.bit_length() - SUB_BITS
+        return (shift << (SUB_BITS - 1)) + (value >> shift)
+
+    # 桶所覆盖的数值范围 [low, high]
+    @staticmethod
+    def bucket_range(index):
+        if index < SUB_COUNT:
+            return index, index
+        shift = (index >> (SUB_BITS - 1)) - 1
+        low = (index - (shift << (SUB_BITS - 1))) << shift
+        return low, low + (1 << shift) - 1
+
+    def record(self, value):
+        value = max(0, int(value * 1000))
+        index = self.bucket(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    # 第 p 百分位数(毫秒), 取所在桶的中点
+    def percentile(self, p):
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                low, high = self.bucket_range(index)
+                return min(max((low + high) / 2, self.min), self.max) / 1000
+        return self.max / 1000
+
+    def mean(self):
+        return self.total / self.count / 1000 if self.count else None
+
+    def summary(self):
+        result = {
+            'count': self.count,
+            'min': self.min / 1000 if self.count else None,
+            'max': self.max / 1000 if self.count else None,
+            'mean': round(self.mean(), 3) if self.count else None,
+        }
+        for p in PERCENTILES:
+            value = self.percentile(p)
+            result['p%s' % p] = round(value, 3) if value is not None else None
+        return result
+
+
+# 运行指标: 计数器和直方图, 按名字区分; 多个线程可以同时记录, 由一把只在记录时持有的锁保护
+# 不启用时调用方持有的是 None, 每个记录点只多一次 is None 判断
+# clock 为计算等待时间用的时钟(毫秒), 默认为单调时钟(与电梯线程相同), 仿真引擎会换成仿真时钟
+# 直方图的数值都以毫秒为单位, 主要的名字:
+#   request_mutex.wait / request_mutex.hold     获取和持有外部请求锁的时间
+#   elevator_mutex.wait / elevator_mutex.hold   获取和持有电梯锁的时间(全部电梯合计)
+#   assign_tasks                                一次分配全部未分配任务的用时
+#   matching_solve                              匹配分配时一次求解的用时(含计算代价矩阵)
+#   tick_latency.<电梯编号>                     电梯状态转换比预定时间晚了多少
+#   hall_wait                                   外部按钮按下到该层开门
+#   ride_time                                   电梯内楼层按钮按下到该层开门
+class Metrics:
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else lambda: time.monotonic() * 1000
+        self.started = time.time()
+        self.counters = {}
+        self.histograms = {}
+        self.__lock = threading.Lock()
+        self.__hall_calls = {}          # 楼层 -> 最早一次按下外部按钮的时间
+        self.__car_calls = {}           # (电梯编号, 楼层) -> 按下楼层按钮的时间
+
+    def count(self, name, n=1):
+        with self.__lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, name, value):
+        with self.__lock:
+            self.__record(name, value)
+
+    def __record(self, name, value):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.record(value)
+
+    def hall_call(self, floor):
+        now = self.clock()
+        with self.__lock:
+            self.__hall_calls.setdefault(floor, now)
+            self.counters['hall_calls'] = self.counters.get('hall_calls', 0) + 1
+
+    def car_call(self, elevator_id, floor):
+        now = self.clock()
+        with self.__lock:
+            self.__car_calls.setdefault((elevator_id, floor), now)
+            self.counters['car_calls'] = self.counters.get('car_calls', 0) + 1
+
+    # 电梯在某层门完全打开: 该层的外部任务和本电梯去该层的内部任务都完成
+    def door_opened(self, elevator_id, floor):
+        now = self.clock()
+        with self.__lock:
+            pressed = self.__hall_calls.pop(floor, None)
+            if pressed is not None:
+                self.__record('hall_wait', now - pressed)
+            pressed = self.__car_calls.pop((elevator_id, floor), None)
+            if pressed is not None:
+                self.__record('ride_time', now - pressed)
+            self.counters['stops'] = self.counters.get('stops', 0) + 1
+
+    # 关门后该层的外部任务从登记表中移除; 此时还没有结算的外部按钮是在门开着时按下的, 不需要等待
+    def door_closed(self, floor):
+        with self.__lock:
+            if self.__hall_calls.pop(floor, None) is not None:
+                self.__record('hall_wait', 0)
+
+    def snapshot(self):
+        with self.__lock:
+            return {
+                'time': time.time(),
+                'uptime': round(time.time() - self.started, 3),
+                'counters': dict(self.counters),
+                'histograms': {name: histogram.summary() for name, histogram in sorted(self.histograms.items())},
+            }
+
+    # 人可读的表格, 供界面面板和文本导出使用
+    def format_text(self, snapshot=None):
+        snapshot = snapshot or self.snapshot()
+        lines = ["运行 %.0f 秒  " % snapshot['uptime'] +
+                 "  ".join("%s=%d" % item for item in sorted(snapshot['counters'].items()))]
+        lines.append("%-22s %8s %9s %9s %9s %9s %9s" % ('(毫秒)', '次数', '平均', 'p50', 'p99', 'p99.9', '最大'))
+        for name, summary in snapshot['histograms'].items():
+            lines.append("%-22s %8d %9.3f %9.3f %9.3f %9.3f %9.3f" % (
+                name, summary['count'], summary['mean'], summary['p50'], summary['p99'], summary['p99.9'],
+                summary['max']))
+        return "\n".join(lines)
+
+
+# 把指标写入文件: .json 结尾时写 JSON, 否则写文本表格; 先写临时文件再替换, 读取方不会读到写了一半的文件
+def export_metrics(metrics, path):
+    snapshot = metrics.snapshot()
+    temp = path + '.tmp'
+    with open(temp, 'w') as f:
+        if path.endswith('.json'):
+            json.dump(snapshot, f, indent=2, sort_keys=True)
+        else:
+            f.write(metrics.format_text(snapshot) + "\n")
+    os.replace(temp, path)
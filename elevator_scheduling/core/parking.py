@@ -0,0 +1,85 @@
+import numpy as np
+from .constants import FLOORS
+
+DAY = 24 * 3600 * 1000
+
+
+# 外部任务的滚动直方图: 按一天中的时段和楼层计数
+# 同一时段每过一天, 旧的计数乘以 decay, 所以直方图会跟随需求的变化
+class DemandHistogram:
+    def __init__(self, floors=FLOORS, slot=15 * 60 * 1000, decay=0.8):
+        self.floors = floors
+        self.slot = slot
+        self.decay = decay
+        slots = DAY // slot
+        self.counts = [[0.0] * (floors + 1) for _ in range(slots)]
+        self.days = [0] * slots                 # 每个时段最近一次计数所在的天
+
+    def slot_index(self, now):
+        return int(now % DAY) // self.slot
+
+    def record(self, now, floor):
+        index = self.slot_index(now)
+        day = int(now // DAY)
+        counts = self.counts[index]
+        if self.days[index] != day:
+            factor = self.decay ** (day - self.days[index])
+            for i in range(len(counts)):
+                counts[i] *= factor
+            self.days[index] = day
+        counts[floor] += 1
+
+    # 预测当前时段的需求, 给出最多 count 个停靠楼层, 按加入的先后排列
+    # 逐个选择使 "各层需求 × 到最近停靠楼层的距离" 之和下降最多的楼层(贪心加权 k-中位数);
+    # 当前时段还没有记录时用上一个时段
+    def predict(self, now, count):
+        index = self.slot_index(now)
+        counts = self.counts[index]
+        if not any(counts):
+            counts = self.counts[index - 1]
+        weights = np.array(counts[1:])
+        if not weights.any():
+            return []
+        floor_numbers = np.arange(1, self.floors + 1)
+        spans = np.abs(floor_numbers[:, None] - floor_numbers[None, :])     # 候选楼层 × 需求楼层
+        distance = np.full(self.floors, np.inf)
+        floors = []
+        while len(floors) < count:
+            costs = (np.minimum(distance, spans) * weights).sum(axis=1)
+            costs[[floor - 1 for floor in floors]] = np.inf
+            best = int(costs.argmin())
+            floors.append(best + 1)
+            distance = np.minimum(distance, spans[best])
+            if costs[best] == 0:
+                break
+        return floors
+
+
+# 空闲停靠: 把空闲的电梯分配到预测需求最多的楼层
+# 按需求从高到低, 每个停靠位置交给离它最近的空闲电梯, 已经在该楼层的电梯原地不动
+class ParkingPlanner:
+    def __init__(self, histogram, idle_delay=5000, refresh=60000):
+        self.histogram = histogram
+        self.idle_delay = idle_delay            # 电梯空闲多久(毫秒)后才去停靠楼层
+        self.refresh = refresh                  # 预测结果的有效时间(毫秒), 期间直方图的少量变化不重新计算
+        self.__predicted = None                 # (预测时间, 时段, 电梯数, 停靠楼层)
+
+    # 贪心选出的前 k 个楼层就是 k 台电梯的停靠楼层, 所以电梯数较少时直接截取缓存的结果
+    def predict(self, now, count):
+        slot = self.histogram.slot_index(now)
+        cached = self.__predicted
+        if cached is None or now - cached[0] >= self.refresh or cached[1] != slot or cached[2] < count:
+            cached = self.__predicted = (now, slot, count, self.histogram.predict(now, count))
+        return cached[3][:count]
+
+    # idle_cars: [(电梯编号, 当前楼层)], 返回 {电梯编号: 停靠楼层}
+    def plan(self, now, idle_cars):
+        remaining = dict(idle_cars)
+        targets = {}
+        for floor in self.predict(now, len(idle_cars)):
+            if not remaining:
+                break
+            elevator_id = min(remaining, key=lambda i: abs(remaining[i] - floor))
+            del remaining[elevator_id]
+            targets[elevator_id] = floor
+        return targets
@@ -0,0 +1,171 @@
+from .constants import (
+    ELEVATOR_NUMS, FLOORS, ELEVATOR_STATUS, MOVING_STATUS,
+    TIME_ATOMIC_MOVE, TIME_DOOR_OP, TIME_STAY_OPEN, STATUS_BREAK_DOWN, STATUS_MOVING_UP, MOVE_UP
+)
+
+# 分配策略: 给出某台电梯响应某个外部任务的代价, 代价越小越优先
+# TaskDispatcher 按名字加载策略, 贪心、批量和匹配三种分配方式都只通过代价使用策略
+class DispatchPolicy:
+    name = None
+    floor_cost = 1                          # 多走一层楼对应的代价, 用于把其他时间折算成代价
+
+    def __init__(self, elevator_nums=ELEVATOR_NUMS, floors=FLOORS):
+        self.elevator_nums = elevator_nums
+        self.floors = floors
+
+    # 调用时已持有该电梯的锁, 且电梯未故障
+    def calculate_cost(self, elevator_id, elevator, outer_task):
+        raise NotImplementedError
+
+    # 电梯 × 任务 的代价矩阵, 故障电梯所在行为无穷大; 子类可以用 NumPy 向量化
+    def cost_matrix(self, dispatcher, tasks):
+        import numpy as np
+
+        store = dispatcher.state.elevators
+        cost = np.full((len(store), len(tasks)), np.inf)
+        for i, elevator in enumerate(store):
+            dispatcher.lock_elevator(i)
+            if store.status[i] != STATUS_BREAK_DOWN:
+                cost[i] = [self.calculate_cost(i, elevator, task) for task in tasks]
+            dispatcher.unlock_elevator(i)
+        return cost
+
+
+# 原有的代价函数: 顺路时按距离, 不顺路时按先走到本次扫描最远处再折返的距离
+class CostPolicy(DispatchPolicy):
+    name = 'cost'
+
+    def calculate_cost(self, elevator_id, elevator, outer_task):
+        store, i = elevator.store, elevator.index
+        origin = store.current_floor[i] + (1 if store.status[i] == STATUS_MOVING_UP else -1)
+        move_up = store.move_status[i] == MOVE_UP
+        targets = elevator.remaining_up_task if move_up else elevator.remaining_down_task
+        if not targets:
+            return abs(origin - outer_task.target)
+        call_up = outer_task.move_state is MOVING_STATUS.up
+        if move_up == call_up and (outer_task.target >= origin if call_up else outer_task.target <= origin):
+            return abs(origin - outer_task.target)
+        last_stop = targets.last_stop()
+        return abs(origin - last_stop) + abs(outer_task.target - last_stop)
+
+    # 锁住全部电梯后整体复制状态数组, 每台电梯只需再读一次停靠楼层, 用 NumPy 一次算出整个矩阵
+    def cost_matrix(self, dispatcher, tasks):
+        import numpy as np
+        from .batch_dispatch import cost_matrix
+
+        store = dispatcher.state.elevators
+        elevator_nums = len(store)
+        last_stops = np.zeros(elevator_nums, dtype=np.int64)
+        has_targets = np.zeros(elevator_nums, dtype=bool)
+        for i in range(elevator_nums):
+            dispatcher.lock_elevator(i)
+        status = np.array(store.status, dtype=np.int8)
+        move_up = np.array(store.move_status, dtype=np.int8) == MOVE_UP
+        current_floors = np.array(store.current_floor, dtype=np.int64)
+        for i, elevator in enumerate(store):
+            targets = elevator.remaining_up_task if move_up[i] else elevator.remaining_down_task
+            if targets:
+                has_targets[i] = True
+                last_stops[i] = targets.last_stop()
+        for i in range(elevator_nums):
+            dispatcher.unlock_elevator(i)
+
+        origins = current_floors + np.where(status == STATUS_MOVING_UP, 1, -1)
+        available = status != STATUS_BREAK_DOWN
+        floors = np.fromiter((task.target for task in tasks), dtype=np.int64, count=len(tasks))
+        call_up = np.fromiter((task.move_state == MOVING_STATUS.up for task in tasks), dtype=bool, count=len(tasks))
+        return cost_matrix(origins, move_up, last_stops, has_targets, available, floors, call_up)
+
+
+# 最近电梯: 只看电梯当前楼层到任务楼层的距离
+class NearestCarPolicy(DispatchPolicy):
+    name = 'nearest'
+
+    def calculate_cost(self, elevator_id, elevator, outer_task):
+        return abs(elevator.current_floor - outer_task.target)
+
+
+# 按 LOOK 规则计算电梯到达任务楼层所走的楼层数, 以及途中需要停靠的次数
+# 电梯沿当前方向走到最远的停靠楼层后折返, 不会走到顶楼或底楼
+# 把楼层乘以扫描方向(上行为1, 下行为-1), 两个方向就可以按同一种情况计算
+def look_route(elevator, outer_task):
+    direction = 1 if elevator.move_status == MOVING_STATUS.up else -1
+    if direction == 1:
+        ahead, behind = elevator.remaining_up_task, elevator.remaining_down_task
+    else:
+        ahead, behind = elevator.remaining_down_task, elevator.remaining_up_task
+    position = elevator.current_floor
+    travelled = 0
+    if elevator.status in (ELEVATOR_STATUS.moving_up, ELEVATOR_STATUS.moving_down):
+        position += 1 if elevator.status == ELEVATOR_STATUS.moving_up else -1
+        travelled = 1
+    position *= direction
+    target = outer_task.target * direction
+    far = max(position, ahead.last_stop() * direction) if ahead else position
+
+    # 顺路: 沿当前方向直接到达
+    if outer_task.move_state == elevator.move_status and target >= position:
+        stops = sum(1 for floor in ahead if floor * direction < target)
+        return travelled + target - position, stops
+    # 反方向的任务: 走到最远处折返
+    if outer_task.move_state != elevator.move_status:
+        far = max(far, target)
+        stops = len(ahead) + sum(1 for floor in behind if floor * direction > target)
+        return travelled + (far - position) + (far - target), stops
+    # 同方向但已经错过: 走到最远处, 折返到反方向最远处, 再回到任务楼层
+    near = min(target, behind.last_stop() * direction) if behind else target
+    return travelled + (far - position) + (far - near) + (target - near), len(ahead) + len(behind)
+
+
+# LOOK: 代价为按 LOOK 规则到达任务楼层所走的楼层数
+class LookPolicy(DispatchPolicy):
+    name = 'look'
+
+    def calculate_cost(self, elevator_id, elevator, outer_task):
+        return look_route(elevator, outer_task)[0]
+
+
+# 预计到达时间(毫秒): 行驶时间 + 途中每次停靠的开关门时间 + 当前这次开关门剩余的时间
+class EtaPolicy(DispatchPolicy):
+    name = 'eta'
+    floor_cost = TIME_ATOMIC_MOVE
+    STOP_TIME = 2 * TIME_DOOR_OP + TIME_STAY_OPEN
+
+    def calculate_cost(self, elevator_id, elevator, outer_task):
+        distance, stops = look_route(elevator, outer_task)
+        eta = distance * TIME_ATOMIC_MOVE + stops * self.STOP_TIME
+        if elevator.status == ELEVATOR_STATUS.door_openning:
+            eta += (1.0 - elevator.door_open_status) * TIME_DOOR_OP + TIME_STAY_OPEN + TIME_DOOR_OP
+        elif elevator.status == ELEVATOR_STATUS.door_open:
+            eta += TIME_STAY_OPEN + TIME_DOOR_OP
+        elif elevator.status == ELEVATOR_STATUS.door_closing:
+            eta += elevator.door_open_status * TIME_DOOR_OP
+        return eta
+
+
+# 上行高峰分区: 2楼到顶楼按电梯数分成连续的区, 每台电梯负责一个区
+# 区内任务按 LOOK 距离计算代价, 区外任务额外加一整栋楼的距离, 只有本区电梯都故障时才会去
+# 1楼(大堂)的任务不分区, 所有电梯按 LOOK 距离竞争
+class ZoningPolicy(DispatchPolicy):
+    name = 'zoning'
+
+    def zone_of(self, floor):
+        return (floor - 2) * self.elevator_nums // max(self.floors - 1, 1)
+
+    def calculate_cost(self, elevator_id, elevator, outer_task):
+        cost = look_route(elevator, outer_task)[0]
+        if outer_task.target != 1 and self.zone_of(outer_task.target) != elevator_id % self.elevator_nums:
+            cost += self.floors
+        return cost
+
+
+POLICIES = {policy.name: policy for policy in (CostPolicy, NearestCarPolicy, LookPolicy, ZoningPolicy, EtaPolicy)}
+
+
+# 按名字创建分配策略, 也可以直接传入策略对象
+def load_policy(policy, elevator_nums=ELEVATOR_NUMS, floors=FLOORS):
+    if isinstance(policy, DispatchPolicy):
+        return policy
+    if policy not in POLICIES:
+        raise ValueError("Unknown dispatch policy: %s" % policy)
+    return POLICIES[policy](elevator_nums, floors)
@@ -1,11 +1,13 @@
 from .constants import OUTER_TASK_STATUS
 
 # 外部按钮按下产生的任务描述
+# 目的楼层分配(core.destination_dispatch)时乘客在厅外直接输入目的楼层, destination 为该楼层, 否则为 None
 class OUTER_BUTTON_GENERATE_TASK:
-    def __init__(self, target, move_state, state=OUTER_TASK_STATUS.unassigned):
+    def __init__(self, target, move_state, state=OUTER_TASK_STATUS.unassigned, destination=None):
         self.target = target            # 目标楼层
         self.move_state = move_state    # 需要的电梯运行方向
         self.state = state              # 是否完成（默认未完成）
+        self.destination = destination  # 目的楼层
         
     def __eq__(self, other):
         if not isinstance(other, OUTER_BUTTON_GENERATE_TASK):
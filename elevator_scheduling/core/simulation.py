@@ -0,0 +1,456 @@
+import heapq
+import itertools
+import time
+from .constants import (
+    ELEVATOR_NUMS, FLOORS, CAR_CAPACITY, ELEVATOR_STATUS, MOVING_STATUS,
+    TIME_ATOMIC_MOVE, TIME_DOOR_OP, TIME_STAY_OPEN,
+    STATUS_NORMAL, STATUS_BREAK_DOWN, STATUS_DOOR_OPENNING, STATUS_DOOR_OPEN, STATUS_DOOR_CLOSING,
+    STATUS_MOVING_UP, STATUS_MOVING_DOWN, MOVE_UP, MOVE_DOWN
+)
+from .requests import OUTER_BUTTON_GENERATE_TASK
+from .state import BuildingState
+from .dispatch import TaskDispatcher
+from .destination_dispatch import DestinationDispatcher
+
+# 事件队列中的一个事件
+class ScheduledEvent:
+    __slots__ = ('time', 'callback', 'args', 'cancelled')
+
+    def __init__(self, time, callback, args):
+        self.time = time
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+# 仿真中的一台电梯, 状态转换与 elevator_thread.Elevator 相同
+# 区别在于不再每10ms轮询, 而是为下一次状态转换安排一个事件
+class SimElevator:
+    def __init__(self, engine, elevator_id):
+        self.engine = engine
+        self.state = engine.state.elevators[elevator_id]
+        self.store = engine.state.elevators         # 状态数组, 下面直接读写其中的编码
+        self.elevator_id = elevator_id
+        self.pending = None                 # 当前挂起的状态转换事件, None 表示电梯空闲
+        self.broken = False                 # 故障是否已经处理
+        self.door_time = 0                  # 门的进度最近一次被记录的时间
+        self.door_progress = 0.0            # 该时间点门的进度
+        self.floors_travelled = 0           # 累计行驶的楼层数
+        self.stop_count = 0                 # 累计开门停靠的次数
+        self.parking_floor = None           # 空闲停靠的目标楼层, 到达时不开门
+        self.dirty = True                   # 状态是否在上次发布快照之后改变过
+        self.tick_name = 'tick_latency.%d' % elevator_id
+
+    # 有新任务时唤醒空闲电梯
+    def wake(self):
+        if self.pending is None and not self.broken:
+            self.pending = self.engine.schedule(0, self.step)
+
+    def reschedule(self, delay):
+        if self.pending is not None:
+            self.pending.cancel()
+        self.pending = self.engine.schedule(delay, self.step)
+
+    # 计算当前时刻门的进度
+    def current_door_progress(self):
+        status = self.store.status[self.elevator_id]
+        elapsed = (self.engine.now - self.door_time) / TIME_DOOR_OP
+        if status == STATUS_DOOR_OPENNING:
+            return min(1.0, self.door_progress + elapsed)
+        if status == STATUS_DOOR_CLOSING:
+            return max(0.0, self.door_progress - elapsed)
+        if status == STATUS_DOOR_OPEN:
+            return 1.0
+        return 0.0
+
+    # status 为状态编码
+    def set_door_status(self, status):
+        progress = self.current_door_progress()
+        self.door_time = self.engine.now
+        self.door_progress = progress
+        self.store.door_open_status[self.elevator_id] = progress
+        self.store.status[self.elevator_id] = status
+        if status == STATUS_DOOR_OPENNING:
+            self.reschedule((1.0 - progress) * TIME_DOOR_OP)
+        elif status == STATUS_DOOR_OPEN:
+            self.reschedule(TIME_STAY_OPEN)
+        elif status == STATUS_DOOR_CLOSING:
+            self.reschedule(progress * TIME_DOOR_OP)
+
+    # 处理开关门按钮, 规则与 Elevator.door_operation 相同
+    def poll_buttons(self):
+        state = self.state
+        self.dirty = True
+        if state.open_button_clicked:
+            if state.status == ELEVATOR_STATUS.door_closing:
+                self.set_door_status(STATUS_DOOR_OPENNING)
+            elif state.status == ELEVATOR_STATUS.door_open:
+                self.reschedule(TIME_STAY_OPEN)
+            state.open_button_clicked = False
+        if state.close_button_clicked:
+            if state.status in (ELEVATOR_STATUS.door_openning, ELEVATOR_STATUS.door_open):
+                self.set_door_status(STATUS_DOOR_CLOSING)
+            state.close_button_clicked = False
+
+    # 当故障发生时 清除原先的所有任务
+    def handle_fault(self):
+        state = self.state
+        if self.pending is not None:
+            self.pending.cancel()
+            self.pending = None
+        self.broken = True
+        self.dirty = True
+        state.status = ELEVATOR_STATUS.break_down
+        state.door_open_status = 0.0
+        self.door_progress = 0.0
+        state.open_button_clicked = False
+        state.close_button_clicked = False
+        state.remaining_up_task.clear()
+        state.remaining_down_task.clear()
+        self.parking_floor = None
+        # 只重新分配本电梯的外部任务, 同一时刻的所有重新分配合并为一次调度
+        released = self.engine.state.outer_request.release_elevator(self.elevator_id)
+        if self.engine.destination is not None:
+            released = self.engine.destination.release_elevator(self.elevator_id) or released
+        if released:
+            self.engine.request_dispatch()
+
+    def handle_repair(self):
+        self.broken = False
+        self.dirty = True
+        self.state.status = ELEVATOR_STATUS.normal
+        if self.engine.destination is not None:
+            self.engine.destination.restore(self.elevator_id)
+        self.wake()
+        self.engine.request_dispatch()
+
+    # 在当前楼层完成一次停靠
+    def finish_stop(self, stops):
+        floor = self.state.current_floor
+        if stops:
+            stops.pop_next()
+        outer_request = self.engine.state.outer_request
+        outer_request.finish_floor(floor)
+        destination = self.engine.destination
+        if destination is not None:
+            destination.door_closed(self.elevator_id, floor)
+        if self.engine.metrics is not None:
+            self.engine.metrics.door_closed(floor)
+        self.engine.notify_door(self.elevator_id, floor, False)
+        # 匹配分配时可能有任务因容量不足而留待下一轮, 目的楼层分配时有乘客下车后满员时留下的呼叫可以再分配
+        if outer_request.has_unassigned() or (destination is not None and destination.has_pending()):
+            self.engine.request_dispatch()
+
+    # 没有任务时驶向停靠楼层, 已经到达或没有停靠楼层时通知引擎电梯空闲
+    def park(self):
+        state = self.state
+        floor = self.parking_floor
+        if floor is None or floor == state.current_floor:
+            self.parking_floor = None
+            self.engine.elevator_idle()
+            return
+        i = self.elevator_id
+        if floor > state.current_floor:
+            self.store.move_status[i], self.store.status[i] = MOVE_UP, STATUS_MOVING_UP
+        else:
+            self.store.move_status[i], self.store.status[i] = MOVE_DOWN, STATUS_MOVING_DOWN
+        self.reschedule(TIME_ATOMIC_MOVE)
+
+    # 到达状态转换的时间点
+    def step(self):
+        self.pending = None
+        self.dirty = True
+        if self.engine.metrics is not None:
+            self.engine.metrics.record(self.tick_name, self.engine.lag)
+        state = self.state
+        store, i = self.store, self.elevator_id
+        status = store.status[i]
+        if status == STATUS_BREAK_DOWN:
+            return
+        if status == STATUS_MOVING_UP:
+            store.current_floor[i] += 1
+            store.status[i] = STATUS_NORMAL
+            self.floors_travelled += 1
+        elif status == STATUS_MOVING_DOWN:
+            store.current_floor[i] -= 1
+            store.status[i] = STATUS_NORMAL
+            self.floors_travelled += 1
+        elif status == STATUS_DOOR_OPENNING:
+            self.set_door_status(STATUS_DOOR_OPEN)
+            self.stop_count += 1
+            if self.engine.metrics is not None:
+                self.engine.metrics.door_opened(i, store.current_floor[i])
+            if self.engine.destination is not None:
+                self.engine.destination.door_opened(i, store.current_floor[i])
+            self.engine.notify_door(i, store.current_floor[i], True)
+            return
+        elif status == STATUS_DOOR_OPEN:
+            self.set_door_status(STATUS_DOOR_CLOSING)
+            return
+        elif status == STATUS_DOOR_CLOSING:
+            self.door_progress = 0.0
+            store.door_open_status[i] = 0.0
+            store.status[i] = STATUS_NORMAL
+            if store.move_status[i] == MOVE_UP:
+                self.finish_stop(state.remaining_up_task)
+            else:
+                self.finish_stop(state.remaining_down_task)
+        self.decide()
+
+    # 空闲时决定下一步动作, 规则与 Elevator.run 相同
+    def decide(self):
+        state = self.state
+        store, i = self.store, self.elevator_id
+        while True:
+            direction = store.move_status[i]
+            if direction == MOVE_UP:
+                stops, others = state.remaining_up_task, state.remaining_down_task
+            else:
+                stops, others = state.remaining_down_task, state.remaining_up_task
+            if stops:
+                self.parking_floor = None
+                next_floor = stops.next_stop()
+                current_floor = store.current_floor[i]
+                if next_floor == current_floor:
+                    self.set_door_status(STATUS_DOOR_OPENNING)
+                    return
+                if (next_floor - current_floor) * direction > 0:
+                    store.status[i] = STATUS_MOVING_UP if direction == MOVE_UP else STATUS_MOVING_DOWN
+                    self.reschedule(TIME_ATOMIC_MOVE)
+                    return
+                # 停靠楼层已在身后(电梯刚离开该层时分配到的任务), 改到反方向的扫描中处理
+                others.add(stops.pop_next())
+                continue
+            if not others:
+                self.park()
+                return
+            # 当前方向没有任务但反方向有任务, 更改扫描方向
+            store.move_status[i] = -direction
+
+
+# 离散事件仿真引擎: 用事件优先队列和仿真时钟(毫秒)驱动电梯, 不需要任何 Qt 线程
+# parking 为 True 时按外部任务的历史把空闲电梯停到预测需求最多的楼层(core.parking)
+# metrics 为 core.metrics.Metrics 时记录运行指标, 等待时间按仿真时钟计算
+# destination_dispatch 为 True 时乘客用 press_destination 输入目的楼层, 按目的楼层分组分配(core.destination_dispatch),
+# capacity 为此时每台电梯的载客人数
+class SimulationEngine:
+    def __init__(self, state=None, elevator_nums=ELEVATOR_NUMS, floors=FLOORS, policy='cost', batch_dispatch=False,
+                 matching_dispatch=False, parking=False, metrics=None, destination_dispatch=False,
+                 capacity=CAR_CAPACITY):
+        self.state = state if state is not None else BuildingState(elevator_nums, floors)
+        self.now = 0                                # 仿真时钟(毫秒)
+        self.lag = 0                                # 正在处理的事件比 run_until 的目标时间早了多少(毫秒)
+        self.processed_events = 0                   # 已处理的事件数
+        self.dispatch_time = 0.0                    # 分配任务累计占用的CPU时间(秒)
+        self.dispatch_count = 0                     # 分配任务的次数
+        self.door_listeners = []                    # 门完全打开/关闭时的回调 (电梯编号, 楼层, 是否打开)
+        self.assign_listeners = []                  # 目的楼层呼叫分配到电梯时的回调 (呼叫, 电梯编号, 是否已经上车)
+        self.__queue = []
+        self.__sequence = itertools.count()
+        self.__dispatch_event = None
+        self.__parking_event = None
+        self.parking = None
+        # core.parking 需要 NumPy, 只在启用停靠时才加载
+        if parking:
+            from .parking import DemandHistogram, ParkingPlanner
+            self.parking = ParkingPlanner(DemandHistogram(self.state.floors))
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.clock = lambda: self.now
+        self.dispatcher = TaskDispatcher(self.state, policy, batch=batch_dispatch, matching=matching_dispatch,
+                                         metrics=metrics)
+        self.destination = None
+        if destination_dispatch:
+            self.destination = DestinationDispatcher(self.state, self.dispatcher.policy, capacity, metrics)
+        self.elevators = [SimElevator(self, i) for i in range(len(self.state.elevators))]
+
+    def schedule_at(self, time, callback, *args):
+        event = ScheduledEvent(max(time, self.now), callback, args)
+        heapq.heappush(self.__queue, (event.time, next(self.__sequence), event))
+        return event
+
+    def schedule(self, delay, callback, *args):
+        return self.schedule_at(self.now + delay, callback, *args)
+
+    # 处理所有时间不晚于 end_time 的事件, 然后把时钟推进到 end_time
+    # 实时模式下 end_time 为真实时钟, 事件处理得比预定时间晚了 lag 毫秒, 即电梯的状态转换延迟
+    def run_until(self, end_time):
+        queue = self.__queue
+        while queue and queue[0][0] <= end_time:
+            time, _, event = heapq.heappop(queue)
+            if event.cancelled:
+                continue
+            self.now = time
+            self.lag = end_time - time
+            event.callback(*event.args)
+            self.processed_events += 1
+        self.now = max(self.now, end_time)
+        self.lag = 0
+        # 只为状态改变过或门正在开关的电梯发布快照
+        snapshots = self.state.snapshots
+        store = self.state.elevators
+        status, door_open_status = store.status, store.door_open_status
+        for elevator in self.elevators:
+            i = elevator.elevator_id
+            if elevator.dirty or status[i] == STATUS_DOOR_OPENNING or status[i] == STATUS_DOOR_CLOSING:
+                door_open_status[i] = elevator.current_door_progress()
+                snapshots.publish(i, elevator.state)
+                elevator.dirty = False
+
+    # 处理队列中的全部事件
+    def run(self):
+        queue = self.__queue
+        while queue:
+            time, _, event = heapq.heappop(queue)
+            if event.cancelled:
+                continue
+            self.now = time
+            event.callback(*event.args)
+            self.processed_events += 1
+
+    # 同一时刻的多次分配请求只执行一次
+    def request_dispatch(self):
+        if self.__dispatch_event is None:
+            self.__dispatch_event = self.schedule(0, self.dispatch)
+
+    def dispatch(self):
+        self.__dispatch_event = None
+        start = time.process_time()
+        assigned = self.dispatcher.assign_tasks()
+        calls = self.destination.assign_calls() if self.destination is not None else ()
+        self.dispatch_time += time.process_time() - start
+        self.dispatch_count += 1
+        for elevator_id in assigned:
+            self.elevators[elevator_id].wake()
+        for task, elevator_id, boarded in calls:
+            self.elevators[elevator_id].wake()
+            for listener in self.assign_listeners:
+                listener(task, elevator_id, boarded)
+
+    # 有电梯变为空闲时, 等待一段时间后统一规划所有空闲电梯的停靠楼层
+    def elevator_idle(self):
+        if self.parking is not None and self.__parking_event is None:
+            self.__parking_event = self.schedule(self.parking.idle_delay, self.plan_parking)
+
+    def plan_parking(self):
+        self.__parking_event = None
+        idle_cars = [(elevator.elevator_id, elevator.state.current_floor) for elevator in self.elevators
+                     if elevator.pending is None and not elevator.broken
+                     and not elevator.state.remaining_up_task and not elevator.state.remaining_down_task]
+        for elevator_id, floor in self.parking.plan(self.now, idle_cars).items():
+            elevator = self.elevators[elevator_id]
+            if floor != elevator.state.current_floor:
+                elevator.parking_floor = floor
+                elevator.wake()
+
+    # 通知门完全打开(乘客可以上下)或关门完成(该层的外部任务已完成)
+    def notify_door(self, elevator_id, floor, opened):
+        for listener in self.door_listeners:
+            listener(elevator_id, floor, opened)
+
+    # 以下按钮操作与 UI_MainWindow 中的按钮处理函数规则相同
+    def press_outer(self, floor, move_state):
+        state = self.state
+        if not 1 <= floor <= state.floors:
+            return False
+        if state.elevators.status.count(STATUS_BREAK_DOWN) == len(state.elevators):
+            return False
+        if self.parking is not None:
+            self.parking.histogram.record(self.now, floor)
+        task = OUTER_BUTTON_GENERATE_TASK(floor, move_state)
+        if state.outer_request.add(task):
+            if self.metrics is not None:
+                self.metrics.hall_call(floor)
+            self.request_dispatch()
+        return True
+
+    # 目的楼层分配: 乘客在 origin 输入目的楼层 destination, 返回登记的呼叫, 楼层无效时返回 None
+    # 呼叫在同一时刻的调度中分配, 结果通过 assign_listeners 通知; 没有可用电梯时留待以后分配
+    def press_destination(self, origin, destination):
+        floors = self.state.floors
+        if self.destination is None or origin == destination or not 1 <= origin <= floors \
+                or not 1 <= destination <= floors:
+            return None
+        if self.parking is not None:
+            self.parking.histogram.record(self.now, origin)
+        task = OUTER_BUTTON_GENERATE_TASK(origin, MOVING_STATUS.up if destination > origin else MOVING_STATUS.down,
+                                          destination=destination)
+        self.destination.add(task)
+        if self.metrics is not None:
+            self.metrics.hall_call(origin)
+        self.request_dispatch()
+        return task
+
+    def press_inner(self, elevator_id, floor):
+        state = self.state.elevators[elevator_id]
+        if state.status == ELEVATOR_STATUS.break_down or not 1 <= floor <= self.state.floors:
+            return False
+        if floor > state.current_floor:
+            state.remaining_up_task.add(floor)
+        elif floor < state.current_floor:
+            state.remaining_down_task.add(floor)
+        if self.metrics is not None and floor != state.current_floor:
+            self.metrics.car_call(elevator_id, floor)
+        self.elevators[elevator_id].wake()
+        return True
+
+    def press_open(self, elevator_id):
+        state = self.state.elevators[elevator_id]
+        if state.status in (ELEVATOR_STATUS.door_closing, ELEVATOR_STATUS.door_open):
+            state.open_button_clicked = True
+            state.close_button_clicked = False
+            self.elevators[elevator_id].poll_buttons()
+
+    def press_close(self, elevator_id):
+        state = self.state.elevators[elevator_id]
+        if state.status in (ELEVATOR_STATUS.door_openning, ELEVATOR_STATUS.door_open):
+            state.close_button_clicked = True
+            state.open_button_clicked = False
+            self.elevators[elevator_id].poll_buttons()
+
+    def toggle_fault(self, elevator_id):
+        if self.state.elevators[elevator_id].status != ELEVATOR_STATUS.break_down:
+            self.elevators[elevator_id].handle_fault()
+        else:
+            self.elevators[elevator_id].handle_repair()
+
+    # 把按钮事件日志(core.trace)排入事件队列, speed 大于1时按比例压缩事件之间的间隔
+    def load_trace(self, events, speed=1.0):
+        from . import trace
+
+        handlers = {
+            trace.OUTER: lambda arg, floor: self.press_outer(floor, MOVING_STATUS(arg)),
+            trace.INNER: self.press_inner,
+            trace.OPEN: lambda arg, floor: self.press_open(arg),
+            trace.CLOSE: lambda arg, floor: self.press_close(arg),
+            trace.FAULT: lambda arg, floor: self.toggle_fault(arg),
+        }
+        start = self.now
+        for event in events:
+            if event.kind in handlers:
+                self.schedule_at(start + event.time / speed, handlers[event.kind], event.arg, event.floor)
+
+    # 实时模式下界面直接修改共享状态, 每个定时周期调用一次以同步这些修改
+    def sync(self):
+        store = self.state.elevators
+        status, open_clicked, close_clicked = store.status, store.open_button_clicked, store.close_button_clicked
+        for elevator in self.elevators:
+            i = elevator.elevator_id
+            if status[i] == STATUS_BREAK_DOWN:
+                if not elevator.broken:
+                    elevator.handle_fault()
+                continue
+            if elevator.broken:
+                elevator.handle_repair()
+            if open_clicked[i] or close_clicked[i]:
+                elevator.poll_buttons()
+            if elevator.pending is None:
+                state = elevator.state
+                if state.remaining_up_task or state.remaining_down_task:
+                    elevator.wake()
+        if self.state.outer_request.has_unassigned():
+            self.request_dispatch()
+
@@ -0,0 +1,31 @@
+from collections import namedtuple
+from .constants import ELEVATOR_STATUS, MOVING_STATUS, STATUS_BY_CODE, MOVE_BY_CODE
+
+# 界面显示用的一台电梯的不可变状态快照
+ElevatorSnapshot = namedtuple('ElevatorSnapshot', [
+    'status', 'move_status', 'current_floor', 'door_open_status', 'open_button_clicked', 'close_button_clicked'
+])
+
+IDLE_SNAPSHOT = ElevatorSnapshot(ELEVATOR_STATUS.normal, MOVING_STATUS.up, 1, 0.0, False, False)
+
+
+# 每台电梯最近一次发布的状态快照
+# 写入方在修改完电梯状态、释放该电梯的锁之前发布新的快照, 每个槽位同一时刻只有持有该电梯锁的一方写入
+# 快照不可变, 发布只是替换槽位中的引用, 读取方(界面)复制一次引用列表即可, 不需要加锁, 也不会阻塞电梯线程
+class SnapshotBuffer:
+    def __init__(self, elevator_nums=0):
+        self.__elevators = [IDLE_SNAPSHOT] * elevator_nums
+
+    def reset(self, elevator_nums):
+        self.__elevators = [IDLE_SNAPSHOT] * elevator_nums
+
+    # state 为 ElevatorState, 直接从状态数组中读取, 快照中的状态和方向解码为 Enum
+    def publish(self, elevator_id, state):
+        store, i = state.store, state.index
+        self.__elevators[elevator_id] = ElevatorSnapshot(
+            STATUS_BY_CODE[store.status[i]], MOVE_BY_CODE[store.move_status[i]], store.current_floor[i],
+            store.door_open_status[i], bool(store.open_button_clicked[i]), bool(store.close_button_clicked[i]))
+
+    # 所有电梯最近的快照
+    def elevators(self):
+        return tuple(self.__elevators)
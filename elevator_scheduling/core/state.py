@@ -0,0 +1,117 @@
+from array import array
+from .constants import (
+    ELEVATOR_NUMS, FLOORS, STATUS_NORMAL, MOVE_UP, STATUS_BY_CODE, MOVE_BY_CODE
+)
+from .hall_calls import HallCallRegistry
+from .stops import StopSet
+from .snapshot import SnapshotBuffer
+
+# 全部电梯的状态, 每个字段存成一个定长的类型化数组, 下标为电梯编号
+# 状态和扫描方向存为小整数编码, 楼层为整数, 开门进度为浮点数; 数组可以直接复制成快照或交给 NumPy
+# 按下标取出的 ElevatorState 是某台电梯的视图, 对外仍然读写 Enum; 热路径可以直接读写数组中的编码
+class ElevatorStateStore:
+    def __init__(self, elevator_nums=0):
+        self.reset(elevator_nums)
+
+    def reset(self, elevator_nums):
+        self.status = array('b', [STATUS_NORMAL]) * elevator_nums
+        self.move_status = array('b', [MOVE_UP]) * elevator_nums
+        self.current_floor = array('i', [1]) * elevator_nums
+        self.door_open_status = array('d', [0.0]) * elevator_nums
+        self.open_button_clicked = array('b', [0]) * elevator_nums
+        self.close_button_clicked = array('b', [0]) * elevator_nums
+        self.__views = [ElevatorState(self, i) for i in range(elevator_nums)]
+
+    def __len__(self):
+        return len(self.__views)
+
+    def __getitem__(self, elevator_id):
+        return self.__views[elevator_id]
+
+    def __iter__(self):
+        return iter(self.__views)
+
+
+# 一台电梯的全部状态, 多线程版本中由该电梯自己的锁保护
+# 标量字段存放在 ElevatorStateStore 的数组中, 停靠楼层集合属于电梯自己
+class ElevatorState:
+    __slots__ = ('store', 'index', 'remaining_up_task', 'remaining_down_task')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+        self.remaining_up_task = StopSet(ascending=True)        # 向上扫描时还需处理的楼层
+        self.remaining_down_task = StopSet(ascending=False)     # 向下扫描时还需处理的楼层
+
+    # 电梯的状态
+    @property
+    def status(self):
+        return STATUS_BY_CODE[self.store.status[self.index]]
+
+    @status.setter
+    def status(self, status):
+        self.store.status[self.index] = status.value
+
+    # 当前的扫描运行状态
+    @property
+    def move_status(self):
+        return MOVE_BY_CODE[self.store.move_status[self.index]]
+
+    @move_status.setter
+    def move_status(self, move_status):
+        self.store.move_status[self.index] = move_status.value
+
+    # 当前楼层
+    @property
+    def current_floor(self):
+        return self.store.current_floor[self.index]
+
+    @current_floor.setter
+    def current_floor(self, floor):
+        self.store.current_floor[self.index] = floor
+
+    # 开门进度 0-1
+    @property
+    def door_open_status(self):
+        return self.store.door_open_status[self.index]
+
+    @door_open_status.setter
+    def door_open_status(self, progress):
+        self.store.door_open_status[self.index] = progress
+
+    # 开门键是否被按
+    @property
+    def open_button_clicked(self):
+        return bool(self.store.open_button_clicked[self.index])
+
+    @open_button_clicked.setter
+    def open_button_clicked(self, clicked):
+        self.store.open_button_clicked[self.index] = clicked
+
+    # 关门键是否被按
+    @property
+    def close_button_clicked(self):
+        return bool(self.store.close_button_clicked[self.index])
+
+    @close_button_clicked.setter
+    def close_button_clicked(self, clicked):
+        self.store.close_button_clicked[self.index] = clicked
+
+
+# 楼栋大小在运行时指定, 至少一台电梯、两层楼
+def check_building_size(elevator_nums, floors):
+    if elevator_nums < 1:
+        raise ValueError("Invalid number of elevators: %s" % elevator_nums)
+    if floors < 2:
+        raise ValueError("Invalid number of floors: %s" % floors)
+
+
+# 一栋楼的全部电梯状态, 字段与 global_vars 中的同名全局变量一一对应
+# 无界面仿真时用它代替 global_vars 模块
+class BuildingState:
+    def __init__(self, elevator_nums=ELEVATOR_NUMS, floors=FLOORS):
+        check_building_size(elevator_nums, floors)
+        self.floors = floors                                                 # 楼层数
+        self.elevators = ElevatorStateStore(elevator_nums)                   # 每台电梯的状态
+        self.outer_request = HallCallRegistry()                              # 外部按钮请求的事件
+        self.snapshots = SnapshotBuffer(elevator_nums)                       # 界面读取的电梯状态快照
@@ -0,0 +1,46 @@
+from bisect import insort
+
+# 一台电梯在一个扫描方向上还需停靠的楼层, 按停靠顺序有序且不重复
+# 内部按停靠顺序的逆序存放, 下一站在列表末尾, 取下一站和弹出下一站都是 O(1)
+# 插入用二分查找定位, 去重用集合, 不再需要每次 append 之后重新排序
+class StopSet:
+    def __init__(self, ascending=True):
+        self.__sign = -1 if ascending else 1    # 上行时楼层从小到大停靠, 下行时从大到小
+        self.__keys = []                        # sign * 楼层, 升序
+        self.__floors = set()
+
+    def __len__(self):
+        return len(self.__keys)
+
+    def __contains__(self, floor):
+        return floor in self.__floors
+
+    # 按停靠顺序遍历
+    def __iter__(self):
+        sign = self.__sign
+        return (sign * key for key in reversed(self.__keys))
+
+    # 加入一个停靠楼层, 已存在时返回False
+    def add(self, floor):
+        if floor in self.__floors:
+            return False
+        self.__floors.add(floor)
+        insort(self.__keys, self.__sign * floor)
+        return True
+
+    # 下一个停靠楼层
+    def next_stop(self):
+        return self.__sign * self.__keys[-1]
+
+    # 本次扫描最远的停靠楼层
+    def last_stop(self):
+        return self.__sign * self.__keys[0]
+
+    def pop_next(self):
+        floor = self.__sign * self.__keys.pop()
+        self.__floors.discard(floor)
+        return floor
+
+    def clear(self):
+        self.__keys.clear()
+        self.__floors.clear()
@@ -0,0 +1,105 @@
+import struct
+import time
+from collections import namedtuple
+
+# 按钮事件的二进制日志
+# 文件头为 MAGIC + 版本号 + 电梯数量(uint32) + 楼层数(uint32), 之后每个事件固定 17 字节(小端):
+#   时间(毫秒, uint64, 从开始记录算起) 事件类型(uint8) 参数(int32) 楼层(int32)
+# 参数: 外部按钮为方向(1 上, -1 下), 其余为电梯编号; 产生随机任务时楼层记为任务数量
+# 旧版本仍然可以读取: 版本1的楼层为 int16, 任务数量超过 32767 时无法记录; 版本1、2的文件头没有楼的大小;
+# 版本1-3的参数为 int8, 电梯编号超过 127 时无法记录, 时间为 uint32, 记录超过 49 天后溢出; 版本3的楼的大小为 uint16
+MAGIC = b'ELVT'
+VERSION = 4
+HEADER = struct.Struct('<4sB')
+BUILDING = struct.Struct('<II')
+RECORD = struct.Struct('<QBii')
+BUILDINGS = {3: struct.Struct('<HH'), 4: BUILDING}     # 版本号 -> 楼的大小的格式, 版本1、2没有
+RECORDS = {                                             # 版本号 -> 事件记录的格式
+    1: struct.Struct('<IBbh'),
+    2: struct.Struct('<IBbi'),
+    3: struct.Struct('<IBbi'),
+    4: RECORD,
+}
+
+# 事件类型
+OUTER = 0           # 外部按钮 (方向, 楼层)
+INNER = 1           # 电梯内楼层按钮 (电梯编号, 楼层)
+OPEN = 2            # 开门按钮 (电梯编号)
+CLOSE = 3           # 关门按钮 (电梯编号)
+FAULT = 4           # 故障按钮, 故障和恢复都是这一个按钮 (电梯编号)
+GENERATE = 5        # 产生随机任务 (数量), 只作标记, 产生的每个按钮事件会单独记录
+
+TraceEvent = namedtuple('TraceEvent', ['time', 'kind', 'arg', 'floor'])
+# 读出的日志: 记录时的电梯数量和楼层数(旧版本的日志为 None), 以及按时间排列的事件
+Trace = namedtuple('Trace', ['elevator_nums', 'floors', 'events'])
+
+
+# 追加写入按钮事件; 事件先攒在内存中, 满 flush_size 字节或关闭时才写文件, 界面线程上的开销只有一次打包
+# elevator_nums 和 floors 为记录时楼的大小, 回放时按它创建电梯
+class TraceRecorder:
+    def __init__(self, path, elevator_nums, floors, clock=None, flush_size=4096):
+        self.path = path
+        self.flush_size = flush_size
+        self.__file = open(path, 'wb')
+        self.__file.write(HEADER.pack(MAGIC, VERSION) + BUILDING.pack(elevator_nums, floors))
+        self.__buffer = bytearray()
+        if clock is None:
+            start = time.monotonic()
+            clock = lambda: (time.monotonic() - start) * 1000
+        self.clock = clock
+
+    def record(self, kind, arg=0, floor=0):
+        self.__buffer += RECORD.pack(int(self.clock()), kind, arg, floor)
+        if len(self.__buffer) >= self.flush_size:
+            self.flush()
+
+    def outer(self, floor, move_state):
+        self.record(OUTER, move_state.value, floor)
+
+    def inner(self, elevator_id, floor):
+        self.record(INNER, elevator_id, floor)
+
+    def open_door(self, elevator_id):
+        self.record(OPEN, elevator_id)
+
+    def close_door(self, elevator_id):
+        self.record(CLOSE, elevator_id)
+
+    def fault(self, elevator_id):
+        self.record(FAULT, elevator_id)
+
+    def generate(self, count):
+        self.record(GENERATE, 0, count)
+
+    def flush(self):
+        if self.__buffer:
+            self.__file.write(self.__buffer)
+            self.__buffer.clear()
+        self.__file.flush()
+
+    def close(self):
+        if not self.__file.closed:
+            self.flush()
+            self.__file.close()
+
+
+# 读取整个日志, 返回 Trace; 末尾不完整的记录(程序异常退出时)被忽略
+def read_trace(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError("Not a trace file: %s" % path)
+    magic, version = HEADER.unpack_from(data)
+    if magic != MAGIC or version not in RECORDS:
+        raise ValueError("Not a trace file: %s" % path)
+    elevator_nums = floors = None
+    start = HEADER.size
+    if version in BUILDINGS:
+        building = BUILDINGS[version]
+        if len(data) < start + building.size:
+            raise ValueError("Not a trace file: %s" % path)
+        elevator_nums, floors = building.unpack_from(data, start)
+        start += building.size
+    record = RECORDS[version]
+    end = start + (len(data) - start) // record.size * record.size
+    return Trace(elevator_nums, floors, [TraceEvent(*fields) for fields in record.iter_unpack(data[start:end])])
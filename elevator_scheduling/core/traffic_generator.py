@@ -0,0 +1,122 @@
+from .constants import FLOORS
+
+DAY = 24 * 3600 * 1000
+HOUR = 3600 * 1000
+LOBBY = 1
+
+
+# 起止楼层矩阵(OD 矩阵): 第 i 行第 j 列为每分钟从 i+1 楼去 j+1 楼的乘客数, 对角线为 0
+# 下面三种基本矩阵的总和都是 1, 按比例组合成各种流量模式
+def lobby_out_matrix(floors):
+    import numpy as np
+
+    matrix = np.zeros((floors, floors))
+    matrix[LOBBY - 1, :] = 1.0
+    matrix[LOBBY - 1, LOBBY - 1] = 0.0
+    return matrix / matrix.sum()
+
+
+def lobby_in_matrix(floors):
+    return lobby_out_matrix(floors).T.copy()
+
+
+def inter_floor_matrix(floors):
+    import numpy as np
+
+    matrix = np.ones((floors, floors))
+    np.fill_diagonal(matrix, 0.0)
+    return matrix / matrix.sum()
+
+
+# 名字 -> [(比例, 基本矩阵)], 比例与 benchmarks.traffic 中的流量模式相同
+OD_PATTERNS = {
+    'up_peak': [(0.85, lobby_out_matrix), (0.10, inter_floor_matrix), (0.05, lobby_in_matrix)],
+    'down_peak': [(0.85, lobby_in_matrix), (0.10, inter_floor_matrix), (0.05, lobby_out_matrix)],
+    'lunch': [(0.45, lobby_in_matrix), (0.45, lobby_out_matrix), (0.10, inter_floor_matrix)],
+    'uniform': [(1.0, inter_floor_matrix)],
+}
+
+
+# rate 为每分钟到达的乘客总数
+def od_matrix(pattern, floors=FLOORS, rate=6):
+    if pattern not in OD_PATTERNS:
+        raise ValueError("Unknown traffic pattern: %s" % pattern)
+    return sum(share * base(floors) for share, base in OD_PATTERNS[pattern]) * rate
+
+
+# 办公楼的一天: 早高峰、午餐、晚高峰, 其余时间为较低的层间流量; rate 为高峰时每分钟的乘客数
+def office_day(floors=FLOORS, rate=12):
+    return [
+        (0, od_matrix('uniform', floors, rate * 0.1)),
+        (7.5 * HOUR, od_matrix('up_peak', floors, rate)),
+        (9.5 * HOUR, od_matrix('uniform', floors, rate * 0.4)),
+        (11.75 * HOUR, od_matrix('lunch', floors, rate * 0.8)),
+        (13.5 * HOUR, od_matrix('uniform', floors, rate * 0.4)),
+        (17 * HOUR, od_matrix('down_peak', floors, rate)),
+        (19 * HOUR, od_matrix('uniform', floors, rate * 0.1)),
+    ]
+
+
+# 流量的名字: OD_PATTERNS 中的模式(全天同一个矩阵)或 office_day
+def traffic_schedule(name, floors=FLOORS, rate=None):
+    if name == 'office_day':
+        return office_day(floors, rate if rate is not None else 12)
+    return [(0, od_matrix(name, floors, rate if rate is not None else 6))]
+
+
+# 按时段变化的泊松流量: schedule 为 [(开始时间(毫秒), OD 矩阵)], 按开始时间排序, 每个 period 毫秒重复一次
+# 每个 (出发楼层, 目的楼层) 是一个独立的泊松过程, 一段时间内的到达数一次性按矩阵抽样, 不逐个生成乘客
+# 相同的种子和相同的 generate 调用序列总是给出相同的乘客
+# generate 和 sample 各用一个由种子派生的随机数生成器: 流量生成线程调用 generate, 界面线程调用 sample,
+# NumPy 的生成器不是线程安全的, 分开后两边互不影响, 各自的结果仍然只由种子和自己的调用序列决定
+class TrafficGenerator:
+    def __init__(self, schedule, floors=FLOORS, seed=0, period=DAY):
+        import numpy as np
+
+        if not schedule or schedule[0][0] != 0:
+            raise ValueError("Invalid traffic schedule: must start at time 0")
+        self.floors = floors
+        self.period = period
+        self.starts = [start for start, _ in schedule]
+        self.matrices = [np.asarray(matrix, dtype=float) for _, matrix in schedule]
+        for matrix in self.matrices:
+            if matrix.shape != (floors, floors):
+                raise ValueError("Invalid OD matrix shape: %s" % (matrix.shape,))
+        generate_seed, sample_seed = np.random.SeedSequence(seed).spawn(2)
+        self.rng = np.random.default_rng(generate_seed)
+        self.sample_rng = np.random.default_rng(sample_seed)
+
+    # 时刻 now 所在时段的编号和该时段的结束时间
+    def segment(self, now):
+        offset = now % self.period
+        index = 0
+        while index + 1 < len(self.starts) and self.starts[index + 1] <= offset:
+            index += 1
+        end = self.starts[index + 1] if index + 1 < len(self.starts) else self.period
+        return index, now - offset + end
+
+    # [start, end) 内到达的乘客, 返回按时间排序的 (到达时间, 出发楼层, 目的楼层) 三个数组
+    def generate(self, start, end):
+        import numpy as np
+
+        chunks = []
+        while start < end:
+            index, segment_end = self.segment(start)
+            stop = min(end, segment_end)
+            counts = self.rng.poisson(self.matrices[index] * ((stop - start) / 60000))
+            pairs = np.repeat(np.arange(self.floors * self.floors), counts.ravel())
+            chunks.append((start + self.rng.random(len(pairs)) * (stop - start), pairs))
+            start = stop
+        times = np.concatenate([chunk[0] for chunk in chunks]) if chunks else np.empty(0)
+        pairs = np.concatenate([chunk[1] for chunk in chunks]) if chunks else np.empty(0, dtype=np.int64)
+        order = np.argsort(times, kind='stable')
+        pairs = pairs[order]
+        return times[order], pairs // self.floors + 1, pairs % self.floors + 1
+
+    # 按时刻 now 的 OD 矩阵的比例一次抽出 count 名乘客(不按时间分布), 界面的"产生随机任务"使用
+    def sample(self, count, now=0):
+        matrix = self.matrices[self.segment(now)[0]].ravel()
+        if count <= 0 or not matrix.any():
+            return self.generate(0, 0)[1:]
+        pairs = self.sample_rng.choice(len(matrix), size=count, p=matrix / matrix.sum())
+        return pairs // self.floors + 1, pairs % self.floors + 1
@@ -1,37 +1,67 @@
+import math
+import time
 from PyQt5.QtCore import QThread
-from utils.constants import ELEVATOR_STATUS, MOVING_STATUS, TIME_ATOMIC_MOVE,\
-    OUTER_TASK_STATUS
+from core.constants import ELEVATOR_STATUS, MOVING_STATUS, TIME_ATOMIC_MOVE, TIME_DOOR_OP, TIME_STAY_OPEN
+from utils import global_vars
 from utils.global_vars import (
-    mutex, elevator_status, elevator_current_floor, elevator_move_status,
-    remaining_up_task, remaining_down_task, open_button_clicked, close_button_clicked,
-    door_open_status, outer_request
+    elevators, elevator_mutex, elevator_wakeup, outer_request, task_arrived, snapshots, wait_condition
 )
 
 # 处理电梯的操作
+# 只持有本电梯自己的锁, 需要访问外部请求时先释放本电梯的锁
 class Elevator(QThread):
     def __init__(self, elevator_id):
         super().__init__()                  # 父类构造函数
         self.elevator_id = elevator_id      # 电梯编号
-        self.rest_time = 10                 # 时间间隔
+        self.state = elevators[elevator_id]
+        self.mutex = elevator_mutex[elevator_id]
+        self.wakeup = elevator_wakeup[elevator_id]
+        self.request_mutex = global_vars.request_mutex
+        self.metrics = global_vars.metrics
+        self.tick_name = 'tick_latency.%d' % elevator_id
+
+    # 发布本电梯的状态快照供界面读取, 调用时持有本电梯的锁
+    def publish(self):
+        snapshots.publish(self.elevator_id, self.state)
+
+    # 释放本电梯的锁, 释放前先发布状态快照
+    def release(self):
+        self.publish()
+        self.mutex.unlock()
+
+    # 单调时钟(毫秒)
+    @staticmethod
+    def clock():
+        return time.monotonic() * 1000
+
+    # 阻塞到截止时间, 或者被故障、开关门按钮、新任务提前唤醒; 调用时持有本电梯的锁
+    # 每次状态转换只等待一次, 不再每10ms轮询; 启用运行指标时记录醒来比截止时间晚了多少
+    def wait_until(self, deadline):
+        remaining = deadline - self.clock()
+        if remaining > 0:
+            self.publish()
+            wait_condition(self.wakeup, self.mutex, math.ceil(remaining))
+            if self.metrics is not None:
+                late = self.clock() - deadline
+                if late >= 0:
+                    self.metrics.record(self.tick_name, late)
 
     def update_elevator_status(self, move_state):
         if move_state == MOVING_STATUS.up:
-            elevator_status[self.elevator_id] = ELEVATOR_STATUS.moving_up
+            self.state.status = ELEVATOR_STATUS.moving_up
         elif move_state == MOVING_STATUS.down:
-            elevator_status[self.elevator_id] = ELEVATOR_STATUS.moving_down
+            self.state.status = ELEVATOR_STATUS.moving_down
 
-    # 检查故障 若故障返回False 若正常返回True
+    # 移动一层的过程中检查故障 若故障返回False 若正常返回True
     def check_for_faults(self):
-        slept_time = 0
-        while slept_time != TIME_ATOMIC_MOVE:
-            mutex.unlock()
-            self.msleep(self.rest_time)
-            slept_time += self.rest_time
-            mutex.lock()
-            if elevator_status[self.elevator_id] == ELEVATOR_STATUS.break_down:
+        deadline = self.clock() + TIME_ATOMIC_MOVE
+        while True:
+            if self.state.status == ELEVATOR_STATUS.break_down:
                 self.handle_fault()
                 return False
-        return True
+            if self.clock() >= deadline:
+                return True
+            self.wait_until(deadline)
 
     def update_current_floor(self, move_state):
         if move_state == MOVING_STATUS.up:
@@ -40,8 +70,8 @@ class Elevator(QThread):
             direction = -1
         else:
             direction = 0
-        elevator_current_floor[self.elevator_id] += direction
-        elevator_status[self.elevator_id] = ELEVATOR_STATUS.normal
+        self.state.current_floor += direction
+        self.state.status = ELEVATOR_STATUS.normal
 
     def atomic_move(self, move_state):
         self.update_elevator_status(move_state)
@@ -51,134 +81,162 @@ class Elevator(QThread):
         self.update_current_floor(move_state)
 
     # 一次门的操作 包括开门和关门
+    # deadline 为当前门状态结束的时间, 开关门按钮会重新计算它; 门的进度按经过的时间计算
     def door_operation(self):
-        from utils.constants import TIME_DOOR_OP, TIME_STAY_OPEN
-        
-        opening_time = 0.0  # 记录门打开所需的累积时间
-        open_time = 0.0     # 记录门保持开启的累积时间
-        elevator_status[self.elevator_id] = ELEVATOR_STATUS.door_openning  # 初始设置为门正在打开
+        state = self.state
+        state.status = ELEVATOR_STATUS.door_openning  # 初始设置为门正在打开
+        state.door_open_status = 0.0
+        since = self.clock()                # 门的进度最近一次更新的时间
+        deadline = since + TIME_DOOR_OP
 
         while True:
             # 检查电梯是否处于故障状态
-            if elevator_status[self.elevator_id] == ELEVATOR_STATUS.break_down:
+            if state.status == ELEVATOR_STATUS.break_down:
                 self.handle_fault()  # 处理故障
                 break
 
+            # 更新门的进度
+            now = self.clock()
+            if state.status == ELEVATOR_STATUS.door_openning:
+                state.door_open_status = min(1.0, state.door_open_status + (now - since) / TIME_DOOR_OP)
+            elif state.status == ELEVATOR_STATUS.door_closing:
+                state.door_open_status = max(0.0, state.door_open_status - (now - since) / TIME_DOOR_OP)
+            since = now
+
             # 处理开门请求
-            if open_button_clicked[self.elevator_id]:
-                if elevator_status[self.elevator_id] == ELEVATOR_STATUS.door_closing:
-                    elevator_status[self.elevator_id] = ELEVATOR_STATUS.door_openning
-                if elevator_status[self.elevator_id] == ELEVATOR_STATUS.door_open:
-                    open_time = 0
+            if state.open_button_clicked:
+                if state.status == ELEVATOR_STATUS.door_closing:
+                    state.status = ELEVATOR_STATUS.door_openning
+                    deadline = now + (1.0 - state.door_open_status) * TIME_DOOR_OP
+                elif state.status == ELEVATOR_STATUS.door_open:
+                    deadline = now + TIME_STAY_OPEN
 
                 # 重置开门按钮状态
-                open_button_clicked[self.elevator_id] = False
+                state.open_button_clicked = False
 
             # 处理关门请求
-            if close_button_clicked[self.elevator_id]:
-                elevator_status[self.elevator_id] = ELEVATOR_STATUS.door_closing  # 设置为门正在关闭
-                open_time = 0  # 重置门开启时间
-
-                close_button_clicked[self.elevator_id] = False
-
-            # 开门过程的逻辑
-            if elevator_status[self.elevator_id] == ELEVATOR_STATUS.door_openning:
-                mutex.unlock()  # 允许其他线程运行
-                self.msleep(self.rest_time)  # 等待一个时间段
-                mutex.lock()  # 重新锁定
-                opening_time += self.rest_time
-                door_open_status[self.elevator_id] = opening_time / TIME_DOOR_OP  # 更新打开进度
-
-                # 如果完全打开（根据openning_time)
-                if opening_time >= TIME_DOOR_OP:
-                    elevator_status[self.elevator_id] = ELEVATOR_STATUS.door_open
-
-            # 门已经完全开启的处理
-            elif elevator_status[self.elevator_id] == ELEVATOR_STATUS.door_open:
-                mutex.unlock()
-                self.msleep(self.rest_time)
-                mutex.lock()
-                open_time += self.rest_time
-                if open_time >= TIME_STAY_OPEN:
-                    elevator_status[self.elevator_id] = ELEVATOR_STATUS.door_closing  # 时间到，开始关门
-
-            # 关门过程的逻辑
-            elif elevator_status[self.elevator_id] == ELEVATOR_STATUS.door_closing:
-                mutex.unlock()
-                self.msleep(self.rest_time)
-                mutex.lock()
-                opening_time -= self.rest_time
-                door_open_status[self.elevator_id] = opening_time / TIME_DOOR_OP  # 更新关闭进度
-
-                # 门完全关闭
-                if opening_time <= 0:
-                    elevator_status[self.elevator_id] = ELEVATOR_STATUS.normal
-                    break
+            if state.close_button_clicked:
+                state.status = ELEVATOR_STATUS.door_closing  # 设置为门正在关闭
+                deadline = now + state.door_open_status * TIME_DOOR_OP
+
+                state.close_button_clicked = False
+
+            if now < deadline:
+                self.wait_until(deadline)
+            # 门完全打开
+            elif state.status == ELEVATOR_STATUS.door_openning:
+                state.status = ELEVATOR_STATUS.door_open
+                state.door_open_status = 1.0
+                deadline += TIME_STAY_OPEN
+                if self.metrics is not None:
+                    self.metrics.door_opened(self.elevator_id, state.current_floor)
+            # 门已经完全开启, 时间到，开始关门
+            elif state.status == ELEVATOR_STATUS.door_open:
+                state.status = ELEVATOR_STATUS.door_closing
+                deadline += TIME_DOOR_OP
+            # 门完全关闭
+            else:
+                state.door_open_status = 0.0
+                state.status = ELEVATOR_STATUS.normal
+                break
 
     # 当故障发生时 清除原先的所有任务
     def handle_fault(self):
-        from utils.constants import OUTER_TASK_STATUS
-        
-        elevator_status[self.elevator_id] = ELEVATOR_STATUS.break_down
-        door_open_status[self.elevator_id] = 0.0
-        open_button_clicked[self.elevator_id] = False
-        close_button_clicked[self.elevator_id] = False
-        elevator_status[self.elevator_id] = ELEVATOR_STATUS.break_down
-        # 遍历所有外部按钮任务
-        for outer_task in outer_request:
-            # 检查任务是否处于等待状态
-            if outer_task.state == OUTER_TASK_STATUS.waiting:
-                # 如果任务目标楼层在上行或下行任务列表中，将其状态设置为未分配
-                if outer_task.target in remaining_up_task[self.elevator_id] or outer_task.target in remaining_down_task[self.elevator_id]:
-                    outer_task.state = OUTER_TASK_STATUS.unassigned  # 使这些任务可被重新分配
-        # 清空当前电梯的上行任务列表
-        remaining_up_task[self.elevator_id] = []
-        # 清空当前电梯的下行任务列表
-        remaining_down_task[self.elevator_id] = []
+        state = self.state
+        state.status = ELEVATOR_STATUS.break_down
+        state.door_open_status = 0.0
+        state.open_button_clicked = False
+        state.close_button_clicked = False
+        # 清空当前电梯的上行和下行任务列表
+        state.remaining_up_task.clear()
+        state.remaining_down_task.clear()
+
+        # 按加锁顺序, 先释放本电梯的锁再访问外部请求
+        self.release()
+        self.request_mutex.lock()
+        # 只把分配给本电梯的外部任务设为未分配, 调度线程被唤醒后一次性重新分配
+        if outer_request.release_elevator(self.elevator_id):
+            task_arrived.wakeAll()
+        self.request_mutex.unlock()
+        self.mutex.lock()
+
+    # 完成当前楼层的外部任务
+    def finish_outer_tasks(self):
+        floor = self.state.current_floor
+        self.release()
+        self.request_mutex.lock()
+        outer_request.finish_floor(floor)
+        if self.metrics is not None:
+            self.metrics.door_closed(floor)
+        # 匹配分配时可能有任务因容量不足而留待下一轮
+        if outer_request.has_unassigned():
+            task_arrived.wakeAll()
+        self.request_mutex.unlock()
+        self.mutex.lock()
 
     def run(self):
+        state = self.state
+        wakeup = self.wakeup
         while True:
-            mutex.lock()
+            self.mutex.lock()
             # 检查电梯是否处于故障状态
-            if elevator_status[self.elevator_id] == ELEVATOR_STATUS.break_down:
+            if state.status == ELEVATOR_STATUS.break_down:
                 self.handle_fault()
-                mutex.unlock()
+                if state.status == ELEVATOR_STATUS.break_down:
+                    self.publish()
+                    wait_condition(wakeup, self.mutex)  # 等待故障解除
+                self.release()
                 continue
 
+            acted = False  # 本轮是否有动作, 没有则阻塞等待新任务
             # 移动状态为up时
-            if elevator_move_status[self.elevator_id] == MOVING_STATUS.up:
+            if state.move_status == MOVING_STATUS.up:
                 # 检查处理上行任务
-                if remaining_up_task[self.elevator_id]:
-                    next_floor = remaining_up_task[self.elevator_id][0]
-                    if next_floor == elevator_current_floor[self.elevator_id]:
+                if state.remaining_up_task:
+                    next_floor = state.remaining_up_task.next_stop()
+                    if next_floor == state.current_floor:
+                        acted = True
                         self.door_operation()  # 开关门
-                        if remaining_up_task[self.elevator_id]:
-                            remaining_up_task[self.elevator_id].pop(0)
-                            for outer_task in outer_request:
-                                if outer_task.target == elevator_current_floor[self.elevator_id]:
-                                    outer_task.state = OUTER_TASK_STATUS.finished
-                    elif next_floor > elevator_current_floor[self.elevator_id]:
+                        if state.remaining_up_task:
+                            state.remaining_up_task.pop_next()
+                            self.finish_outer_tasks()
+                    elif next_floor > state.current_floor:
+                        acted = True
                         self.atomic_move(MOVING_STATUS.up)
+                    else:
+                        # 停靠楼层已在身后(电梯刚离开该层时分配到的任务), 改到下行扫描中处理
+                        acted = True
+                        state.remaining_down_task.add(state.remaining_up_task.pop_next())
 
                 # 如果没有上行任务但有下行任务，更改移动状态为下行
-                elif not remaining_up_task[self.elevator_id] and remaining_down_task[self.elevator_id]:
-                    elevator_move_status[self.elevator_id] = MOVING_STATUS.down
+                elif not state.remaining_up_task and state.remaining_down_task:
+                    acted = True
+                    state.move_status = MOVING_STATUS.down
 
             # 处理向下移动状态
-            elif elevator_move_status[self.elevator_id] == MOVING_STATUS.down:
-                if remaining_down_task[self.elevator_id]:
-                    next_floor = remaining_down_task[self.elevator_id][0]
-                    if next_floor == elevator_current_floor[self.elevator_id]:
+            elif state.move_status == MOVING_STATUS.down:
+                if state.remaining_down_task:
+                    next_floor = state.remaining_down_task.next_stop()
+                    if next_floor == state.current_floor:
+                        acted = True
                         self.door_operation()  # 开关门
-                        remaining_down_task[self.elevator_id].pop(0)
-                        for outer_task in outer_request:
-                            if outer_task.target == elevator_current_floor[self.elevator_id]:
-                                outer_task.state = OUTER_TASK_STATUS.finished
-                    elif next_floor < elevator_current_floor[self.elevator_id]:
+                        if state.remaining_down_task:
+                            state.remaining_down_task.pop_next()
+                            self.finish_outer_tasks()
+                    elif next_floor < state.current_floor:
+                        acted = True
                         self.atomic_move(MOVING_STATUS.down)
+                    else:
+                        # 停靠楼层已在身后, 改到上行扫描中处理
+                        acted = True
+                        state.remaining_up_task.add(state.remaining_down_task.pop_next())
 
                 # 如果没有下行任务但有上行任务，更改移动状态为上行
-                elif not remaining_down_task[self.elevator_id] and remaining_up_task[self.elevator_id]:
-                    elevator_move_status[self.elevator_id] = MOVING_STATUS.up
-
-            mutex.unlock()
\ No newline at end of file
+                elif not state.remaining_down_task and state.remaining_up_task:
+                    acted = True
+                    state.move_status = MOVING_STATUS.up
+
+            if not acted:
+                self.publish()
+                wait_condition(wakeup, self.mutex)  # 空闲时阻塞, 不再空转
+            self.release()
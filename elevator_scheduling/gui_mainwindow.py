@@ -1,34 +1,86 @@
-import random
+import math
 from functools import partial
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QTimer, QElapsedTimer, QRect
+from PyQt5.QtGui import QFontDatabase, QIntValidator
 from PyQt5.QtWidgets import (
     QWidget, QPushButton, QLabel, QTextEdit, 
-    QVBoxLayout, QHBoxLayout, QLCDNumber, QLineEdit
+    QVBoxLayout, QHBoxLayout, QLCDNumber, QLineEdit, QScrollArea
 )
-from utils.constants import (
-    WINDOW_SIZE, ELEVATOR_NUMS, FLOORS, ELEVATOR_STATUS, MOVING_STATUS, OUTER_TASK_STATUS
+from core.constants import (
+    ELEVATOR_NUMS, FLOORS, ELEVATOR_STATUS, MOVING_STATUS
 )
+from utils import global_vars
 from utils.global_vars import (
-    mutex, elevator_status, elevator_current_floor,
-    remaining_up_task, remaining_down_task, open_button_clicked, 
-    close_button_clicked, elevator_door,
-    outer_request
+    elevators, elevator_mutex, elevator_wakeup, elevator_door,
+    outer_request, task_arrived, snapshots
 )
-from utils.requests import OUTER_BUTTON_GENERATE_TASK
+from core.requests import OUTER_BUTTON_GENERATE_TASK
+from core import trace
+from core.traffic_generator import TrafficGenerator, traffic_schedule
+from core import event_log
+from core.event_log import EventLog
+from traffic_feeder import TrafficFeeder
+from log_view import EventLogView
+
+# 窗口大小设置
+WINDOW_SIZE = QRect(150, 50, 600, 450)
+
+# 预先构造好的样式表, 界面刷新时只在控件的样式需要改变时才设置
+FLOOR_BUTTON_STYLE = ("background-color : rgb(255,255,255);""border-style: solid;"
+                      "border-width: 1px;"
+                      "border-color:  rgb(100,200,160);"
+                      "border-radius:3px;"
+                      "color:black;")
+FLOOR_BUTTON_PRESSED_STYLE = "background-color : rgb(192, 192, 192);"
+FLOOR_BUTTON_BROKEN_STYLE = "background-color :gray;""border-radius:10px;"
+DOOR_BUTTON_STYLE = ("background-color :rgb(237,220,195);""border-style: solid;"
+                     "border-width: 2px;"
+                     "border-color: rgb(192, 192, 192);"
+                     "border-radius:10px;"
+                     "color:black;")
+DOOR_BUTTON_PRESSED_STYLE = "background-color : rgb(192, 192, 192)"
+BROKEN_STYLE = "background-color : gray;"
+DEFAULT_STYLE = "background-color : None"
+OUTER_BUTTON_PRESSED_STYLE = "background-color : yellow"
+OUTER_BUTTON_WAITING_STYLE = "background-color : rgb(192, 192, 192);"
+# 电梯门的四块, 开门时两侧露出灰色, 中间两扇门向两边移开
+DOOR_OPEN_STYLES = ('background-color: gray;', 'background-color: black; margin-right: 20px;',
+                    'background-color: black; margin-left: 20px;', 'background-color: gray;')
+DOOR_CLOSED_STYLES = ('background-color: transparent;', 'background-color: black; margin: 0px;',
+                      'background-color: black; margin: 0px;', 'background-color: transparent;')
 
 # 可视化界面
+# recorder 为 core.trace.TraceRecorder, 不为 None 时记录所有按钮事件
+# feeder 为 traffic_feeder.TrafficFeeder, "产生随机任务"和持续流量的乘客都经由它进入系统, 默认为均匀的层间流量
+# log 为 core.event_log.EventLog, 运行信息记录在其中, 由 EventLogView 每帧刷新一次显示
+# 启用运行指标(global_vars.metrics)时在运行信息下方显示实时指标面板
 class UI_MainWindow(QWidget):
-    def __init__(self):
+    def __init__(self, recorder=None, feeder=None, log=None):
         super().__init__()
-        self.output = None
+        self.log = log if log is not None else EventLog()
+        self.output = None  # 运行信息视图
+        self.recorder = recorder
+        if feeder is None:
+            floors = global_vars.floors
+            feeder = TrafficFeeder(TrafficGenerator(traffic_schedule('uniform', floors), floors), recorder)
+        self.feeder = feeder
+        self.feeder_timer = QTimer()  # 把乘客交给电梯系统的定时器
+        self.metrics = global_vars.metrics
+        self.metrics_panel = None  # 实时指标面板
+        self.metrics_timer = None  # 刷新指标面板的定时器
+        self.replay_timer = None  # 回放按钮事件日志的定时器
         # 初始化各类按钮和显示设备
+        self.floors = global_vars.floors  # 楼层数, 由 init_global_vars 设置
         self.__elevator_lcds = []  # 电梯内的楼层显示屏
-        self.__inner_floor_buttons = []  # 电梯内的楼层按钮
+        self.__inner_floor_buttons = []  # 电梯内的楼层按钮, 第 floor - 1 个为 floor 楼的按钮
         self.__inner_open_door_buttons = []  # 电梯内的开门按钮
         self.__inner_close_door_buttons = []  # 电梯内的关门按钮
-        self.__outer_up_buttons = []  # 每层楼中的上行按钮
-        self.__outer_down_buttons = []  # 每层楼中的下行按钮
+        self.__outer_up_buttons = []  # 每层楼中的上行按钮, 第 floor - 1 个为 floor 楼的按钮, 顶楼为 None
+        self.__outer_down_buttons = []  # 每层楼中的下行按钮, 第 floor - 1 个为 floor 楼的按钮, 1楼为 None
         self.__inner_fault_buttons = []  # 电梯内部的故障按钮
+        self.__styles = {}  # 控件 -> 最近一次设置的样式表
+        self.__lcd_floors = []  # 每个显示屏最近一次显示的楼层
+        self.__lit_outer_requests = set()  # 最近一次显示为等待中的外部按钮 (楼层, 方向)
         self.timer = QTimer()  # 主定时器，用于UI更新
         self.door_timer = []  # 门的计时器列表
         self.setup_ui()  # 初始化UI界面
@@ -52,6 +104,8 @@ class UI_MainWindow(QWidget):
         v1.addWidget(input_prompt)
         self.get_input_number = QLineEdit()
         self.get_input_number.setStyleSheet("font-size:40px;""font-weight:bold;")
+        # 任务数量记录在按钮事件日志的 int32 字段中
+        self.get_input_number.setValidator(QIntValidator(0, 2 ** 31 - 1))
         v1.addWidget(self.get_input_number)
         generate_random_task_button = QPushButton()
         generate_random_task_button.setText("产生随机任务")
@@ -64,24 +118,45 @@ class UI_MainWindow(QWidget):
         v1.addWidget(generate_random_task_button)
 
         # 输出电梯信息
-        self.output = QTextEdit()
-        self.output.setText("系统运行信息：\n")
+        v1.addWidget(QLabel("系统运行信息："))
+        self.output = EventLogView(self.log)
         v1.addWidget(self.output)
+        # 启用运行指标时显示实时指标面板, 每秒刷新一次
+        if self.metrics is not None:
+            self.metrics_panel = QTextEdit()
+            self.metrics_panel.setReadOnly(True)
+            self.metrics_panel.setLineWrapMode(QTextEdit.NoWrap)
+            self.metrics_panel.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+            v1.addWidget(self.metrics_panel)
+            self.metrics_timer = QTimer()
+            self.metrics_timer.setInterval(1000)
+            self.metrics_timer.timeout.connect(self.update_metrics)
+            self.metrics_timer.start()
         h2 = QHBoxLayout()
-        h1.addLayout(h2)
+        # 比默认更大的楼栋放进滚动区域, 默认大小时保持原有布局
+        large = len(elevators) > ELEVATOR_NUMS or self.floors > FLOORS
+        if large:
+            h1.addWidget(self.scroll_area(h2))
+        else:
+            h1.addLayout(h2)
+
+        # 每列放10层的按钮, 默认20层时为原来的两列
+        columns = max(2, math.ceil(self.floors / 10))
+        per_column = math.ceil(self.floors / columns)
 
         # 对每一个电梯都进行相同的设置
-        for i in range(ELEVATOR_NUMS):
+        for i in range(len(elevators)):
             v2 = QVBoxLayout()  # 竖直布局
             h2.addLayout(v2)
 
             # 电梯上方的LCD显示屏
             floor_display = QLCDNumber()
-            floor_display.setNumDigits(2)
+            floor_display.setNumDigits(max(2, len(str(self.floors))))
             floor_display.setSegmentStyle(QLCDNumber.Flat)
             floor_display.setStyleSheet("color: rgb(0, 0, 0);")
             floor_display.setFixedSize(100, 50)
             self.__elevator_lcds.append(floor_display)
+            self.__lcd_floors.append(None)
             v2.addWidget(floor_display)
 
             # 添加文字提示
@@ -96,74 +171,43 @@ class UI_MainWindow(QWidget):
             v2.addWidget(fault_button)
 
             # 电梯内部按钮
-            self.__inner_floor_buttons.append([])
+            self.__inner_floor_buttons.append([None] * self.floors)
             elevator_button_layout = QHBoxLayout()
-            # 创建电梯按钮
-            button_group1 = QVBoxLayout()  # 前10层按钮
-            for j in range(1, int(FLOORS / 2 + 1)):
-                button = QPushButton(str(int(FLOORS / 2 + 1 - j)))
-                button.setFixedSize(25, 25)
-
-                # 绑定点击每一个楼层的按钮后的事件
-                button.clicked.connect(partial(self.__inner_num_button_clicked, i, int(FLOORS / 2 + 1 - j)))
-                button.setStyleSheet("background-color : rgb(255,255,255);""border-style: solid;"
-                                     "border-width: 1px;"
-                                     "border-color:  rgb(100,200,160);"
-                                     "border-radius:3px;"
-                                     "color:black;")
-                self.__inner_floor_buttons[i].append(button)
-                button_group1.addWidget(button)
-            button_group1.setSpacing(7)
-
-            # 开门按钮
-            open_button = QPushButton("开")
-            open_button.setFixedSize(25, 25)
-            open_button.clicked.connect(partial(self.__inner_open_button_clicked, i))
-            self.__inner_open_door_buttons.append(open_button)
-            open_button.setStyleSheet("background-color :rgb(237,220,195);""border-style: solid;"
-                                      "border-width: 2px;"
-                                      "border-color: rgb(192, 192, 192);"
-                                      "border-radius:10px;"
-                                      "color:black;")
-            button_group1.addWidget(open_button)
-
-            button_group2 = QVBoxLayout()  # 后10层按钮
-            for j in range(1, int(FLOORS / 2 + 1)):
-                button = QPushButton(str(FLOORS + 1 - j))
-                button.setFixedSize(25, 25)
-
-                # 绑定点击每一个楼层的按钮后的事件
-                button.clicked.connect(partial(self.__inner_num_button_clicked, i, FLOORS + 1 - j))
-                button.setStyleSheet("background-color : rgb(255,255,255);""border-style: solid;"
-                                     "border-width: 1px;"
-                                     "border-color:  rgb(100,200,160);"
-                                     "border-radius:3px;"
-                                     "color:black;")
-                self.__inner_floor_buttons[i].append(button)
-                button_group2.addWidget(button)
-            button_group2.setSpacing(7)
-
-
-            # 关门按钮
-            close_button = QPushButton("关")
-            close_button.setFixedSize(25, 25)
-            close_button.clicked.connect(partial(self.__inner_close_button_clicked, i))
-            close_button.setStyleSheet("background-color :rgb(237,220,195);""border-style: solid;"
-                                       "border-width: 2px;"
-                                       "border-color: rgb(192, 192, 192);"
-                                       "border-radius:10px;"
-                                       "color:black;")
-            self.__inner_close_door_buttons.append(close_button)
-            button_group2.addWidget(close_button)
-
-            button_group1_widget = QWidget()
-            button_group1_widget.setLayout(button_group1)
-            elevator_button_layout.addWidget(button_group1_widget)
-            elevator_button_layout
-
-            button_group2_widget = QWidget()
-            button_group2_widget.setLayout(button_group2)
-            elevator_button_layout.addWidget(button_group2_widget)
+            # 创建电梯按钮, 每列自上而下为从高到低的楼层
+            for column in range(columns):
+                button_group = QVBoxLayout()
+                lowest = column * per_column + 1
+                for floor in range(min(lowest + per_column - 1, self.floors), lowest - 1, -1):
+                    button = QPushButton(str(floor))
+                    button.setFixedSize(25, 25)
+
+                    # 绑定点击每一个楼层的按钮后的事件
+                    button.clicked.connect(partial(self.__inner_num_button_clicked, i, floor))
+                    self.set_style(button, FLOOR_BUTTON_STYLE)
+                    self.__inner_floor_buttons[i][floor - 1] = button
+                    button_group.addWidget(button)
+                button_group.setSpacing(7)
+
+                if column == 0:
+                    # 开门按钮
+                    open_button = QPushButton("开")
+                    open_button.setFixedSize(25, 25)
+                    open_button.clicked.connect(partial(self.__inner_open_button_clicked, i))
+                    self.__inner_open_door_buttons.append(open_button)
+                    self.set_style(open_button, DOOR_BUTTON_STYLE)
+                    button_group.addWidget(open_button)
+                elif column == columns - 1:
+                    # 关门按钮
+                    close_button = QPushButton("关")
+                    close_button.setFixedSize(25, 25)
+                    close_button.clicked.connect(partial(self.__inner_close_button_clicked, i))
+                    self.set_style(close_button, DOOR_BUTTON_STYLE)
+                    self.__inner_close_door_buttons.append(close_button)
+                    button_group.addWidget(close_button)
+
+                button_group_widget = QWidget()
+                button_group_widget.setLayout(button_group)
+                elevator_button_layout.addWidget(button_group_widget)
 
             elevator_button_layout_widget = QWidget()
             elevator_button_layout_widget.setLayout(elevator_button_layout)
@@ -186,10 +230,8 @@ class UI_MainWindow(QWidget):
                 door.append(button)
                 hbox1.addWidget(button)
             
-            door[0].setStyleSheet('background-color: transparent;')
-            door[1].setStyleSheet('background-color: black;')
-            door[2].setStyleSheet('background-color: black;')
-            door[3].setStyleSheet('background-color: transparent;')
+            for button, style in zip(door, DOOR_CLOSED_STYLES):
+                self.set_style(button, style)
             elevator_door.append(door)
 
             v2.addWidget(door_container)
@@ -206,49 +248,72 @@ class UI_MainWindow(QWidget):
             v2.setAlignment(Text1, Qt.AlignHCenter)
 
         v3 = QVBoxLayout()
-        h1.addLayout(v3)
+        if large:
+            h1.addWidget(self.scroll_area(v3))
+        else:
+            h1.addLayout(v3)
 
         outer_title = QLabel("电梯外按钮")
         v3.addWidget(outer_title)
         v3.setAlignment(outer_title, Qt.AlignHCenter)
 
-        for i in range(FLOORS):  # 对于每一层楼
+        self.__outer_up_buttons = [None] * self.floors
+        self.__outer_down_buttons = [None] * self.floors
+        for floor in range(self.floors, 0, -1):  # 对于每一层楼, 从顶楼开始
             h4 = QHBoxLayout()  # 创建一个水平布局
             v3.addLayout(h4)
-            label = QLabel(str(FLOORS - i))
+            label = QLabel(str(floor))
             h4.addWidget(label)
-            if i != 0:
-                # 给2楼到顶楼放置上行按钮
+            if floor != self.floors:
+                # 给1楼到顶楼往下一楼放置上行按钮
                 up_button = QPushButton("▲")
                 up_button.setFixedSize(25, 25)
                 up_button.clicked.connect(
-                    partial(self.__outer_button_clicked, FLOORS - i, MOVING_STATUS.up))
-                self.__outer_up_buttons.append(up_button)  # 从顶楼往下一楼开始..
+                    partial(self.__outer_button_clicked, floor, MOVING_STATUS.up))
+                self.set_style(up_button, DEFAULT_STYLE)
+                self.__outer_up_buttons[floor - 1] = up_button
                 h4.addWidget(up_button)
 
-            if i != FLOORS - 1:
-                # 给1楼到顶楼往下一楼放置下行按钮
+            if floor != 1:
+                # 给2楼到顶楼放置下行按钮
                 down_button = QPushButton("▼")
                 down_button.setFixedSize(25, 25)
                 down_button.clicked.connect(
-                    partial(self.__outer_button_clicked, FLOORS - i, MOVING_STATUS.down))
-                self.__outer_down_buttons.append(down_button)  # 从顶楼开始..到2楼
+                    partial(self.__outer_button_clicked, floor, MOVING_STATUS.down))
+                self.set_style(down_button, DEFAULT_STYLE)
+                self.__outer_down_buttons[floor - 1] = down_button
                 h4.addWidget(down_button)
 
         # 设置定时
         self.timer.setInterval(30)
         self.timer.timeout.connect(self.update)
         self.timer.start()
+        self.feeder_timer.setInterval(50)
+        self.feeder_timer.timeout.connect(self.feeder.drain)
+        self.feeder_timer.start()
 
         self.show()
 
 
+    # 把布局放进可以滚动的区域
+    def scroll_area(self, layout):
+        content = QWidget()
+        content.setLayout(layout)
+        area = QScrollArea()
+        area.setWidgetResizable(True)
+        area.setWidget(content)
+        return area
+
+    # 设置控件的样式表, 与上次设置的相同时跳过(解析样式表的开销很大)
+    def set_style(self, widget, style):
+        if self.__styles.get(widget) != style:
+            self.__styles[widget] = style
+            widget.setStyleSheet(style)
+
     # 开门
     def open_the_door(self, elevator_id, choice):
-        elevator_door[elevator_id][0].setStyleSheet('background-color: gray;')
-        elevator_door[elevator_id][1].setStyleSheet('background-color: black; margin-right: 20px;')
-        elevator_door[elevator_id][2].setStyleSheet('background-color: black; margin-left: 20px;')
-        elevator_door[elevator_id][3].setStyleSheet('background-color: gray;')
+        for button, style in zip(elevator_door[elevator_id], DOOR_OPEN_STYLES):
+            self.set_style(button, style)
 
         if choice:
             self.door_timer[elevator_id].setInterval(4000)
@@ -256,106 +321,108 @@ class UI_MainWindow(QWidget):
             self.door_timer[elevator_id].start()
     # 关门
     def close_the_door(self, elevator_id):
-            elevator_door[elevator_id][0].setStyleSheet('background-color: transparent;')
-            elevator_door[elevator_id][1].setStyleSheet('background-color: black; margin: 0px;')
-            elevator_door[elevator_id][2].setStyleSheet('background-color: black; margin: 0px;')
-            elevator_door[elevator_id][3].setStyleSheet('background-color: transparent;')
+        for button, style in zip(elevator_door[elevator_id], DOOR_CLOSED_STYLES):
+            self.set_style(button, style)
 
-    # 产生随机任务
+    # 产生随机任务: 一次放入若干名乘客, 由 feeder 在下一个定时周期成批交给电梯系统
     def __generate_tasks(self):
-        for i in range(int(self.get_input_number.text()) if self.get_input_number.text() else 0):
-            if random.randint(0, 100) < 50:  # 50% 产生外部任务
-                target = random.randint(1, FLOORS)
-                if target == 1:  # 1楼只能向上
-                    self.__outer_button_clicked(target, MOVING_STATUS.up)
-                elif target == FLOORS:  # 顶楼只能向下
-                    self.__outer_button_clicked(target, MOVING_STATUS.down)
-                else:  # 其余则随机指派方向
-                    self.__outer_button_clicked(target,
-                                                          random.choice([MOVING_STATUS.up, MOVING_STATUS.down]))
-            else:  # 产生内部任务
-                self.__inner_num_button_clicked(random.randint(0, ELEVATOR_NUMS - 1), random.randint(1, FLOORS))
+        count = int(self.get_input_number.text()) if self.get_input_number.text() else 0
+        if self.recorder is not None:
+            self.recorder.generate(count)
+        if count > 0:
+            self.feeder.burst(count)
+            self.log.add(event_log.TRAFFIC, "产生了" + str(count) + "名乘客")
 
  # 如果按的是电梯内部的数字按钮，则执行下面的函数进行处理
     def __inner_num_button_clicked(self, elevator_id, floor):
-        mutex.lock()
+        if self.recorder is not None:
+            self.recorder.inner(elevator_id, floor)
+        state = elevators[elevator_id]
+        elevator_mutex[elevator_id].lock()
         # 如果电梯出现故障
-        if elevator_status[elevator_id] == ELEVATOR_STATUS.break_down:
-            self.output.append(str(elevator_id) + "号电梯出现故障 正在维修!")
-            mutex.unlock()
+        if state.status == ELEVATOR_STATUS.break_down:
+            self.log.add(event_log.FAULT, str(elevator_id) + "号电梯出现故障 正在维修!", elevator_id)
+            elevator_mutex[elevator_id].unlock()
             return
 
         # 相同楼层不处理
-        if floor == elevator_current_floor[elevator_id]:
-            mutex.unlock()
+        if floor == state.current_floor:
+            elevator_mutex[elevator_id].unlock()
             return
 
-        if elevator_status[elevator_id] != ELEVATOR_STATUS.break_down:
-            if floor > elevator_current_floor[elevator_id] and floor not in remaining_up_task[elevator_id]:
-                remaining_up_task[elevator_id].append(floor)  # 将该楼添加到上行的目标楼层中
-                remaining_up_task[elevator_id].sort()  # 按照从小到大的顺序排序
-            elif floor < elevator_current_floor[elevator_id] and floor not in remaining_down_task[elevator_id]:
-                remaining_down_task[elevator_id].append(floor)
-                remaining_down_task[elevator_id].sort(reverse=True)  # 降序排序
-
-            mutex.unlock()
-            index = 0
-            if floor <= FLOORS / 2:
-                index = int(FLOORS / 2 - floor)
-            else:
-                index = int(30 - floor)
+        if state.status != ELEVATOR_STATUS.break_down:
+            if floor > state.current_floor:
+                state.remaining_up_task.add(floor)  # 将该楼添加到上行的目标楼层中(有序且去重)
+            elif floor < state.current_floor:
+                state.remaining_down_task.add(floor)
+            elevator_wakeup[elevator_id].wakeAll()  # 唤醒该电梯线程
+
+            elevator_mutex[elevator_id].unlock()
+            if self.metrics is not None:
+                self.metrics.car_call(elevator_id, floor)
             # 将当前楼层按钮的颜色改变
-            self.__inner_floor_buttons[elevator_id][index].setStyleSheet(
-                "background-color : rgb(192, 192, 192);")
-            self.output.append(str(elevator_id) + "号电梯" + "用户需要去" + str(floor) + "楼")
+            self.set_style(self.__inner_floor_buttons[elevator_id][floor - 1], FLOOR_BUTTON_PRESSED_STYLE)
+            self.log.add(event_log.INNER, str(elevator_id) + "号电梯" + "用户需要去" + str(floor) + "楼",
+                         elevator_id, floor)
 
     # 处理电梯外部每层楼的按钮点击事件
     def __outer_button_clicked(self, floor, move_state):
-        mutex.lock()
+        if self.recorder is not None:
+            self.recorder.outer(floor, move_state)
+        request_mutex = global_vars.request_mutex
+        request_mutex.lock()
         # 排除故障电梯
         all_fault_flag = True
-        for state in elevator_status:
-            if state != ELEVATOR_STATUS.break_down:
+        for state in elevators:
+            if state.status != ELEVATOR_STATUS.break_down:
                 all_fault_flag = False
 
         if all_fault_flag:
-            self.output.append("所有电梯均已故障！")
-            mutex.unlock()
+            self.log.add(event_log.FAULT, "所有电梯均已故障！")
+            request_mutex.unlock()
             return
 
         task = OUTER_BUTTON_GENERATE_TASK(floor, move_state)
 
-        if task not in outer_request:
-            outer_request.append(task)
+        if outer_request.add(task):
+            task_arrived.wakeAll()  # 唤醒调度线程
+            if self.metrics is not None:
+                self.metrics.hall_call(floor)
+            # 按钮先显示为按下, 下一帧刷新时再改为等待中
+            self.__lit_outer_requests = self.__lit_outer_requests - {(floor, move_state)}
 
             if move_state == MOVING_STATUS.up:
-                self.__outer_up_buttons[FLOORS - floor - 1].setStyleSheet("background-color : yellow")
-                self.output.append(str(floor) + "楼的用户有上楼的需求～")
+                self.set_style(self.__outer_up_buttons[floor - 1], OUTER_BUTTON_PRESSED_STYLE)
+                self.log.add(event_log.OUTER, str(floor) + "楼的用户有上楼的需求～", floor=floor)
 
             elif move_state == MOVING_STATUS.down:
-                self.__outer_down_buttons[FLOORS - floor].setStyleSheet("background-color : yellow")
-                self.output.append(str(floor) + "楼的用户下楼的需求～")
+                self.set_style(self.__outer_down_buttons[floor - 1], OUTER_BUTTON_PRESSED_STYLE)
+                self.log.add(event_log.OUTER, str(floor) + "楼的用户下楼的需求～", floor=floor)
         
-        mutex.unlock()
+        request_mutex.unlock()
     
     # 处理指定电梯的开门请求
     def __inner_open_button_clicked(self, elevator_id):
-        mutex.lock()
+        if self.recorder is not None:
+            self.recorder.open_door(elevator_id)
+        state = elevators[elevator_id]
+        elevator_mutex[elevator_id].lock()
         # 电梯故障
-        if elevator_status[elevator_id] == ELEVATOR_STATUS.break_down:
-            self.output.append(str(elevator_id) + "号电梯出现故障 正在维修!")
-            mutex.unlock()
+        if state.status == ELEVATOR_STATUS.break_down:
+            self.log.add(event_log.FAULT, str(elevator_id) + "号电梯出现故障 正在维修!", elevator_id)
+            elevator_mutex[elevator_id].unlock()
             return
         # 电梯正在关门或者正在开门
-        if elevator_status[elevator_id] == ELEVATOR_STATUS.door_closing or elevator_status[
-            elevator_id] == ELEVATOR_STATUS.door_open:
-            open_button_clicked[elevator_id] = True
-            close_button_clicked[elevator_id] = False
-        mutex.unlock()
+        if state.status == ELEVATOR_STATUS.door_closing or state.status == ELEVATOR_STATUS.door_open:
+            state.open_button_clicked = True
+            state.close_button_clicked = False
+            snapshots.publish(elevator_id, state)
+            elevator_wakeup[elevator_id].wakeAll()  # 电梯线程重新计算门的截止时间
+        elevator_mutex[elevator_id].unlock()
         # 开门按钮
 
-        self.__inner_open_door_buttons[elevator_id].setStyleSheet("background-color : rgb(192, 192, 192)")
-        self.output.append(str(elevator_id) + "电梯开门!")
+        self.set_style(self.__inner_open_door_buttons[elevator_id], DOOR_BUTTON_PRESSED_STYLE)
+        self.log.add(event_log.DOOR, str(elevator_id) + "电梯开门!", elevator_id)
         # 调用开门函数
         self.open_the_door(elevator_id, 1)
 
@@ -369,121 +436,137 @@ class UI_MainWindow(QWidget):
 
     # 处理电梯关门
     def __inner_close_button_clicked(self, elevator_id):
-        mutex.lock()
-        if elevator_status[elevator_id] == ELEVATOR_STATUS.break_down:
-            self.output.append(str(elevator_id) + "号电梯出现故障 正在维修!")
-            mutex.unlock()
+        if self.recorder is not None:
+            self.recorder.close_door(elevator_id)
+        state = elevators[elevator_id]
+        elevator_mutex[elevator_id].lock()
+        if state.status == ELEVATOR_STATUS.break_down:
+            self.log.add(event_log.FAULT, str(elevator_id) + "号电梯出现故障 正在维修!", elevator_id)
+            elevator_mutex[elevator_id].unlock()
             return
 
-        if elevator_status[elevator_id] == ELEVATOR_STATUS.door_openning or elevator_status[
-            elevator_id] == ELEVATOR_STATUS.door_open:
-            close_button_clicked[elevator_id] = True
-            open_button_clicked[elevator_id] = False
-        mutex.unlock()
+        if state.status == ELEVATOR_STATUS.door_openning or state.status == ELEVATOR_STATUS.door_open:
+            state.close_button_clicked = True
+            state.open_button_clicked = False
+            snapshots.publish(elevator_id, state)
+            elevator_wakeup[elevator_id].wakeAll()  # 电梯线程重新计算门的截止时间
+        elevator_mutex[elevator_id].unlock()
         # 关门按钮
-        self.__inner_close_door_buttons[elevator_id].setStyleSheet("background-color : rgb(192, 192, 192)")
-        self.output.append(str(elevator_id) + "电梯关门!")
+        self.set_style(self.__inner_close_door_buttons[elevator_id], DOOR_BUTTON_PRESSED_STYLE)
+        self.log.add(event_log.DOOR, str(elevator_id) + "电梯关门!", elevator_id)
         self.close_the_door(elevator_id)
 
     # 处理电梯故障按钮
     def __inner_fault_button_clicked(self, elevator_id):
-        mutex.lock()
-        if elevator_status[elevator_id] != ELEVATOR_STATUS.break_down:
-            elevator_status[elevator_id] = ELEVATOR_STATUS.break_down
-            mutex.unlock()
-            self.__inner_fault_buttons[elevator_id].setStyleSheet("background-color : gray;")
+        if self.recorder is not None:
+            self.recorder.fault(elevator_id)
+        state = elevators[elevator_id]
+        elevator_mutex[elevator_id].lock()
+        # 唤醒电梯线程处理故障或恢复运行
+        elevator_wakeup[elevator_id].wakeAll()
+        broken = state.status != ELEVATOR_STATUS.break_down
+        state.status = ELEVATOR_STATUS.break_down if broken else ELEVATOR_STATUS.normal
+        snapshots.publish(elevator_id, state)
+        elevator_mutex[elevator_id].unlock()
+        # 状态改好之后再唤醒调度线程重新分配, 否则调度线程可能在修复生效前醒来, 看到全部故障后又睡去
+        global_vars.request_mutex.lock()
+        task_arrived.wakeAll()
+        global_vars.request_mutex.unlock()
+        if broken:
+            self.set_style(self.__inner_fault_buttons[elevator_id], BROKEN_STYLE)
             for button in self.__inner_floor_buttons[elevator_id]:
-                button.setStyleSheet("background-color :gray;""border-radius:10px;")
-            self.__inner_open_door_buttons[elevator_id].setStyleSheet("background-color : gray;")
-            self.__inner_close_door_buttons[elevator_id].setStyleSheet("background-color : gray;")
+                self.set_style(button, FLOOR_BUTTON_BROKEN_STYLE)
+            self.set_style(self.__inner_open_door_buttons[elevator_id], BROKEN_STYLE)
+            self.set_style(self.__inner_close_door_buttons[elevator_id], BROKEN_STYLE)
 
-            self.output.append(str(elevator_id) + "电梯故障!")
+            self.log.add(event_log.FAULT, str(elevator_id) + "电梯故障!", elevator_id)
         # 如果电梯本来就有故障，则再点一下故障就会消失
         else:
-            elevator_status[elevator_id] = ELEVATOR_STATUS.normal
-            mutex.unlock()
-
-            self.__inner_fault_buttons[elevator_id].setStyleSheet("background-color : None")
+            self.set_style(self.__inner_fault_buttons[elevator_id], DEFAULT_STYLE)
             for button in self.__inner_floor_buttons[elevator_id]:
-                button.setStyleSheet("background-color : rgb(255,255,255);""border-style: solid;"
-                                     "border-width: 1px;"
-                                     "border-color:  rgb(100,200,160);"
-                                     "border-radius:3px;"
-                                     "color:black;")
-            self.__inner_open_door_buttons[elevator_id].setStyleSheet("background-color : None;")
-            self.__inner_close_door_buttons[elevator_id].setStyleSheet("background-color : None;")
-            self.output.append(str(elevator_id) + "电梯正常!")
+                self.set_style(button, FLOOR_BUTTON_STYLE)
+            self.set_style(self.__inner_open_door_buttons[elevator_id], DEFAULT_STYLE)
+            self.set_style(self.__inner_close_door_buttons[elevator_id], DEFAULT_STYLE)
+            self.log.add(event_log.FAULT, str(elevator_id) + "电梯正常!", elevator_id)
 
    
 
-    # 实时更新界面
+    # 按记录时的时间间隔回放按钮事件日志, speed 大于1时加速
+    # 随机任务产生的每个按钮事件都单独记录过, 因此跳过 GENERATE 标记
+    def replay_trace(self, events, speed=1.0):
+        handlers = {
+            trace.OUTER: lambda arg, floor: self.__outer_button_clicked(floor, MOVING_STATUS(arg)),
+            trace.INNER: self.__inner_num_button_clicked,
+            trace.OPEN: lambda arg, floor: self.__inner_open_button_clicked(arg),
+            trace.CLOSE: lambda arg, floor: self.__inner_close_button_clicked(arg),
+            trace.FAULT: lambda arg, floor: self.__inner_fault_button_clicked(arg),
+        }
+        events = [event for event in events if event.kind in handlers]
+        clock = QElapsedTimer()
+        clock.start()
+        position = [0]
+
+        def step():
+            now = clock.elapsed() * speed
+            while position[0] < len(events) and events[position[0]].time <= now:
+                event = events[position[0]]
+                position[0] += 1
+                handlers[event.kind](event.arg, event.floor)
+            if position[0] == len(events):
+                self.replay_timer.stop()
+                self.log.add(event_log.INFO, "按钮事件回放完成")
+
+        self.replay_timer = QTimer()
+        self.replay_timer.setInterval(10)
+        self.replay_timer.timeout.connect(step)
+        self.replay_timer.start()
+
+    # 实时更新界面, 只改动状态发生变化的控件
+    # 读取电梯和外部任务的不可变快照, 不加任何锁, 界面刷新不会阻塞电梯线程和调度线程
     def update(self):
-        mutex.lock()
-        for i in range(ELEVATOR_NUMS):
+        self.output.refresh()
+        for i, snapshot in enumerate(snapshots.elevators()):
+            status = snapshot.status
+            current_floor = snapshot.current_floor
+            open_clicked = snapshot.open_button_clicked
+            close_clicked = snapshot.close_button_clicked
+
             # 实时更新楼层
-            if elevator_status[i] == ELEVATOR_STATUS.moving_up:
-                self.__elevator_lcds[i].display(str(elevator_current_floor[i]))
-                self.close_the_door(i)
-            elif elevator_status[i] == ELEVATOR_STATUS.moving_down:
-                self.__elevator_lcds[i].display(str(elevator_current_floor[i]))
-                self.close_the_door(i)
-            else:
-                self.__elevator_lcds[i].display(elevator_current_floor[i])
+            if self.__lcd_floors[i] != current_floor:
+                self.__lcd_floors[i] = current_floor
+                self.__elevator_lcds[i].display(current_floor)
 
             # 实时更新开关门按钮
-            if not open_button_clicked[i] and not elevator_status[i] == ELEVATOR_STATUS.break_down:
-                self.__inner_open_door_buttons[i].setStyleSheet(
-                    "background-color :rgb(237,220,195);""border-style: solid;"
-                    "border-width: 2px;"
-                    "border-color: rgb(192, 192, 192);"
-                    "border-radius:10px;"
-                    "color:black;")
-
-            if not close_button_clicked[i] and not elevator_status[i] == ELEVATOR_STATUS.break_down:
-                self.__inner_close_door_buttons[i].setStyleSheet(
-                    "background-color :rgb(237,220,195);""border-style: solid;"
-                    "border-width: 2px;"
-                    "border-color: rgb(192, 192, 192);"
-                    "border-radius:10px;"
-                    "color:black;")
-
-            if elevator_status[i] in [ELEVATOR_STATUS.door_openning, ELEVATOR_STATUS.door_open,
-                                      ELEVATOR_STATUS.door_closing]:
-                index = 0
-                if elevator_current_floor[i] <= FLOORS / 2:
-                    index = int(FLOORS / 2 - elevator_current_floor[i])
-                else:
-                    index = int(30 - elevator_current_floor[i])
-                self.__inner_floor_buttons[i][index].setStyleSheet(
-                    "background-color : rgb(255,255,255);""border-style: solid;"
-                    "border-width: 1px;"
-                    "border-color:  rgb(100,200,160);"
-                    "border-radius:3px;"
-                    "color:black;"
-                )
-
-            if elevator_status[i] == ELEVATOR_STATUS.door_openning:
+            if not open_clicked and not status == ELEVATOR_STATUS.break_down:
+                self.set_style(self.__inner_open_door_buttons[i], DOOR_BUTTON_STYLE)
+
+            if not close_clicked and not status == ELEVATOR_STATUS.break_down:
+                self.set_style(self.__inner_close_door_buttons[i], DOOR_BUTTON_STYLE)
+
+            if status in [ELEVATOR_STATUS.door_openning, ELEVATOR_STATUS.door_open,
+                          ELEVATOR_STATUS.door_closing]:
+                self.set_style(self.__inner_floor_buttons[i][current_floor - 1], FLOOR_BUTTON_STYLE)
+
+            if status == ELEVATOR_STATUS.door_openning:
                 self.open_the_door(i, 0)
             else:
                 self.close_the_door(i)
 
-        mutex.unlock()
-        # 对外部来说，遍历任务，找出未完成的设为红色，其他设为默认none
-        for button in self.__outer_up_buttons:
-            button.setStyleSheet("background-color : None")
-
-        for button in self.__outer_down_buttons:
-            button.setStyleSheet("background-color : None")
-
-        mutex.lock()
-        for outer_task in outer_request:
-            # 如果外部的事件还没有被完全处理好，则将对应的按钮的背景变成红色的
-            if outer_task.state != OUTER_TASK_STATUS.finished:
-                if outer_task.move_state == MOVING_STATUS.up:
-                    self.__outer_up_buttons[FLOORS - outer_task.target - 1].setStyleSheet(
-                        "background-color : rgb(192, 192, 192);")
-                elif outer_task.move_state == MOVING_STATUS.down:
-                    self.__outer_down_buttons[FLOORS - outer_task.target].setStyleSheet(
-                        "background-color : rgb(192, 192, 192);")
-
-        mutex.unlock()
\ No newline at end of file
+        # 对外部来说，登记表中只有还没有被完全处理好的外部事件，将对应的按钮设为灰色, 已完成的恢复默认
+        # 只改动与上一帧相比有变化的按钮
+        lit = outer_request.snapshot()
+
+        for floor, move_state in self.__lit_outer_requests - lit:
+            self.set_style(self.__outer_button(floor, move_state), DEFAULT_STYLE)
+        for floor, move_state in lit - self.__lit_outer_requests:
+            self.set_style(self.__outer_button(floor, move_state), OUTER_BUTTON_WAITING_STYLE)
+        self.__lit_outer_requests = lit
+
+    # 刷新实时指标面板
+    def update_metrics(self):
+        self.metrics_panel.setPlainText(self.metrics.format_text())
+
+    def __outer_button(self, floor, move_state):
+        if move_state == MOVING_STATUS.up:
+            return self.__outer_up_buttons[floor - 1]
+        return self.__outer_down_buttons[floor - 1]
@@ -0,0 +1,89 @@
+import time
+
+STARTED = time.perf_counter()
+
+import random
+import sys
+from core.constants import ELEVATOR_NUMS, FLOORS, MOVING_STATUS
+from core.simulation import SimulationEngine
+from core.trace import read_trace
+from core.metrics import Metrics, export_metrics
+
+# 无界面运行: 只用 core 包, 不加载 Qt
+# 默认用随机流量回放一整天, 也可以回放 main.py 记录的按钮事件日志
+#   python headless.py [--policy=名字] [--batch] [--matching] [--park] [--cars=数量] [--floors=层数]
+#                      [--hours=小时] [--seed=种子] [--replay=日志路径 [--speed=倍数]] [--metrics=路径]
+# --metrics=路径: 记录运行指标, 结束时写入文件(.json 为 JSON, 否则为文本)
+
+# 平均每10秒一次随机按键, 一半外部按钮一半内部按钮, 与界面的"产生随机任务"规则相同
+def schedule_random_presses(engine, duration, seed):
+    floors = engine.state.floors
+    rng = random.Random(seed)
+    arrival = 0.0
+    while True:
+        arrival += rng.expovariate(1 / 10000)
+        if arrival >= duration:
+            break
+        if rng.random() < 0.5:
+            floor = rng.randint(1, floors)
+            if floor == 1:
+                move_state = MOVING_STATUS.up
+            elif floor == floors:
+                move_state = MOVING_STATUS.down
+            else:
+                move_state = rng.choice([MOVING_STATUS.up, MOVING_STATUS.down])
+            engine.schedule_at(arrival, engine.press_outer, floor, move_state)
+        else:
+            engine.schedule_at(arrival, engine.press_inner, rng.randint(0, len(engine.elevators) - 1),
+                               rng.randint(1, floors))
+
+
+if __name__ == '__main__':
+    policy = 'cost'
+    elevator_nums, floors = ELEVATOR_NUMS, FLOORS
+    hours = 24.0
+    seed = 0
+    replay = None
+    speed = 1.0
+    metrics_path = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--policy='):
+            policy = arg[len('--policy='):]
+        elif arg.startswith('--cars='):
+            elevator_nums = int(arg[len('--cars='):])
+        elif arg.startswith('--floors='):
+            floors = int(arg[len('--floors='):])
+        elif arg.startswith('--hours='):
+            hours = float(arg[len('--hours='):])
+        elif arg.startswith('--seed='):
+            seed = int(arg[len('--seed='):])
+        elif arg.startswith('--replay='):
+            replay = arg[len('--replay='):]
+        elif arg.startswith('--speed='):
+            speed = float(arg[len('--speed='):])
+        elif arg.startswith('--metrics='):
+            metrics_path = arg[len('--metrics='):]
+
+    metrics = Metrics() if metrics_path else None
+    # 回放时按日志中记录的楼栋大小创建电梯(旧版本的日志没有记录时按 --cars/--floors)
+    trace_to_replay = None
+    if replay is not None:
+        trace_to_replay = read_trace(replay)
+        if trace_to_replay.elevator_nums is not None:
+            elevator_nums, floors = trace_to_replay.elevator_nums, trace_to_replay.floors
+    engine = SimulationEngine(elevator_nums=elevator_nums, floors=floors, policy=policy,
+                              batch_dispatch='--batch' in sys.argv, matching_dispatch='--matching' in sys.argv,
+                              parking='--park' in sys.argv, metrics=metrics)
+    if trace_to_replay is not None:
+        engine.load_trace(trace_to_replay.events, speed)
+    else:
+        schedule_random_presses(engine, hours * 3600 * 1000, seed)
+    ready = time.perf_counter()
+
+    engine.run()
+    elapsed = time.perf_counter() - ready
+    print("启动用时: %.1f 毫秒" % ((ready - STARTED) * 1000))
+    print("仿真时长: %.1f 小时, 处理事件: %d, 用时: %.2f 秒" % (engine.now / 3600000, engine.processed_events, elapsed))
+    if metrics is not None:
+        export_metrics(metrics, metrics_path)
+        print("运行指标已写入 %s" % metrics_path)
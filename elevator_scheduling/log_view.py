@@ -0,0 +1,59 @@
+from PyQt5.QtGui import QPainter
+from PyQt5.QtWidgets import QAbstractScrollArea
+from core.event_log import format_event
+
+# 运行信息视图: 只绘制可见的行, 滚动条按行滚动; 缓冲区中有多少条事件, 每帧的开销都只与窗口高度有关
+# 由界面的刷新定时器每帧调用 refresh, 一帧内记录的事件合并为一次重绘
+# 滚动条在底部时跟随最新的事件, 否则保持正在看的事件不动(直到它被环形缓冲区丢弃)
+class EventLogView(QAbstractScrollArea):
+    def __init__(self, log):
+        super().__init__()
+        self.log = log
+        self.rows = []                      # 窗口中可见的事件, 只从缓冲区中取出这几条
+        self.count = 0                      # 最近一次刷新时缓冲区中的条数, 决定滚动范围
+        self.appended = 0                   # 最近一次刷新时的累计条数, 没有新事件时不刷新
+
+    def visible_rows(self):
+        return max(1, self.viewport().height() // self.fontMetrics().height())
+
+    def update_range(self):
+        scroll_bar = self.verticalScrollBar()
+        scroll_bar.setPageStep(self.visible_rows())
+        scroll_bar.setRange(0, max(0, self.count - self.visible_rows()))
+
+    # 取出从滚动条位置开始的可见行; 滚动、改变大小和刷新后调用
+    def fetch_rows(self):
+        self.rows, _, _ = self.log.window(self.verticalScrollBar().value(), self.visible_rows() + 1)
+
+    def refresh(self):
+        if self.log.appended == self.appended:
+            return
+        scroll_bar = self.verticalScrollBar()
+        following = scroll_bar.value() == scroll_bar.maximum()
+        top = scroll_bar.value()
+        count, appended = self.count, self.appended
+        _, self.count, self.appended = self.log.window(0, 0)
+        # 缓冲区满后旧事件从前面被丢弃, 原来在顶部的那条事件上移了 dropped 行
+        dropped = (self.appended - appended) - (self.count - count)
+        self.update_range()
+        scroll_bar.setValue(scroll_bar.maximum() if following else top - dropped)
+        self.fetch_rows()
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_range()
+        self.fetch_rows()
+
+    def scrollContentsBy(self, dx, dy):
+        self.fetch_rows()
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        metrics = self.fontMetrics()
+        height = metrics.height()
+        y = metrics.ascent()
+        for row in self.rows:
+            painter.drawText(4, y, format_event(row))
+            y += height
@@ -1,32 +1,153 @@
+import os
 import sys
+import time
+from PyQt5.QtCore import QElapsedTimer, QTimer
 from PyQt5.QtWidgets import QApplication
 
-from utils.constants import WINDOW_SIZE  
+from core.constants import ELEVATOR_NUMS, FLOORS
+from utils import global_vars
 from utils.global_vars import init_global_vars
 from elevator_thread import Elevator
 from scheduler import OuterTaskController
+from core.simulation import SimulationEngine
 from gui_mainwindow import UI_MainWindow
+from core.trace import TraceRecorder, read_trace
+from core.metrics import Metrics, export_metrics
+from core.traffic_generator import TrafficGenerator, traffic_schedule
+from core.event_log import EventLog
+from traffic_feeder import TrafficFeeder
+
+# 实时模式: 用仿真引擎代替电梯线程, 仿真时钟跟随真实时间
+def start_realtime_simulation(policy, batch, matching, parking):
+    engine = SimulationEngine(global_vars, policy=policy, batch_dispatch=batch, matching_dispatch=matching,
+                              parking=parking, metrics=global_vars.metrics)
+    clock = QElapsedTimer()
+    clock.start()
+
+    def tick():
+        engine.sync()
+        engine.run_until(clock.elapsed())
+
+    ticker = QTimer()
+    ticker.setInterval(10)
+    ticker.timeout.connect(tick)
+    ticker.start()
+    return engine, ticker
+
+# 默认把按钮事件记录到 traces 目录下以启动时间命名的文件中
+def default_trace_path():
+    os.makedirs('traces', exist_ok=True)
+    return os.path.join('traces', time.strftime('trace-%Y%m%d-%H%M%S.elvt'))
+
+# 每 interval 毫秒把运行指标导出到文件一次, 退出时再导出一次
+def start_metrics_export(app, metrics, path, interval=5000):
+    exporter = QTimer()
+    exporter.setInterval(interval)
+    exporter.timeout.connect(lambda: export_metrics(metrics, path))
+    exporter.start()
+    app.aboutToQuit.connect(lambda: export_metrics(metrics, path))
+    return exporter
 
 if __name__ == '__main__':
+    # --park: 把空闲电梯停到预测需求最多的楼层, 只有 --sim 模式的仿真电梯支持, 电梯线程不支持
+    if '--park' in sys.argv and '--sim' not in sys.argv:
+        sys.exit("--park 只能和 --sim 一起使用")
     app = QApplication(sys.argv)
-    
+
+    # --cars=数量 --floors=层数: 楼栋大小, 默认为 5 台电梯 20 层
+    elevator_nums, floors = ELEVATOR_NUMS, FLOORS
+    for arg in sys.argv:
+        if arg.startswith('--cars='):
+            elevator_nums = int(arg[len('--cars='):])
+        elif arg.startswith('--floors='):
+            floors = int(arg[len('--floors='):])
+    # --replay=路径: 回放按钮事件日志, 楼栋大小按日志中记录的大小(旧版本的日志没有记录时按上面的设置)
+    trace_to_replay = None
+    for arg in sys.argv:
+        if arg.startswith('--replay='):
+            trace_to_replay = read_trace(arg[len('--replay='):])
+            if trace_to_replay.elevator_nums is not None:
+                elevator_nums, floors = trace_to_replay.elevator_nums, trace_to_replay.floors
+
+    # --metrics: 记录运行指标并在界面上显示指标面板, --metrics=路径: 同时定期导出到文件(.json 为 JSON, 否则为文本)
+    metrics = None
+    metrics_path = None
+    for arg in sys.argv:
+        if arg == '--metrics':
+            metrics = Metrics()
+        elif arg.startswith('--metrics='):
+            metrics = Metrics()
+            metrics_path = arg[len('--metrics='):]
+
     # 初始化全局变量
-    init_global_vars()
+    init_global_vars(elevator_nums, floors, metrics)
+    if metrics_path:
+        exporter = start_metrics_export(app, metrics, metrics_path)
+
+    # --batch: 用 NumPy 代价矩阵批量分配外部任务
+    batch = '--batch' in sys.argv
+    # --matching: 把全部未分配任务作为最小代价匹配一次求解
+    matching = '--matching' in sys.argv
+    # --policy=名字: 选择分配策略(cost, nearest, look, zoning, eta), 默认为 cost
+    policy = 'cost'
+    # --record=路径: 按钮事件日志的位置, --no-record: 不记录
+    record = None if '--no-record' in sys.argv else ''
+    # --speed=倍数: 回放速度
+    speed = 1.0
+    for arg in sys.argv:
+        if arg.startswith('--policy='):
+            policy = arg[len('--policy='):]
+        elif arg.startswith('--record=') and record is not None:
+            record = arg[len('--record='):]
+        elif arg.startswith('--speed='):
+            speed = float(arg[len('--speed='):])
+    recorder = None
+    if record is not None:
+        recorder = TraceRecorder(record or default_trace_path(), elevator_nums, floors)
+        app.aboutToQuit.connect(recorder.close)
+    if '--sim' in sys.argv:
+        engine, ticker = start_realtime_simulation(policy, batch, matching, '--park' in sys.argv)
+    else:
+        # 开启任务调度器线程
+        controller = OuterTaskController(policy, batch, matching)
+        controller.start()
+
+        # 创建并启动电梯线程
+        elevator_list = []
+        for i in range(elevator_nums):
+            elevator_list.append(Elevator(i))
 
-    # 开启任务调度器线程
-    controller = OuterTaskController()
-    controller.start()
+        # 启动所有电梯线程
+        for elevator in elevator_list:
+            elevator.start()
 
-    # 创建并启动电梯线程
-    elevator_list = []
-    from utils.constants import ELEVATOR_NUMS
-    for i in range(ELEVATOR_NUMS):
-        elevator_list.append(Elevator(i))
+    # --traffic=名字: 持续产生乘客(uniform, up_peak, down_peak, lunch, office_day), 不给出时只有"产生随机任务"
+    # --traffic-rate=每分钟乘客数, --traffic-speed=流量时钟加快的倍数, --traffic-seed=种子
+    traffic, traffic_rate, traffic_speed, traffic_seed = None, None, 1.0, 0
+    for arg in sys.argv:
+        if arg.startswith('--traffic='):
+            traffic = arg[len('--traffic='):]
+        elif arg.startswith('--traffic-rate='):
+            traffic_rate = float(arg[len('--traffic-rate='):])
+        elif arg.startswith('--traffic-speed='):
+            traffic_speed = float(arg[len('--traffic-speed='):])
+        elif arg.startswith('--traffic-seed='):
+            traffic_seed = int(arg[len('--traffic-seed='):])
+    generator = TrafficGenerator(traffic_schedule(traffic or 'uniform', floors, traffic_rate), floors, traffic_seed)
+    feeder = TrafficFeeder(generator, recorder)
+    if traffic is not None:
+        feeder.start(traffic_speed)
+    app.aboutToQuit.connect(feeder.stop)
 
-    # 启动所有电梯线程
-    for elevator in elevator_list:
-        elevator.start()
+    # --log=路径: 运行信息同时写入按大小轮转的日志文件(每个 1 MB, 保留3个旧文件)
+    log = EventLog()
+    for arg in sys.argv:
+        if arg.startswith('--log='):
+            log.open_file(arg[len('--log='):])
+    app.aboutToQuit.connect(log.close)
 
     # 创建并显示UI
-    w = UI_MainWindow()
-    sys.exit(app.exec_())
\ No newline at end of file
+    w = UI_MainWindow(recorder, feeder, log)
+    if trace_to_replay is not None:
+        w.replay_trace(trace_to_replay.events, speed)
+    sys.exit(app.exec_())
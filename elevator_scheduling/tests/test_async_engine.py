@@ -0,0 +1,56 @@
+import asyncio
+from core.async_engine import AsyncBuilding
+from core.constants import ELEVATOR_STATUS, MOVING_STATUS
+from core.simulation import SimulationEngine
+
+UP, DOWN = MOVING_STATUS.up, MOVING_STATUS.down
+
+# 时刻 0 一次按下的按钮, 每栋楼相同: 外部呼叫 (楼层, 方向) 和内部按钮 (电梯编号, 楼层)
+OUTER_PRESSES = [(7, DOWN), (3, UP), (12, DOWN), (5, UP), (15, DOWN)]
+INNER_PRESSES = [(0, 9), (1, 4), (2, 14)]
+
+
+def press_all(building):
+    for floor, move_state in OUTER_PRESSES:
+        assert building.press_outer(floor, move_state)
+    for elevator_id, floor in INNER_PRESSES:
+        assert building.press_inner(elevator_id, floor)
+
+
+def served(state):
+    return len(state.outer_request) == 0 and all(
+        elevator.status == ELEVATOR_STATUS.normal and not elevator.remaining_up_task
+        and not elevator.remaining_down_task for elevator in state.elevators)
+
+
+# 在一个事件循环中运行几栋楼, 直到每栋楼的呼叫都完成; 时钟加快 speed 倍
+async def host(buildings, speed, timeout=10):
+    sites = [AsyncBuilding(3, 16, speed=speed) for _ in range(buildings)]
+    tasks = [asyncio.create_task(site.run()) for site in sites]
+    for site in sites:
+        press_all(site)
+    try:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not all(served(site.state) for site in sites) and loop.time() < deadline:
+            await asyncio.sleep(0.01)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return sites
+
+
+def test_hosted_buildings_serve_every_call_like_sync_engine():
+    engine = SimulationEngine(elevator_nums=3, floors=16)
+    press_all(engine)
+    engine.run()
+    assert served(engine.state)
+
+    sites = asyncio.run(host(buildings=4, speed=50))
+    expected_floors = [elevator.current_floor for elevator in engine.state.elevators]
+    for site in sites:
+        assert served(site.state)
+        assert [elevator.current_floor for elevator in site.state.elevators] == expected_floors
+        assert site.stop_count == sum(elevator.stop_count for elevator in engine.elevators)
+        assert site.floors_travelled == sum(elevator.floors_travelled for elevator in engine.elevators)
@@ -0,0 +1,71 @@
+import random
+import numpy as np
+import pytest
+from core.batch_simulation import BatchSimulation, CALL_DOWN, CALL_UP
+from core.constants import MOVING_STATUS
+from core.simulation import SimulationEngine
+
+ELEVATOR_NUMS, FLOORS = 3, 12
+
+
+# 每个时刻最多一次按键, 与 BatchSimulation.generate_presses 相同; 时刻都是时间步长的整数倍
+def fixed_presses(seed, count=40):
+    rng = random.Random(seed)
+    presses = {}
+    for _ in range(count):
+        moment = rng.randrange(1, 3000) * 100
+        if rng.random() < 0.5:
+            floor = rng.randint(1, FLOORS)
+            direction = CALL_UP if floor == 1 else CALL_DOWN if floor == FLOORS else rng.choice([CALL_UP, CALL_DOWN])
+            presses[moment] = ('outer', floor, direction)
+        else:
+            presses[moment] = ('inner', rng.randrange(ELEVATOR_NUMS), rng.randint(1, FLOORS))
+    return presses
+
+
+# 一栋楼的批量仿真, 按键换成给定的按键
+def batch_simulation(presses):
+    simulation = BatchSimulation(1, ELEVATOR_NUMS, FLOORS)
+    empty = np.zeros(0, dtype=np.int64)
+
+    def generate_presses():
+        press = presses.get(simulation.now)
+        if press is None:
+            return (empty, empty, empty), (empty, empty, empty)
+        one = np.zeros(1, dtype=np.int64)
+        values = one + press[1], one + press[2]
+        if press[0] == 'outer':
+            return (one, *values), (empty, empty, empty)
+        return (empty, empty, empty), (one, *values)
+
+    simulation.generate_presses = generate_presses
+    return simulation
+
+
+def event_engine(presses):
+    engine = SimulationEngine(elevator_nums=ELEVATOR_NUMS, floors=FLOORS)
+    for moment, (kind, a, b) in presses.items():
+        if kind == 'outer':
+            engine.schedule_at(moment, engine.press_outer, a, MOVING_STATUS.up if b == CALL_UP else MOVING_STATUS.down)
+        else:
+            engine.schedule_at(moment, engine.press_inner, a, b)
+    return engine
+
+
+@pytest.mark.parametrize('seed', [0, 5, 21, 73])
+def test_matches_event_engine(seed):
+    presses = fixed_presses(seed)
+    simulation = batch_simulation(presses)
+    engine = event_engine(presses)
+    for _ in range(6000):
+        simulation.step()
+        engine.run_until(simulation.now)
+        assert simulation.floor[0].tolist() == [elevator.current_floor for elevator in engine.state.elevators], \
+            simulation.now
+    assert simulation.stop_count == sum(elevator.stop_count for elevator in engine.elevators)
+    assert simulation.floors_travelled == sum(elevator.floors_travelled for elevator in engine.elevators)
+
+
+def test_tick_must_divide_transition_times():
+    with pytest.raises(ValueError):
+        BatchSimulation(1, tick=300)
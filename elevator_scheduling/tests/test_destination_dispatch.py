@@ -0,0 +1,70 @@
+from core.simulation import SimulationEngine
+
+
+# 记录每个呼叫分配到的电梯和分配时间
+def destination_engine(elevator_nums=2, floors=20, capacity=13):
+    engine = SimulationEngine(elevator_nums=elevator_nums, floors=floors, destination_dispatch=True, capacity=capacity)
+    assigned = {}
+
+    def on_assign(task, elevator_id, boarded):
+        assigned[id(task)] = (engine.now, elevator_id)
+
+    engine.assign_listeners.append(on_assign)
+    return engine, assigned
+
+
+def test_same_destination_grouped_on_one_car():
+    engine, assigned = destination_engine()
+    to_ten = [engine.press_destination(1, 10) for _ in range(3)]
+    to_five = [engine.press_destination(1, 5) for _ in range(2)]
+    engine.run_until(0)
+    ten_cars = {assigned[id(task)][1] for task in to_ten}
+    five_cars = {assigned[id(task)][1] for task in to_five}
+    assert len(ten_cars) == 1 and len(five_cars) == 1
+    assert ten_cars != five_cars
+
+
+def test_passengers_delivered_to_destinations():
+    engine, _ = destination_engine()
+    doors = []
+    engine.door_listeners.append(lambda elevator_id, floor, opened: opened and doors.append((elevator_id, floor)))
+    for origin, destination in ((1, 10), (1, 5), (8, 2), (12, 15)):
+        engine.press_destination(origin, destination)
+    engine.run()
+    dispatcher = engine.destination
+    assert not dispatcher.has_pending()
+    assert dispatcher.load == [0, 0]
+    assert all(not riding for riding in dispatcher.riding)
+    stopped = {floor for _, floor in doors}
+    assert {10, 5, 8, 2, 12, 15} <= stopped
+
+
+def test_capacity_limits_assigned_passengers():
+    engine, assigned = destination_engine(elevator_nums=1, capacity=2)
+    arrived = []
+    engine.door_listeners.append(lambda elevator_id, floor, opened: opened and floor == 10 and arrived.append(engine.now))
+    tasks = [engine.press_destination(1, 10) for _ in range(3)]
+    engine.run_until(0)
+    assert [id(task) in assigned for task in tasks] == [True, True, False]
+    assert engine.destination.load == [2]
+    assert engine.destination.has_pending()
+    engine.run()
+    # 前两名乘客在 10 层下车后, 电梯才接收第三名乘客
+    assert assigned[id(tasks[2])][0] > arrived[0]
+    assert len(arrived) == 2
+    assert engine.destination.load == [0] and not engine.destination.has_pending()
+
+
+def test_full_cars_are_skipped():
+    engine, assigned = destination_engine(capacity=1)
+    first = engine.press_destination(1, 10)
+    second = engine.press_destination(1, 10)
+    engine.run_until(0)
+    assert {assigned[id(first)][1], assigned[id(second)][1]} == {0, 1}
+
+
+def test_invalid_destination_is_rejected():
+    engine, _ = destination_engine()
+    assert engine.press_destination(3, 3) is None
+    assert engine.press_destination(0, 5) is None
+    assert engine.press_destination(5, 21) is None
@@ -0,0 +1,77 @@
+from core.constants import MOVING_STATUS, OUTER_TASK_STATUS
+from core.hall_calls import HallCallRegistry
+from core.requests import OUTER_BUTTON_GENERATE_TASK
+
+UP, DOWN = MOVING_STATUS.up, MOVING_STATUS.down
+
+
+def make_registry(*calls):
+    registry = HallCallRegistry()
+    tasks = [OUTER_BUTTON_GENERATE_TASK(floor, move_state) for floor, move_state in calls]
+    for task in tasks:
+        assert registry.add(task)
+    return registry, tasks
+
+
+def test_add_deduplicates_by_floor_and_direction():
+    registry, (task,) = make_registry((3, UP))
+    assert not registry.add(OUTER_BUTTON_GENERATE_TASK(3, UP))
+    assert registry.add(OUTER_BUTTON_GENERATE_TASK(3, DOWN))
+    assert len(registry) == 2
+    assert registry.get(3, UP) is task
+    assert registry.snapshot() == {(3, UP), (3, DOWN)}
+
+
+def test_unassigned_keeps_insertion_order():
+    registry, tasks = make_registry((5, DOWN), (2, UP), (9, UP))
+    assert registry.unassigned() == tasks
+    assert registry.has_unassigned()
+
+
+def test_assign_and_unassign():
+    registry, (first, second) = make_registry((4, UP), (7, DOWN))
+    registry.assign(first, 1)
+    assert first.state == OUTER_TASK_STATUS.waiting
+    assert registry.owner(first) == 1
+    assert registry.assigned_to(1) == [first]
+    assert registry.unassigned() == [second]
+
+    # 重新分配到另一台电梯时从原电梯的索引中移除
+    registry.assign(first, 2)
+    assert registry.assigned_count(1) == 0
+    assert registry.assigned_to(2) == [first]
+
+    registry.unassign(first)
+    assert first.state == OUTER_TASK_STATUS.unassigned
+    assert registry.owner(first) == -1
+    assert registry.assigned_count(2) == 0
+    assert first in registry.unassigned()
+
+
+def test_release_elevator_only_releases_its_own_tasks():
+    registry, (a, b, c) = make_registry((2, UP), (6, DOWN), (8, UP))
+    registry.assign(a, 0)
+    registry.assign(b, 0)
+    registry.assign(c, 1)
+    released = registry.release_elevator(0)
+    assert sorted(task.target for task in released) == [2, 6]
+    assert all(task.state == OUTER_TASK_STATUS.unassigned for task in released)
+    assert registry.owner(c) == 1
+    assert c.state == OUTER_TASK_STATUS.waiting
+    assert sorted(task.target for task in registry.unassigned()) == [2, 6]
+    assert registry.release_elevator(0) == []
+
+
+def test_finish_floor_removes_both_directions():
+    registry, (up, down, other) = make_registry((5, UP), (5, DOWN), (6, UP))
+    registry.assign(up, 3)
+    finished = registry.finish_floor(5)
+    assert {task.move_state for task in finished} == {UP, DOWN}
+    assert up.state == OUTER_TASK_STATUS.finished and down.state == OUTER_TASK_STATUS.finished
+    assert registry.assigned_count(3) == 0
+    assert registry.unassigned() == [other]
+    assert registry.snapshot() == {(6, UP)}
+    assert up not in registry
+    assert registry.finish_floor(5) == []
+    # 完成后同一楼层可以再次登记
+    assert registry.add(OUTER_BUTTON_GENERATE_TASK(5, UP))
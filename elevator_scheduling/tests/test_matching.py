@@ -0,0 +1,51 @@
+import numpy as np
+from core.matching_dispatch import STOP_PENALTY, solve_assignment
+
+INF = float('inf')
+
+
+def test_infeasible_pair_does_not_drop_car():
+    cost = np.array([[1, INF], [5, 1]])
+    assert solve_assignment(cost, np.zeros(2, dtype=np.int64)).tolist() == [0, 1]
+
+
+def test_infeasible_pairs_are_never_assigned():
+    cost = np.array([[INF, 2], [INF, 1]])
+    assert solve_assignment(cost, np.zeros(2, dtype=np.int64)).tolist() == [-1, 1]
+
+
+def test_broken_car_gets_nothing():
+    cost = np.array([[INF, INF], [3, 4]])
+    assert solve_assignment(cost, np.zeros(2, dtype=np.int64)).tolist() == [1, 1]
+
+
+def test_capacity_leaves_calls_for_next_round():
+    cost = np.array([[1.0, 2.0, 3.0]])
+    choice = solve_assignment(cost, np.array([6]), capacity=8)
+    assert sorted(choice.tolist()) == [-1, 0, 0]
+    assert solve_assignment(cost, np.array([8]), capacity=8).tolist() == [-1, -1, -1]
+
+
+def test_extra_stops_spread_calls_over_cars():
+    # 第二台电梯远 1 层, 比在第一台电梯上多停一站便宜
+    cost = np.array([[1.0, 1.0], [2.0, 2.0]])
+    assert 1 < STOP_PENALTY
+    assert sorted(solve_assignment(cost, np.zeros(2, dtype=np.int64)).tolist()) == [0, 1]
+
+
+def test_dispatcher_reports_solve_time():
+    from core.constants import MOVING_STATUS
+    from core.dispatch import TaskDispatcher
+    from core.metrics import Metrics
+    from core.requests import OUTER_BUTTON_GENERATE_TASK
+    from core.state import BuildingState
+
+    state = BuildingState(3, 20)
+    for floor in (4, 9, 15):
+        state.outer_request.add(OUTER_BUTTON_GENERATE_TASK(floor, MOVING_STATUS.down))
+    metrics = Metrics()
+    dispatcher = TaskDispatcher(state, matching=True, metrics=metrics)
+    assert dispatcher.assign_tasks()
+    assert dispatcher.solve_count == 1
+    assert dispatcher.total_solve_time == dispatcher.max_solve_time == dispatcher.last_solve_time > 0
+    assert metrics.snapshot()['histograms']['matching_solve']['count'] == 1
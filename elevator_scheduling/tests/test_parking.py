@@ -0,0 +1,38 @@
+from core.constants import MOVING_STATUS
+from core.parking import DemandHistogram, ParkingPlanner
+from core.simulation import SimulationEngine
+
+
+def test_predict_prefers_busiest_floors():
+    histogram = DemandHistogram(floors=20)
+    for floor, presses in ((12, 10), (3, 4), (18, 1)):
+        for _ in range(presses):
+            histogram.record(0, floor)
+    assert histogram.predict(0, 1) == [12]
+    assert histogram.predict(0, 2) == [12, 3]
+
+
+def test_plan_sends_nearest_idle_car():
+    histogram = DemandHistogram(floors=20)
+    histogram.record(0, 15)
+    assert ParkingPlanner(histogram).plan(0, [(0, 2), (1, 13)]) == {1: 15}
+
+
+def test_idle_car_parks_at_demand_floor():
+    engine = SimulationEngine(elevator_nums=1, floors=20, parking=True)
+    doors = []
+    engine.door_listeners.append(lambda elevator_id, floor, opened: opened and doors.append(floor))
+    engine.schedule_at(0, engine.press_outer, 12, MOVING_STATUS.up)
+    engine.schedule_at(20000, engine.press_inner, 0, 3)
+    engine.run()
+    # 送完乘客后停在 3 层, 空闲一段时间后回到需求最多的 12 层, 到达时不开门
+    assert doors == [12, 3]
+    assert engine.state.elevators[0].current_floor == 12
+
+
+def test_no_parking_by_default():
+    engine = SimulationEngine(elevator_nums=1, floors=20)
+    engine.schedule_at(0, engine.press_outer, 12, MOVING_STATUS.up)
+    engine.schedule_at(20000, engine.press_inner, 0, 3)
+    engine.run()
+    assert engine.state.elevators[0].current_floor == 3
@@ -0,0 +1,61 @@
+import random
+import pytest
+from core.constants import ELEVATOR_STATUS, MOVING_STATUS
+from core.dispatch import TaskDispatcher
+from core.policies import POLICIES, CostPolicy, DispatchPolicy, load_policy
+from core.requests import OUTER_BUTTON_GENERATE_TASK
+from core.state import BuildingState
+
+UP, DOWN = MOVING_STATUS.up, MOVING_STATUS.down
+
+
+# 随机设置电梯的楼层、状态和停靠楼层, 包括故障的电梯
+def random_building(seed, elevator_nums=8, floors=30):
+    rng = random.Random(seed)
+    state = BuildingState(elevator_nums, floors)
+    for elevator in state.elevators:
+        elevator.current_floor = rng.randint(1, floors)
+        elevator.status = rng.choice(list(ELEVATOR_STATUS))
+        elevator.move_status = rng.choice([UP, DOWN])
+        for _ in range(rng.randint(0, 4)):
+            floor = rng.randint(1, floors)
+            if floor >= elevator.current_floor:
+                elevator.remaining_up_task.add(floor)
+            if floor <= elevator.current_floor:
+                elevator.remaining_down_task.add(floor)
+    tasks = [OUTER_BUTTON_GENERATE_TASK(rng.randint(1, floors), rng.choice([UP, DOWN])) for _ in range(20)]
+    return state, tasks
+
+
+def test_load_policy_by_name_and_object():
+    assert isinstance(load_policy('cost'), CostPolicy)
+    policy = POLICIES['look'](5, 20)
+    assert load_policy(policy) is policy
+
+
+def test_load_policy_rejects_unknown_name():
+    with pytest.raises(ValueError):
+        load_policy('fastest')
+
+
+def test_cost_policy_distance():
+    state = BuildingState(1, 20)
+    elevator = state.elevators[0]
+    elevator.current_floor = 5
+    policy = CostPolicy(1, 20)
+    # 空闲电梯按距离, 不在上行中的电梯从当前楼层的下面一层算起
+    assert policy.calculate_cost(0, elevator, OUTER_BUTTON_GENERATE_TASK(9, DOWN)) == 5
+    # 向上扫描时顺路的呼叫按距离, 不顺路的先走到最远的停靠楼层再折返
+    elevator.move_status = UP
+    elevator.remaining_up_task.add(12)
+    assert policy.calculate_cost(0, elevator, OUTER_BUTTON_GENERATE_TASK(9, UP)) == 5
+    assert policy.calculate_cost(0, elevator, OUTER_BUTTON_GENERATE_TASK(9, DOWN)) == 8 + 3
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_cost_matrix_matches_calculate_cost(seed):
+    state, tasks = random_building(seed)
+    dispatcher = TaskDispatcher(state, 'cost')
+    vectorized = dispatcher.policy.cost_matrix(dispatcher, tasks)
+    scalar = DispatchPolicy.cost_matrix(dispatcher.policy, dispatcher, tasks)
+    assert vectorized.tolist() == scalar.tolist()
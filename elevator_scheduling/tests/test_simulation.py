@@ -0,0 +1,105 @@
+from core.constants import ELEVATOR_STATUS, MOVING_STATUS, OUTER_TASK_STATUS, TIME_ATOMIC_MOVE, TIME_DOOR_OP, \
+    TIME_STAY_OPEN
+from core.simulation import SimulationEngine
+
+UP, DOWN = MOVING_STATUS.up, MOVING_STATUS.down
+
+
+# 记录每次开门和关门完成的 (时间, 电梯编号, 楼层, 是否打开)
+def engine_with_doors(elevator_nums=1, floors=10):
+    engine = SimulationEngine(elevator_nums=elevator_nums, floors=floors)
+    doors = []
+    engine.door_listeners.append(lambda elevator_id, floor, opened: doors.append((engine.now, elevator_id, floor, opened)))
+    return engine, doors
+
+
+def test_events_run_in_time_then_insertion_order():
+    engine = SimulationEngine(elevator_nums=1, floors=10)
+    order = []
+    engine.schedule_at(20, order.append, 'c')
+    engine.schedule_at(10, order.append, 'a')
+    engine.schedule_at(10, order.append, 'b')
+    engine.schedule_at(15, order.append, 'skipped').cancel()
+    engine.run()
+    assert order == ['a', 'b', 'c']
+    assert engine.now == 20
+    # 过去的时间按当前时间处理
+    engine.schedule_at(5, order.append, 'late')
+    engine.run()
+    assert order[-1] == 'late' and engine.now == 20
+
+
+def test_run_until_stops_at_end_time():
+    engine = SimulationEngine(elevator_nums=1, floors=10)
+    order = []
+    engine.schedule_at(100, order.append, 1)
+    engine.schedule_at(300, order.append, 2)
+    engine.run_until(200)
+    assert order == [1] and engine.now == 200
+    engine.run_until(300)
+    assert order == [1, 2]
+
+
+def test_door_timing():
+    engine, doors = engine_with_doors()
+    engine.press_inner(0, 4)
+    engine.run()
+    arrived = 3 * TIME_ATOMIC_MOVE
+    assert doors == [
+        (arrived + TIME_DOOR_OP, 0, 4, True),
+        (arrived + 2 * TIME_DOOR_OP + TIME_STAY_OPEN, 0, 4, False),
+    ]
+    elevator = engine.state.elevators[0]
+    assert elevator.current_floor == 4
+    assert elevator.status == ELEVATOR_STATUS.normal
+    assert engine.elevators[0].floors_travelled == 3
+    assert engine.elevators[0].stop_count == 1
+
+
+def test_door_status_during_stop():
+    engine, _ = engine_with_doors()
+    engine.press_inner(0, 2)
+    engine.run_until(TIME_ATOMIC_MOVE + TIME_DOOR_OP // 2)
+    elevator = engine.state.elevators[0]
+    assert elevator.status == ELEVATOR_STATUS.door_openning
+    assert elevator.door_open_status == 0.5
+    engine.run_until(TIME_ATOMIC_MOVE + TIME_DOOR_OP)
+    assert elevator.status == ELEVATOR_STATUS.door_open
+
+
+def test_car_calls_served_in_sweep_order():
+    engine, doors = engine_with_doors()
+    engine.press_inner(0, 7)
+    engine.press_inner(0, 3)
+    engine.schedule_at(TIME_ATOMIC_MOVE, engine.press_inner, 0, 5)
+    engine.run()
+    assert [floor for _, _, floor, opened in doors if opened] == [3, 5, 7]
+
+
+def test_hall_call_completes():
+    engine, doors = engine_with_doors(elevator_nums=2)
+    engine.press_outer(6, DOWN)
+    task = engine.state.outer_request.get(6, DOWN)
+    engine.run()
+    assert task.state == OUTER_TASK_STATUS.finished
+    assert len(engine.state.outer_request) == 0
+    assert [(floor, opened) for _, _, floor, opened in doors] == [(6, True), (6, False)]
+
+
+def test_invalid_presses_are_ignored():
+    engine, doors = engine_with_doors()
+    assert not engine.press_outer(11, DOWN)
+    assert not engine.press_inner(0, 0)
+    engine.run()
+    assert doors == []
+
+
+def test_fault_reassigns_hall_call():
+    engine, doors = engine_with_doors(elevator_nums=2)
+    engine.press_outer(8, DOWN)
+    engine.run_until(TIME_ATOMIC_MOVE)
+    owner = engine.state.outer_request.owner(engine.state.outer_request.get(8, DOWN))
+    engine.toggle_fault(owner)
+    engine.run()
+    assert [(elevator_id, floor) for _, elevator_id, floor, opened in doors if opened] == [(1 - owner, 8)]
+    assert engine.state.elevators[owner].status == ELEVATOR_STATUS.break_down
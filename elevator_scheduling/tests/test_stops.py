@@ -0,0 +1,49 @@
+from core.stops import StopSet
+
+
+def test_ascending_order_and_dedup():
+    stops = StopSet(ascending=True)
+    for floor in (7, 3, 12, 3, 7, 5):
+        stops.add(floor)
+    assert list(stops) == [3, 5, 7, 12]
+    assert len(stops) == 4
+    assert stops.next_stop() == 3
+    assert stops.last_stop() == 12
+
+
+def test_descending_order():
+    stops = StopSet(ascending=False)
+    for floor in (4, 15, 9):
+        stops.add(floor)
+    assert list(stops) == [15, 9, 4]
+    assert stops.next_stop() == 15
+    assert stops.last_stop() == 4
+
+
+def test_add_reports_new_floors():
+    stops = StopSet()
+    assert stops.add(6)
+    assert not stops.add(6)
+    assert 6 in stops and 5 not in stops
+
+
+def test_pop_next_and_readd():
+    stops = StopSet()
+    for floor in (2, 8, 5):
+        stops.add(floor)
+    assert stops.pop_next() == 2
+    assert 2 not in stops
+    assert list(stops) == [5, 8]
+    # 弹出后可以再次加入
+    assert stops.add(2)
+    assert stops.next_stop() == 2
+
+
+def test_clear():
+    stops = StopSet(ascending=False)
+    stops.add(3)
+    stops.add(10)
+    stops.clear()
+    assert not stops
+    assert 3 not in stops
+    assert stops.add(3)
@@ -0,0 +1,120 @@
+import struct
+import pytest
+from core import trace
+from core.constants import MOVING_STATUS
+from core.trace import TraceRecorder, read_trace
+
+
+def record(path, elevator_nums=5, floors=20):
+    moment = [0]
+    recorder = TraceRecorder(str(path), elevator_nums, floors, clock=lambda: moment[0])
+    return recorder, moment
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / 'run.elvt'
+    recorder, moment = record(path)
+    recorder.outer(7, MOVING_STATUS.down)
+    moment[0] = 120
+    recorder.inner(2, 15)
+    recorder.open_door(1)
+    moment[0] = 300
+    recorder.close_door(1)
+    recorder.fault(4)
+    recorder.generate(10)
+    recorder.close()
+
+    events = read_trace(str(path)).events
+    assert events == [
+        trace.TraceEvent(0, trace.OUTER, -1, 7),
+        trace.TraceEvent(120, trace.INNER, 2, 15),
+        trace.TraceEvent(120, trace.OPEN, 1, 0),
+        trace.TraceEvent(300, trace.CLOSE, 1, 0),
+        trace.TraceEvent(300, trace.FAULT, 4, 0),
+        trace.TraceEvent(300, trace.GENERATE, 0, 10),
+    ]
+
+
+def test_large_generate_count(tmp_path):
+    path = tmp_path / 'run.elvt'
+    recorder, _ = record(path)
+    recorder.generate(100000)
+    recorder.close()
+    assert read_trace(str(path)).events[0].floor == 100000
+
+
+def test_truncated_record_is_ignored(tmp_path):
+    path = tmp_path / 'run.elvt'
+    recorder, _ = record(path)
+    recorder.inner(0, 3)
+    recorder.inner(1, 4)
+    recorder.close()
+    data = path.read_bytes()
+    path.write_bytes(data[:-3])
+    assert [event.floor for event in read_trace(str(path)).events] == [3]
+
+
+def test_reads_version_1(tmp_path):
+    path = tmp_path / 'old.elvt'
+    path.write_bytes(trace.HEADER.pack(trace.MAGIC, 1) + struct.pack('<IBbh', 50, trace.INNER, 3, 9))
+    assert read_trace(str(path)).events == [trace.TraceEvent(50, trace.INNER, 3, 9)]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'not a trace file')
+    with pytest.raises(ValueError):
+        read_trace(str(path))
+
+
+def test_building_size_round_trip(tmp_path):
+    path = tmp_path / 'large.elvt'
+    recorder, _ = record(path, elevator_nums=64, floors=200)
+    recorder.inner(63, 200)
+    recorder.close()
+    loaded = read_trace(str(path))
+    assert (loaded.elevator_nums, loaded.floors) == (64, 200)
+    assert loaded.events == [trace.TraceEvent(0, trace.INNER, 63, 200)]
+
+
+def test_version_1_has_no_building_size(tmp_path):
+    path = tmp_path / 'old.elvt'
+    path.write_bytes(trace.HEADER.pack(trace.MAGIC, 1))
+    loaded = read_trace(str(path))
+    assert (loaded.elevator_nums, loaded.floors) == (None, None)
+
+
+def test_replay_uses_recorded_building_size(tmp_path):
+    from benchmarks.runner import run_trace
+    path = tmp_path / 'large.elvt'
+    recorder, _ = record(path, elevator_nums=64, floors=200)
+    recorder.inner(63, 200)
+    recorder.close()
+    result = run_trace(str(path), 'cost', 'greedy')
+    assert result['floors_travelled'] == 199
+
+
+def test_large_ids_and_times(tmp_path):
+    path = tmp_path / 'huge.elvt'
+    recorder, moment = record(path, elevator_nums=70000, floors=200)
+    moment[0] = 60 * 24 * 3600 * 1000
+    recorder.inner(69999, 200)
+    recorder.fault(128)
+    recorder.generate(2 ** 31 - 1)
+    recorder.close()
+    loaded = read_trace(str(path))
+    assert (loaded.elevator_nums, loaded.floors) == (70000, 200)
+    assert loaded.events == [
+        trace.TraceEvent(moment[0], trace.INNER, 69999, 200),
+        trace.TraceEvent(moment[0], trace.FAULT, 128, 0),
+        trace.TraceEvent(moment[0], trace.GENERATE, 0, 2 ** 31 - 1),
+    ]
+
+
+def test_reads_version_3(tmp_path):
+    path = tmp_path / 'v3.elvt'
+    path.write_bytes(trace.HEADER.pack(trace.MAGIC, 3) + struct.pack('<HH', 64, 200)
+                     + struct.pack('<IBbi', 50, trace.INNER, 63, 200))
+    loaded = read_trace(str(path))
+    assert (loaded.elevator_nums, loaded.floors) == (64, 200)
+    assert loaded.events == [trace.TraceEvent(50, trace.INNER, 63, 200)]
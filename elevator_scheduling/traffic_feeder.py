@@ -0,0 +1,146 @@
+import queue
+import time
+from PyQt5.QtCore import QThread
+from core.constants import ELEVATOR_STATUS, MOVING_STATUS
+from core.requests import OUTER_BUTTON_GENERATE_TASK
+from utils import global_vars
+from utils.global_vars import elevators, elevator_mutex, elevator_wakeup, outer_request, task_arrived, snapshots
+
+# 流量生成线程: 每隔 window 毫秒把这段时间内到达的乘客整批放进队列, 不接触任何共享状态
+# speed 大于1时按比例加快流量的时钟(例如一天的流量几分钟内放完)
+class TrafficProducer(QThread):
+    def __init__(self, generator, batches, window=100, speed=1.0):
+        super().__init__()
+        self.generator = generator
+        self.batches = batches
+        self.window = window
+        self.speed = speed
+
+    def run(self):
+        start = time.monotonic()
+        generated = 0.0                     # 已经生成到的流量时间(毫秒)
+        while not self.isInterruptionRequested():
+            target = (time.monotonic() - start) * 1000 * self.speed
+            if target > generated:
+                _, origins, destinations = self.generator.generate(generated, target)
+                generated = target
+                if len(origins):
+                    self.batches.put((origins, destinations))
+            self.msleep(self.window)
+
+
+# 把生成的乘客交给电梯系统, 在界面线程中由定时器调用 drain
+# 乘客在出发楼层等待并按下外部按钮; 电梯在该层开门时同方向的乘客上车, 按下去目的楼层的按钮;
+# 外部任务在关门时被清除而仍有乘客在等(方向不同没有上车)时, 这些乘客再按一次
+# 一批乘客只加一次锁、只唤醒一次调度线程, 不逐个调用按钮处理函数, 也不逐个写运行信息
+class TrafficFeeder:
+    def __init__(self, generator, recorder=None):
+        self.generator = generator
+        self.recorder = recorder
+        self.metrics = global_vars.metrics
+        self.batches = queue.SimpleQueue()  # 生成线程或"产生随机任务"放入的 (出发楼层数组, 目的楼层数组)
+        self.waiting = {}                   # (楼层, 方向) -> {目的楼层: 人数}
+        self.producer = None
+        self.arrived = 0                    # 累计到达的乘客
+        self.boarded = 0                    # 累计上车的乘客
+
+    # 一次放入 count 名乘客, 出发和目的楼层按生成器当前的 OD 矩阵抽样
+    def burst(self, count):
+        self.batches.put(self.generator.sample(count))
+
+    # 开始按生成器的时变流量持续产生乘客
+    def start(self, speed=1.0, window=100):
+        self.producer = TrafficProducer(self.generator, self.batches, window, speed)
+        self.producer.start()
+
+    def stop(self):
+        if self.producer is not None:
+            self.producer.requestInterruption()
+            self.producer.wait()
+            self.producer = None
+
+    # 处理队列中的全部乘客, 然后让开门的电梯载客, 给还在等待的乘客按外部按钮; 返回本次到达的乘客数
+    def drain(self):
+        arrived = 0
+        while True:
+            try:
+                origins, destinations = self.batches.get_nowait()
+            except queue.Empty:
+                break
+            arrived += self.arrive(origins, destinations)
+        self.board()
+        self.press_waiting()
+        return arrived
+
+    # 同一 (出发, 目的) 的乘客合并计数, 一批最多 楼层数² 次字典操作
+    def arrive(self, origins, destinations):
+        import numpy as np
+
+        stride = self.generator.floors + 1
+        pairs, counts = np.unique(origins * stride + destinations, return_counts=True)
+        for pair, count in zip(pairs.tolist(), counts.tolist()):
+            origin, destination = divmod(pair, stride)
+            move_state = MOVING_STATUS.up if destination > origin else MOVING_STATUS.down
+            waiting = self.waiting.setdefault((origin, move_state), {})
+            waiting[destination] = waiting.get(destination, 0) + count
+        self.arrived += len(origins)
+        if self.metrics is not None:
+            self.metrics.count('passengers', len(origins))
+        return len(origins)
+
+    # 门已打开的电梯载上同方向的乘客; 电梯在该方向上没有更远的停靠楼层时也载反方向的乘客
+    def board(self):
+        for elevator_id, snapshot in enumerate(snapshots.elevators()):
+            if snapshot.status != ELEVATOR_STATUS.door_open:
+                continue
+            floor = snapshot.current_floor
+            state = elevators[elevator_id]
+            elevator_mutex[elevator_id].lock()
+            if state.status != ELEVATOR_STATUS.door_open or state.current_floor != floor:
+                elevator_mutex[elevator_id].unlock()
+                continue
+            directions = [state.move_status]
+            stops = state.remaining_up_task if state.move_status == MOVING_STATUS.up else state.remaining_down_task
+            if not any(stop != floor for stop in stops):
+                directions.append(MOVING_STATUS.down if state.move_status == MOVING_STATUS.up else MOVING_STATUS.up)
+            pressed = []
+            for move_state in directions:
+                waiting = self.waiting.pop((floor, move_state), None)
+                if waiting is None:
+                    continue
+                for destination, count in waiting.items():
+                    self.boarded += count
+                    stops = state.remaining_up_task if destination > floor else state.remaining_down_task
+                    if stops.add(destination):
+                        pressed.append(destination)
+                break
+            if pressed:
+                elevator_wakeup[elevator_id].wakeAll()
+            elevator_mutex[elevator_id].unlock()
+            for destination in pressed:
+                if self.recorder is not None:
+                    self.recorder.inner(elevator_id, destination)
+                if self.metrics is not None:
+                    self.metrics.car_call(elevator_id, destination)
+
+    # 有乘客等待但没有外部任务的 (楼层, 方向) 按一次外部按钮
+    def press_waiting(self):
+        if not self.waiting:
+            return
+        if all(state.status == ELEVATOR_STATUS.break_down for state in elevators):
+            return
+        pressed = []
+        request_mutex = global_vars.request_mutex
+        request_mutex.lock()
+        for floor, move_state in self.waiting:
+            if outer_request.get(floor, move_state) is None:
+                outer_request.add(OUTER_BUTTON_GENERATE_TASK(floor, move_state))
+                pressed.append((floor, move_state))
+        if pressed:
+            task_arrived.wakeAll()
+        request_mutex.unlock()
+        for floor, move_state in pressed:
+            if self.recorder is not None:
+                self.recorder.outer(floor, move_state)
+            if self.metrics is not None:
+                self.metrics.hall_call(floor)
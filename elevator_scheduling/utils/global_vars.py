@@ -1,42 +1,76 @@
-from PyQt5.QtCore import QMutex
-from .constants import ELEVATOR_STATUS, ELEVATOR_NUMS, MOVING_STATUS
+import time
+from PyQt5.QtCore import QMutex, QWaitCondition
+from core.constants import ELEVATOR_NUMS, FLOORS
+from core.state import ElevatorStateStore, check_building_size
+from core.hall_calls import HallCallRegistry
+from core.snapshot import SnapshotBuffer
 
 # 全局变量存储
-elevator_status = []                    # 每组电梯的状态
-elevator_move_status = []               # 每台电梯当前的扫描运行状态
-elevator_current_floor = []                 # 每台电梯的当前楼层
-remaining_up_task = []                    # 电梯在向上扫描的过程中，还需要处理的任务
-remaining_down_task = []                  # 电梯在向下扫描的过程中，还需要处理的任务
-open_button_clicked = []                # 每台电梯内部的开门键是否被按
-close_button_clicked = []               # 每台电梯内部的关门键是否被按
-door_open_status = []                   # 每台电梯开门的进度条 范围为0-1的浮点数
+# 每台电梯的状态各自加锁, 外部请求单独加锁, 电梯之间互不阻塞
+# 加锁顺序: 先 request_mutex 再 elevator_mutex, 持有电梯锁时不得再去获取 request_mutex
+floors = FLOORS                         # 楼层数, 由 init_global_vars 设置
+elevators = ElevatorStateStore()        # 每台电梯的状态, 按电梯编号取出 ElevatorState
+elevator_mutex = []                     # 每台电梯各自的互斥锁
+elevator_wakeup = []                    # 每台电梯有新任务时唤醒对应的电梯线程(与 elevator_mutex 配合使用)
 elevator_door = []                 # 每个电梯的电梯门
-outer_request = []                  # 外部按钮请求的事件
-mutex = QMutex()                        # mutex互斥锁
+outer_request = HallCallRegistry()  # 外部按钮请求的事件
+request_mutex = QMutex()                # 保护 outer_request 的互斥锁
+task_arrived = QWaitCondition()         # 有外部任务需要分配时唤醒调度线程(与 request_mutex 配合使用)
+snapshots = SnapshotBuffer()            # 每台电梯的状态快照, 修改状态的一方在释放电梯锁前发布, 界面无锁读取
+metrics = None                          # 运行指标 core.metrics.Metrics, 为 None 时不记录
+
+# 记录等待时间和持有时间的互斥锁, 只在启用运行指标时代替 QMutex, 不启用时没有任何额外开销
+# 在条件变量上等待时要用 wait_condition, 等待期间不算作持有
+class TimedMutex(QMutex):
+    def __init__(self, name, metrics):
+        super().__init__()
+        self.wait_name = name + '.wait'
+        self.hold_name = name + '.hold'
+        self.metrics = metrics
+        self.acquired = 0.0             # 最近一次获得锁的时间, 只由持有者读写
+
+    def lock(self):
+        start = time.perf_counter()
+        super().lock()
+        self.acquired = time.perf_counter()
+        self.metrics.record(self.wait_name, (self.acquired - start) * 1000)
+
+    def unlock(self):
+        self.metrics.record(self.hold_name, (time.perf_counter() - self.acquired) * 1000)
+        super().unlock()
+
+
+# 在条件变量上等待(期间释放 mutex), timeout 为毫秒, None 表示一直等待
+def wait_condition(condition, mutex, timeout=None):
+    timed = type(mutex) is TimedMutex
+    if timed:
+        mutex.metrics.record(mutex.hold_name, (time.perf_counter() - mutex.acquired) * 1000)
+    if timeout is None:
+        condition.wait(mutex)
+    else:
+        condition.wait(mutex, timeout)
+    if timed:
+        mutex.acquired = time.perf_counter()
+
 
 # 初始化全局变量
-def init_global_vars():
-    global elevator_status, elevator_move_status, elevator_current_floor
-    global remaining_up_task, remaining_down_task
-    global open_button_clicked, close_button_clicked, door_open_status
-    
+# run_metrics 为 core.metrics.Metrics 时启用运行指标, 所有的锁换成 TimedMutex; 使用 request_mutex 的模块
+# 要在初始化之后通过 global_vars.request_mutex 取得它
+def init_global_vars(elevator_nums=ELEVATOR_NUMS, floor_nums=FLOORS, run_metrics=None):
+    global floors, request_mutex, metrics
+    check_building_size(elevator_nums, floor_nums)
+    floors = floor_nums
+    metrics = run_metrics
+    if metrics is not None:
+        request_mutex = TimedMutex('request_mutex', metrics)
+
     # 清空 以防重复初始化
-    elevator_status.clear()
-    elevator_move_status.clear()
-    elevator_current_floor.clear()
-    remaining_up_task.clear()
-    remaining_down_task.clear()
-    open_button_clicked.clear()
-    close_button_clicked.clear()
-    door_open_status.clear()
-    
+    elevators.reset(elevator_nums)  # 默认正常 停在1楼 向上扫描 门关闭
+    elevator_mutex.clear()
+    elevator_wakeup.clear()
+    snapshots.reset(elevator_nums)
+
     # 初始化
-    for i in range(ELEVATOR_NUMS):
-        elevator_status.append(ELEVATOR_STATUS.normal)  # 默认正常
-        elevator_current_floor.append(1)  # 默认在1楼
-        remaining_up_task.append([])  # 二维数组
-        remaining_down_task.append([])  # 二维数组
-        close_button_clicked.append(False)  # 默认关门键没按
-        open_button_clicked.append(False)  # 默认关门键没按
-        elevator_move_status.append(MOVING_STATUS.up)  # 默认向上
-        door_open_status.append(0.0)  # 默认门没开 即进度为0.0
\ No newline at end of file
+    for i in range(elevator_nums):
+        elevator_mutex.append(QMutex() if metrics is None else TimedMutex('elevator_mutex', metrics))
+        elevator_wakeup.append(QWaitCondition())  # 空闲时在此等待